@@ -3,26 +3,35 @@ import open3d as o3d
 # Path to your GLB file
 model_path = r"D:\infotainment system\3d model\smart electric bicycle fixed.glb"
 
-# Initialize the GUI application
-o3d.visualization.gui.Application.instance.initialize()
 
-# Create a window
-window = o3d.visualization.gui.Application.instance.create_window("3D Model Viewer", 800, 600)
+def load_model(path=model_path):
+    """Initialize the Open3D GUI and read the GLB model with materials and textures"""
+    o3d.visualization.gui.Application.instance.initialize()
+    return o3d.io.read_triangle_model(path)
 
-# Create a scene widget
-scene_widget = o3d.visualization.gui.SceneWidget()
-scene_widget.scene = o3d.visualization.rendering.Open3DScene(window.renderer)
 
-# Load GLB model with materials and textures
-model = o3d.io.read_triangle_model(model_path)
-scene_widget.scene.add_model("model", model)
+def show_model(model, title="3D Model Viewer", field_of_view=40):
+    """Open the viewer window for an already loaded model and run the GUI app"""
+    app = o3d.visualization.gui.Application.instance
 
-# Setup camera
-bounds = scene_widget.scene.bounding_box
-scene_widget.setup_camera(40, bounds, bounds.get_center())
+    # Create a window
+    window = app.create_window(title, 800, 600)
 
-# Add scene widget to the window
-window.add_child(scene_widget)
+    # Create a scene widget
+    scene_widget = o3d.visualization.gui.SceneWidget()
+    scene_widget.scene = o3d.visualization.rendering.Open3DScene(window.renderer)
+    scene_widget.scene.add_model("model", model)
 
-# Run the GUI app
-o3d.visualization.gui.Application.instance.run()
+    # Setup camera
+    bounds = scene_widget.scene.bounding_box
+    scene_widget.setup_camera(field_of_view, bounds, bounds.get_center())
+
+    # Add scene widget to the window
+    window.add_child(scene_widget)
+
+    # Run the GUI app
+    app.run()
+
+
+if __name__ == "__main__":
+    show_model(load_model())
@@ -0,0 +1,243 @@
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+
+import app_paths
+import music_library
+
+try:
+    from mutagen.flac import Picture
+except ImportError:
+    Picture = None
+
+
+# Memory the thumbnails may use before the least recently used are dropped
+DEFAULT_BUDGET_BYTES = 4 * 1024 * 1024
+# Counted for a track without cover art, so those entries are bounded too
+MISSING_BYTES = 64
+
+THUMBNAIL_DIR = "album art"
+THUMBNAIL_QUALITY = 90
+
+# Requests waiting for the worker; older prefetches are dropped beyond this
+MAX_PENDING = 8
+
+# ID3 picture type of the front cover
+FRONT_COVER = 3
+
+
+def embedded_art(path):
+    """Bytes of the cover image embedded in path, or None"""
+    if music_library.mutagen is None:
+        return None
+    try:
+        audio = music_library.mutagen.File(path)
+    except Exception as e:  # mutagen raises its own error per format
+        print(f"Could not read cover art of {path}: {e}")
+        return None
+    if audio is None:
+        return None
+    pictures = list(getattr(audio, "pictures", []))  # FLAC
+    tags = audio.tags
+    if tags is not None:
+        if hasattr(tags, "getall"):  # ID3
+            pictures += tags.getall("APIC")
+        elif "covr" in tags:  # MP4
+            return bytes(tags["covr"][0])
+        elif Picture is not None:  # Vorbis comments
+            for value in tags.get("metadata_block_picture", []):
+                try:
+                    pictures.append(Picture(base64.b64decode(value)))
+                except Exception:
+                    continue
+    if not pictures:
+        return None
+    pictures.sort(key=lambda picture: picture.type != FRONT_COVER)
+    return pictures[0].data
+
+
+def thumbnail_digest(path, mtime, size):
+    return hashlib.sha1(f"{path}\0{mtime}\0{size}".encode()).hexdigest()
+
+
+def thumbnail_name(path, mtime, size, edge):
+    """Disk cache file name; a changed file gets a new name"""
+    return f"{thumbnail_digest(path, mtime, size)}_{edge}"
+
+
+class AlbumArtCache(QObject):
+    """Cover art thumbnails for the music player.
+
+    A worker thread extracts embedded art with mutagen, scales it to the
+    widget size and writes it to a disk cache keyed by path, mtime and size,
+    so every file is parsed once. Tracks without art leave an empty marker
+    file there. prune() drops the files of tracks that changed or are gone
+    after a rescan, so the folder does not grow with every edit. On the UI
+    thread, the thumbnails are kept as pixmaps in an LRU bounded by
+    budget_bytes. request() answers from memory at once and otherwise queues
+    the track. ready is emitted when it has been loaded.
+    """
+
+    ready = pyqtSignal(str, QPixmap)  # track path, thumbnail (null without art)
+    loaded = pyqtSignal(str, int, QImage)  # from the worker thread
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES, folder=None):
+        super().__init__()
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.entries = OrderedDict()  # (path, edge) -> QPixmap
+        self.folder = folder or app_paths.data_path(THUMBNAIL_DIR)
+        os.makedirs(self.folder, exist_ok=True)
+        self.pending = []  # (path, edge), the next one to load first
+        self.condition = threading.Condition()
+        self.thread = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.extracted = 0
+        self.evictions = 0
+        self.failures = 0
+        self.pruned = 0
+        self.loaded.connect(self.store)
+
+    def request(self, path, edge, prefetch=()):
+        """Thumbnail of path at edge x edge pixels, or None while it loads.
+
+        Tracks in prefetch are loaded in the background after path.
+        """
+        key = (path, edge)
+        pixmap = self.entries.get(key)
+        if pixmap is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        else:
+            self.misses += 1
+        self.queue([key] if pixmap is None else [], [(other, edge) for other in prefetch])
+        return pixmap
+
+    def queue(self, urgent, later):
+        later = [key for key in later if key not in self.entries]
+        if not urgent and not later:
+            return
+        with self.condition:
+            keys = urgent + later
+            self.pending = keys + [key for key in self.pending if key not in keys]
+            del self.pending[MAX_PENDING:]
+            self.condition.notify()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.work, name="album art", daemon=True)
+            self.thread.start()
+
+    def work(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                path, edge = self.pending.pop(0)
+            try:
+                image = self.load(path, edge)
+            except Exception as e:  # one unreadable file must not stop the worker
+                print(f"Could not load album art of {path}: {e}")
+                self.failures += 1
+                image = QImage()
+            self.loaded.emit(path, edge, image)
+
+    def load(self, path, edge):
+        """Thumbnail from the disk cache, extracted and written there if missing"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return QImage()
+        name = os.path.join(self.folder, thumbnail_name(path, stat.st_mtime, stat.st_size, edge))
+        if os.path.exists(name + ".jpg"):
+            self.disk_hits += 1
+            return QImage(name + ".jpg")
+        if os.path.exists(name + ".none"):
+            self.disk_hits += 1
+            return QImage()
+
+        self.extracted += 1
+        data = embedded_art(path)
+        image = QImage.fromData(data) if data else QImage()
+        if image.isNull():
+            open(name + ".none", "w").close()
+            return QImage()
+        image = image.scaled(edge, edge, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if not image.save(name + ".jpg", "JPG", THUMBNAIL_QUALITY):
+            print(f"Could not write album art thumbnail {name}.jpg")
+        return image
+
+    def prune(self, db_path, root):
+        """Delete thumbnails of files not indexed below root as they are now, in the background"""
+        threading.Thread(target=self.remove_stale, args=(db_path, root),
+                         name="album art prune", daemon=True).start()
+
+    def remove_stale(self, db_path, root):
+        try:
+            library = music_library.MusicLibrary(db_path)  # connections stay in their thread
+            try:
+                known = library.known(root)
+            finally:
+                library.close()
+            current = {thumbnail_digest(path, mtime, size) for path, (mtime, size) in known.items()}
+            names = os.listdir(self.folder)
+        except Exception as e:  # a broken index must not delete the whole cache
+            print(f"Could not prune album art in {self.folder}: {e}")
+            return
+        for name in names:
+            if name.split("_")[0] not in current:
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                    self.pruned += 1
+                except OSError as e:
+                    print(f"Could not remove album art thumbnail {name}: {e}")
+
+    def store(self, path, edge, image):
+        key = (path, edge)
+        pixmap = QPixmap.fromImage(image)
+        if key not in self.entries:
+            self.entries[key] = pixmap
+            self.used_bytes += thumbnail_bytes(pixmap)
+            self.evict()
+        self.ready.emit(path, pixmap)
+
+    def evict(self):
+        # always keep the newest entry
+        while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+            _, pixmap = self.entries.popitem(last=False)
+            self.used_bytes -= thumbnail_bytes(pixmap)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "extracted": self.extracted,
+            "evictions": self.evictions,
+            "failures": self.failures,
+            "pruned": self.pruned,
+            "entries": len(self.entries),
+            "bytes": self.used_bytes,
+        }
+
+
+def thumbnail_bytes(pixmap):
+    if pixmap.isNull():
+        return MISSING_BYTES
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+_cache = None
+
+
+def cache():
+    """The album art cache shared by the music player"""
+    global _cache
+    if _cache is None:
+        _cache = AlbumArtCache()
+    return _cache
@@ -0,0 +1,31 @@
+import os
+
+
+# Overrides for where the infotainment keeps its data and finds its music
+DATA_DIR_ENV = "INFOTAINMENT_DATA_DIR"
+MUSIC_DIR_ENV = "INFOTAINMENT_MUSIC_DIR"
+ASSETS_DIR_ENV = "INFOTAINMENT_ASSETS_DIR"
+
+
+def data_dir():
+    """Directory for databases, caches and saved state, created on first use"""
+    path = os.environ.get(DATA_DIR_ENV)
+    if not path:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+        path = os.path.join(base, "infotainment")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_path(name):
+    return os.path.join(data_dir(), name)
+
+
+def assets_dir():
+    """Where build_assets.py writes the prebuilt assets and the screens read them"""
+    return os.environ.get(ASSETS_DIR_ENV) or "assets"
+
+
+def music_dir(default):
+    """The music folder, unless the environment points somewhere else"""
+    return os.environ.get(MUSIC_DIR_ENV) or default
@@ -0,0 +1,91 @@
+import json
+import os
+from PyQt5.QtCore import QRect
+
+import app_paths
+import theme
+
+
+# Written by build_assets.py into app_paths.assets_dir(); relative paths are
+# relative to the working directory
+MANIFEST_NAME = "manifest.json"
+
+
+def manifest_path():
+    return os.path.join(app_paths.assets_dir(), MANIFEST_NAME)
+
+
+def size_key(width, height, mode=None):
+    """Variant key, "WxH", or "WxH night" for a theme that darkens backgrounds"""
+    key = f"{width}x{height}"
+    if mode and theme.colors(mode)["background_dim"]:
+        key = f"{key} {mode}"
+    return key
+
+
+class AssetManifest:
+    """Pre-scaled asset variants produced by build_assets.py.
+
+    The screens ask for an image at a target size, and the manifest returns
+    a file that already has exactly that size, so nothing is scaled at
+    runtime. Entries whose source image changed after the build are ignored.
+    """
+
+    def __init__(self, path=None):
+        self.path = path = path or manifest_path()
+        self.backgrounds = {}   # source path -> {size_key: variant path}
+        self.atlas = None       # (atlas path, {(name, on): QRect})
+        if os.path.exists(path):
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not read asset manifest {self.path}: {e}")
+            return
+
+        for source, entry in data.get("backgrounds", {}).items():
+            if self.is_current(source, entry):
+                self.backgrounds[source] = entry["variants"]
+
+        atlas = data.get("icon_atlas")
+        if atlas and all(self.is_current(source, {"source_mtime": mtime})
+                         for source, mtime in atlas["sources"].items()):
+            rects = {}
+            for name, states in atlas["icons"].items():
+                for state, rect in states.items():
+                    rects[(name, state == "on")] = QRect(*rect)
+            self.atlas = (atlas["path"], rects)
+
+    def is_current(self, source, entry):
+        try:
+            current = os.path.getmtime(source) <= entry["source_mtime"]
+        except OSError:
+            current = True  # only the built variant was deployed
+        if not current:
+            print(f"{source} changed since the last asset build, run build_assets.py")
+        return current
+
+    def background(self, path, size, mode=None):
+        """Variant of path already scaled to size (and dimmed for mode), or None"""
+        variants = self.backgrounds.get(path)
+        if variants:
+            return variants.get(size_key(size.width(), size.height(), mode))
+        return None
+
+    def icon_atlas(self):
+        """(atlas image path, {(name, on): QRect}) or None"""
+        return self.atlas
+
+
+_manifest = None
+
+
+def manifest():
+    """The asset manifest, read once on first use"""
+    global _manifest
+    if _manifest is None:
+        _manifest = AssetManifest()
+    return _manifest
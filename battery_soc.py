@@ -0,0 +1,235 @@
+import bisect
+import json
+import math
+import os
+import time
+
+import app_paths
+
+
+STATE_NAME = "battery_state.json"
+
+# The pack: 10S lithium ion (NMC), 10 Ah. Its voltage under load is the open
+# circuit voltage minus the instant sag over the internal resistance and the
+# polarization, a sag that builds up and settles with a time constant.
+CELLS = 10
+CAPACITY_AH = 10.0
+RESISTANCE_OHM = 0.08
+POLARIZATION_OHM = 0.05
+POLARIZATION_S = 40.0
+
+# Open circuit voltage of one cell at rest, by state of charge in %
+OCV_SOC = (0, 5, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100)
+OCV_CELL_V = (3.00, 3.30, 3.45, 3.55, 3.62, 3.68, 3.74, 3.82, 3.90, 3.98, 4.08, 4.20)
+OCV_V = tuple(CELLS * volts for volts in OCV_CELL_V)
+
+# Filter noise: growth of the charge's variance per second of coulomb counting
+# (current sensor error) and of the polarization's, and the variance of the
+# voltage model's error, plus its extra variance per ampere² of load, where
+# the sag model is least accurate. The model's error lasts for minutes, so
+# it is given per second: a sample step seconds long gets it divided by step.
+PROCESS_VARIANCE = 1e-4       # %² per s
+POLARIZATION_VARIANCE = 1e-4  # V² per s
+VOLTAGE_VARIANCE = 0.3        # V² s
+LOAD_VARIANCE = 0.003         # V² s per A²
+# The open circuit voltage table is off by an error of this variance that
+# stays the same over OCV_ERROR_SPAN of charge. At a low current the charge
+# takes long to cross that span, so the same error is seen by more samples
+# and each of them is worth less (below MIN_OCV_AMPS, as little as at it).
+OCV_VARIANCE = 0.001          # V²
+OCV_ERROR_SPAN = 5.0          # %
+MIN_OCV_AMPS = 1.0
+# The resistance starts at RESISTANCE_OHM, this uncertain, and may drift
+# (with temperature and age) this much; it stays within the bounds
+RESISTANCE_VARIANCE = 0.03 ** 2   # Ω²
+RESISTANCE_DRIFT = 1e-9           # Ω² per s
+MIN_RESISTANCE_OHM = 0.02
+MAX_RESISTANCE_OHM = 0.5
+
+# A longer gap between samples is a disconnect; nothing is counted over it
+MAX_GAP_S = 2.0
+# A sample without a usable step to the one before counts as this short
+MIN_STEP_S = 0.005
+
+# Without a saved state the first voltage reading decides, this uncertain
+INITIAL_VARIANCE = 100.0      # %²
+# A saved state gets less certain while the bike stands (self-discharge is
+# a few % a month), up to the cap
+REST_VARIANCE_PER_H = 0.1
+MAX_REST_VARIANCE = 25.0
+# A first reading this far from the saved state's voltage, beyond what the
+# polarization and an unknown resistance at its load could explain, means the
+# pack was charged (or drained) while off: start over from the voltage. Ten
+# times the voltage noise, and above the open circuit voltage table's error.
+STALE_MISMATCH_V = 1.0
+
+# The state is checkpointed this often while it changes by at least SAVE_STEP,
+# so a bike switched off at the key loses at most a few seconds of counting
+SAVE_INTERVAL_S = 10
+SAVE_STEP = 0.1               # %
+
+
+def ocv(soc):
+    """Pack open circuit voltage at soc %, and its slope in V per %"""
+    soc = min(max(soc, 0.0), 100.0)
+    segment = min(max(bisect.bisect_right(OCV_SOC, soc) - 1, 0), len(OCV_SOC) - 2)
+    slope = (OCV_V[segment + 1] - OCV_V[segment]) / (OCV_SOC[segment + 1] - OCV_SOC[segment])
+    return OCV_V[segment] + slope * (soc - OCV_SOC[segment]), slope
+
+
+def soc_from_voltage(volts):
+    """State of charge % whose open circuit voltage is volts; the naive reading"""
+    volts = min(max(volts, OCV_V[0]), OCV_V[-1])
+    segment = min(max(bisect.bisect_right(OCV_V, volts) - 1, 0), len(OCV_V) - 2)
+    fraction = (volts - OCV_V[segment]) / (OCV_V[segment + 1] - OCV_V[segment])
+    return OCV_SOC[segment] + fraction * (OCV_SOC[segment + 1] - OCV_SOC[segment])
+
+
+class SocEstimator:
+    """State of charge of the pack from its voltage and current.
+
+    An extended Kalman filter over three states: the charge, the
+    polarization voltage and the pack's resistance. Every sample first
+    counts the charge the current took out (coulomb counting), which is
+    smooth but drifts with the current sensor's error, and lets the
+    polarization follow the current. The voltage then corrects all three:
+    the expected voltage is the open circuit voltage at the estimated
+    charge minus both sags, and the difference moves the states by the
+    Kalman gain. Changes of load tell the sag apart from the charge, so the
+    resistance is learnt from the ride instead of taken from the data
+    sheet. The gain is small while the estimate is certain, where the open
+    circuit voltage is flat, under heavy load and at low current, where the
+    voltage says least. The 3x3 matrices are written out as scalars, a few microseconds
+    per sample.
+
+    state is a saved state (load()); with it the estimate is right from the
+    first sample instead of converging from the voltage.
+    """
+
+    def __init__(self, state=None):
+        self.soc = None
+        self.polarization_v = 0.0
+        self.resistance_ohm = RESISTANCE_OHM
+        # upper triangle of the covariance of (soc, polarization, resistance)
+        self.covariance = (INITIAL_VARIANCE, 0.0, 0.0, 0.0, 0.0, RESISTANCE_VARIANCE)
+        self.last_time = None
+        self.stale_check = False
+        self.saved_soc = None
+        self.saved_at = 0.0
+        self.resets = 0
+        if state is not None:
+            self.soc = state["soc"]
+            self.saved_soc = state["soc"]
+            hours = max(0.0, time.time() - state["saved_at"]) / 3600
+            self.reset_variance(min(state["variance"] + REST_VARIANCE_PER_H * hours, MAX_REST_VARIANCE))
+            self.resistance_ohm = state.get("resistance_ohm", RESISTANCE_OHM)
+            self.stale_check = True
+
+    @property
+    def variance(self):
+        """Variance of the charge, %²"""
+        return self.covariance[0]
+
+    def reset_variance(self, variance):
+        self.covariance = (variance, 0.0, 0.0) + self.covariance[3:]
+
+    def update(self, time_s, volts, amps):
+        """Add a sample: monotonic seconds, pack voltage, current (+ discharging); the soc in %"""
+        if self.stale_check:
+            self.stale_check = False
+            mismatch = abs(volts + amps * self.resistance_ohm - ocv(self.soc)[0])
+            if mismatch > STALE_MISMATCH_V + abs(amps) * (POLARIZATION_OHM + RESISTANCE_VARIANCE ** 0.5):
+                self.soc = None
+                self.resets += 1
+        if self.soc is None:
+            self.soc = soc_from_voltage(volts + amps * self.resistance_ohm)
+            self.reset_variance(INITIAL_VARIANCE)
+
+        p00, p01, p02, p11, p12, p22 = self.covariance
+        step = 0.0
+        # predict: count the charge since the last sample, settle the polarization
+        if self.last_time is not None and 0 < time_s - self.last_time <= MAX_GAP_S:
+            step = time_s - self.last_time
+            decay = math.exp(-step / POLARIZATION_S)
+            self.soc -= amps * step / 36 / CAPACITY_AH
+            self.polarization_v = decay * self.polarization_v + (1 - decay) * POLARIZATION_OHM * amps
+            p00 += PROCESS_VARIANCE * step
+            p01 *= decay
+            p11 = decay * decay * p11 + POLARIZATION_VARIANCE * step
+            p12 *= decay
+            p22 += RESISTANCE_DRIFT * step
+        self.last_time = time_s
+
+        # correct: compare the voltage with the one expected, H = (slope, -1, -amps)
+        expected, slope = ocv(self.soc)
+        expected -= amps * self.resistance_ohm + self.polarization_v
+        soc_term = slope * p00 - p01 - amps * p02
+        polarization_term = slope * p01 - p11 - amps * p12
+        resistance_term = slope * p02 - p12 - amps * p22
+        noise = (VOLTAGE_VARIANCE + LOAD_VARIANCE * amps * amps
+                 + OCV_VARIANCE * OCV_ERROR_SPAN * 36 * CAPACITY_AH / max(abs(amps), MIN_OCV_AMPS))
+        innovation_variance = (slope * soc_term - polarization_term - amps * resistance_term
+                               + noise / max(step, MIN_STEP_S))
+        error = (volts - expected) / innovation_variance
+        self.soc = min(max(self.soc + soc_term * error, 0.0), 100.0)
+        self.polarization_v += polarization_term * error
+        self.resistance_ohm = min(max(self.resistance_ohm + resistance_term * error, MIN_RESISTANCE_OHM),
+                                  MAX_RESISTANCE_OHM)
+        self.covariance = (p00 - soc_term * soc_term / innovation_variance,
+                           p01 - soc_term * polarization_term / innovation_variance,
+                           p02 - soc_term * resistance_term / innovation_variance,
+                           p11 - polarization_term * polarization_term / innovation_variance,
+                           p12 - polarization_term * resistance_term / innovation_variance,
+                           p22 - resistance_term * resistance_term / innovation_variance)
+        return self.soc
+
+    def state(self):
+        return {"soc": self.soc, "variance": self.variance, "resistance_ohm": self.resistance_ohm,
+                "saved_at": time.time()}
+
+    def checkpoint(self, state, path=None):
+        """Save state, a copy of state() taken between updates, when it is due:
+        SAVE_INTERVAL_S passed and the charge moved"""
+        if state is None or time.monotonic() - self.saved_at < SAVE_INTERVAL_S:
+            return
+        if self.saved_soc is not None and abs(state["soc"] - self.saved_soc) < SAVE_STEP:
+            return
+        save(state, path)
+        self.saved_soc = state["soc"]
+        self.saved_at = time.monotonic()
+
+    def stats(self):
+        return {"soc": self.soc, "std": self.variance ** 0.5, "resets": self.resets}
+
+
+def state_path():
+    return app_paths.data_path(STATE_NAME)
+
+
+def load(path=None):
+    """The saved state, or None when there is none or it is unreadable"""
+    path = path or state_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            state = json.load(f)
+        return {"soc": float(state["soc"]), "variance": float(state["variance"]),
+                # states saved before the resistance was learnt have none
+                "resistance_ohm": float(state.get("resistance_ohm", RESISTANCE_OHM)),
+                "saved_at": float(state["saved_at"])}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Could not read battery state {path}: {e}")
+        return None
+
+
+def save(state, path=None):
+    """Write state; a crash mid-write leaves the previous checkpoint in place"""
+    path = path or state_path()
+    temporary = path + ".tmp"
+    try:
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, path)
+    except OSError as e:
+        print(f"Could not save battery state {path}: {e}")
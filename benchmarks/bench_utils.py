@@ -0,0 +1,91 @@
+import math
+import os
+import shutil
+import statistics
+import sys
+
+# Benchmarks run on machines without a display or touchscreen
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DIR not in sys.path:
+    sys.path.insert(0, REPO_DIR)
+
+
+# Images the screens load, with the resolution of the files used on the bike
+BACKGROUNDS = {
+    "image/home screen.jpg": (1920, 1080),
+    "image/main menu.jpg": (1920, 1080),
+}
+ICONS = [
+    "left indicator on.png", "left indicator off.png",
+    "right indicator on.png", "right indicator off.png",
+    "hazard on.png", "hazard off.png",
+    "high beam on.png", "high beam off.png",
+    "low beam on.png", "low beam off.png",
+    "charging on.png", "charging off.png",
+    "control panel menu.png", "navigation menu.png",
+]
+ICON_SIZE = (512, 512)
+
+
+def percentile(values, p):
+    """Nearest-rank percentile, p in 0..100"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summary(values):
+    """Median / p95 / min / max of a list of timings, rounded for stable JSON diffs"""
+    return {
+        "median": round(statistics.median(values), 3) if values else 0.0,
+        "p95": round(percentile(values, 95), 3),
+        "min": round(min(values), 3) if values else 0.0,
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+def make_synthetic_image(path, size):
+    """Write a gradient image of the given size (needs a QGuiApplication)"""
+    from PyQt5.QtGui import QImage, QPainter, QLinearGradient, QColor
+    from PyQt5.QtCore import Qt
+
+    image = QImage(size[0], size[1], QImage.Format_ARGB32)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    gradient = QLinearGradient(0, 0, size[0], size[1])
+    gradient.setColorAt(0, QColor(30, 60, 120))
+    gradient.setColorAt(1, QColor(200, 240, 255))
+    if path.endswith(".png"):
+        painter.setBrush(gradient)
+        painter.setPen(Qt.NoPen)
+        painter.drawEllipse(0, 0, size[0], size[1])
+    else:
+        painter.fillRect(image.rect(), gradient)
+    painter.end()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    image.save(path)
+
+
+def prepare_assets(work_dir):
+    """Fill work_dir with the screens' images.
+
+    Real assets from the repository are copied when present, missing ones
+    are replaced by synthetic images of the real resolution.
+    """
+    assets = dict(BACKGROUNDS)
+    assets.update({"image/" + name: ICON_SIZE for name in ICONS})
+    synthetic = []
+    for relative, size in assets.items():
+        target = os.path.join(work_dir, relative)
+        source = os.path.join(REPO_DIR, relative)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(source):
+            shutil.copyfile(source, target)
+        else:
+            make_synthetic_image(target, size)
+            synthetic.append(relative)
+    return synthetic
@@ -0,0 +1,193 @@
+"""Headless time-to-first-frame benchmark for the infotainment screens.
+
+    python benchmarks/first_frame.py --runs 20 --output first_frame.json
+    python benchmarks/first_frame.py --compare old.json
+
+Runs on the offscreen Qt platform, so no display, touchscreen or D:\\ asset
+paths are needed. Missing images are replaced by synthetic ones.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import bench_utils
+from bench_utils import summary
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent, QSize, QT_VERSION_STR, PYQT_VERSION_STR
+
+import app_paths
+import icon_registry
+import image_cache
+from script_loader import load_script
+
+
+# Benchmark name -> (screen script, widget class)
+SCREENS = {
+    "ClockWindow": ("home screen.py", "ClockWindow"),
+    "LockScreen": ("lock screen.py", "LockScreen"),
+    "InfotainmentUI": ("main menu.py", "InfotainmentUI"),
+    "ControlCenter": ("control panel.py", "ControlCenter"),
+}
+
+# Give up waiting for a frame after this long
+FRAME_TIMEOUT_S = 5.0
+
+
+class FirstEvents(QObject):
+    """Records when the first resize was handled and the first paint arrived"""
+
+    def __init__(self, start):
+        super().__init__()
+        self.start = start
+        self.resized = None
+        self.painted = False
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Resize and self.resized is None:
+            # deliver the event ourselves so the handler's cost is included
+            obj.removeEventFilter(self)
+            QApplication.sendEvent(obj, event)
+            self.resized = time.perf_counter() - self.start
+            obj.installEventFilter(self)
+            return True
+        if event.type() == QEvent.Paint:
+            self.painted = True
+        return False
+
+
+def measure(app, cls, size):
+    """Construct, show and paint one screen; times in milliseconds"""
+    start = time.perf_counter()
+    widget = cls()
+    constructed = time.perf_counter() - start
+
+    events = FirstEvents(start)
+    widget.installEventFilter(events)
+    widget.resize(size)
+    widget.show()
+
+    deadline = start + FRAME_TIMEOUT_S
+    while not events.painted and time.perf_counter() < deadline:
+        app.processEvents()
+    # the frame is complete once the event loop pass that painted it returns
+    painted = time.perf_counter() - start
+    if not events.painted:
+        print(f"{cls.__name__} did not paint within {FRAME_TIMEOUT_S} s", file=sys.stderr)
+
+    widget.removeEventFilter(events)
+    widget.close()
+    widget.deleteLater()
+    app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    resized = events.resized if events.resized is not None else painted
+    return constructed * 1000, resized * 1000, painted * 1000
+
+
+def run(args):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    work_dir = tempfile.mkdtemp(prefix="infotainment-bench-")
+    try:
+        return measure_screens(args, app, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def measure_screens(args, app, work_dir):
+    synthetic = bench_utils.prepare_assets(work_dir)
+    os.chdir(work_dir)  # the screens load their images relative to the working directory
+    # the control panel's library, album art and playback state stay out of the user's data
+    os.environ[app_paths.DATA_DIR_ENV] = os.path.join(work_dir, "data")
+    os.environ[app_paths.MUSIC_DIR_ENV] = os.path.join(work_dir, "music")
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    size = QSize(width, height)
+
+    results = {}
+    for name, (script, class_name) in SCREENS.items():
+        if args.screen and name not in args.screen:
+            continue
+        cls = getattr(load_script(script), class_name)
+        for _ in range(args.warmup):
+            measure(app, cls, size)
+
+        construct, resize, paint = [], [], []
+        for _ in range(args.runs):
+            c, r, p = measure(app, cls, size)
+            construct.append(c)
+            resize.append(r)
+            paint.append(p)
+        results[name] = {
+            "construct_ms": summary(construct),
+            "first_resize_ms": summary(resize),
+            "first_paint_ms": summary(paint),
+        }
+        print(f"{name:<16} construct {results[name]['construct_ms']['median']:8.2f} ms"
+              f"  resize {results[name]['first_resize_ms']['median']:8.2f} ms"
+              f"  paint {results[name]['first_paint_ms']['median']:8.2f} ms  (median)",
+              file=sys.stderr)
+
+    return {
+        "benchmark": "first_frame",
+        "platform": app.platformName(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "size": [width, height],
+        "runs": args.runs,
+        "synthetic_assets": sorted(synthetic),
+        "screens": results,
+        "image_cache": image_cache.cache().stats(),
+        "icon_registry": icon_registry.registry().stats(),
+    }
+
+
+def compare(old, new):
+    """Print the change of every median / p95 between two result files"""
+    for name, metrics in new["screens"].items():
+        for metric, values in metrics.items():
+            before = old.get("screens", {}).get(name, {}).get(metric)
+            if not before:
+                continue
+            for stat in ("median", "p95"):
+                if before[stat]:
+                    change = (values[stat] - before[stat]) / before[stat] * 100
+                    print(f"{name:<16} {metric:<16} {stat:<6} "
+                          f"{before[stat]:8.2f} -> {values[stat]:8.2f} ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--size", default="1920x1080", help="window size, e.g. 800x480")
+    parser.add_argument("--screen", action="append", help="only benchmark this class")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+    # run() changes into its work directory; relative paths mean the caller's
+    for name in ("output", "compare"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    result = run(args)
+    text = json.dumps(result, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
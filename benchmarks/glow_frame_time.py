@@ -0,0 +1,124 @@
+"""Frame time of the control panel's music player: live drop shadow vs cached glow.
+
+    python benchmarks/glow_frame_time.py --frames 200 --output glow_frame_time.json
+
+"drop shadow" attaches the 20 px QGraphicsDropShadowEffect the play button
+used before glow.py, "cached glow" is the current pre-blurred halo and
+"none" has no glow at all. Each frame changes something the way the UI
+does and repaints synchronously on the offscreen Qt platform.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import bench_utils
+from bench_utils import summary
+
+from PyQt5.QtWidgets import QApplication, QGraphicsDropShadowEffect
+from PyQt5.QtGui import QColor
+from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+
+import glow
+from script_loader import load_script
+
+
+MODES = ("drop shadow", "cached glow", "none")
+
+
+def song_label(panel, frame):
+    # a new track name, the label sits right above the play button
+    panel.song_label.setText(f"Track {frame:04d}.mp3")
+    panel.song_label.repaint()
+
+
+def play_button(panel, frame):
+    # play / pause, or a hover highlight
+    panel.play_btn.setText("⏸" if frame % 2 else "▶")
+    panel.play_btn.repaint()
+
+
+def music_frame(panel, frame):
+    # the whole player block, e.g. after the theme changed
+    panel.music_frame.repaint()
+
+
+SCENARIOS = {"song label": song_label, "play button": play_button, "music frame": music_frame}
+
+
+def build_panel(app, mode):
+    panel = load_script("control panel.py").ControlCenter()
+    panel.autoplay_pending = False
+    if mode != "cached glow":
+        panel.play_glow.hide()
+        panel.play_glow.target.removeEventFilter(panel.play_glow)
+    if mode == "drop shadow":
+        shadow = QGraphicsDropShadowEffect()
+        shadow.setBlurRadius(20)
+        shadow.setColor(QColor("#48d1cc"))
+        shadow.setOffset(0, 0)
+        panel.play_btn.setGraphicsEffect(shadow)
+    panel.resize(1920, 1080)
+    panel.show()
+    app.processEvents()
+    return panel
+
+
+def measure(app, mode, frames, warmup):
+    panel = build_panel(app, mode)
+    results = {}
+    for name, step in SCENARIOS.items():
+        times = []
+        for frame in range(warmup + frames):
+            start = time.perf_counter()
+            step(panel, frame)
+            elapsed = (time.perf_counter() - start) * 1000
+            if frame >= warmup:
+                times.append(elapsed)
+        results[name] = summary(times)
+    panel.close()
+    panel.deleteLater()
+    app.processEvents()
+    return results
+
+
+def run(args):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {}
+    for mode in MODES:
+        results[mode] = measure(app, mode, args.frames, args.warmup)
+        print(f"{mode:<12} " + "  ".join(
+            f"{name} {values['median']:7.3f} ms" for name, values in results[mode].items())
+            + "  (median)", file=sys.stderr)
+
+    return {
+        "benchmark": "glow_frame_time",
+        "platform": app.platformName(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "frames": args.frames,
+        "frame_ms": results,
+        "halo_renders": glow.renders,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
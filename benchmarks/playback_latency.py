@@ -0,0 +1,210 @@
+"""Track switch latency and memory growth of the control panel's music player.
+
+    python benchmarks/playback_latency.py --rounds 200 --output playback_latency.json
+
+Generates a folder of sine tone WAV files, lets ControlCenter index it and
+then drives play_pause, next_song and prev_song, plus jumps to tracks that
+are not preloaded. Each call is timed until the QMediaPlayer that should
+play reports the expected state with its media loaded. Resident memory is
+sampled after every round to catch leaks over long sessions.
+
+Audio goes to a GStreamer sink that discards it (--audio-sink, default
+fakeaudiosink, which keeps real time; fakesink runs tracks through as fast
+as it can). Together with the offscreen Qt platform this runs on a headless
+Linux box without sound hardware.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import struct
+import sys
+import tempfile
+import time
+import wave
+
+import bench_utils
+from bench_utils import summary
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+
+import app_paths
+from script_loader import load_script
+
+
+SAMPLE_RATE = 22050
+
+# Give up waiting for a player after this long
+STATE_TIMEOUT_S = 5.0
+SCAN_TIMEOUT_S = 60.0
+
+# One round, in order; "jump" plays a track that is not open in a standby player
+ROUND = ("next", "next", "prev", "pause", "resume", "jump")
+
+
+def write_tracks(folder, count, seconds):
+    """count mono WAV files of seconds length, each a different tone"""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for number in range(count):
+        frequency = 220 + 20 * number
+        second = b"".join(struct.pack("<h", round(8000 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE)))
+                          for i in range(SAMPLE_RATE))
+        path = os.path.join(folder, f"track {number:03d}.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(second * seconds)
+        paths.append(path)
+    return paths
+
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def wait_for(app, condition, timeout=STATE_TIMEOUT_S):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        app.processEvents()
+    return True
+
+
+def playing(engine, path):
+    from PyQt5.QtMultimedia import QMediaPlayer
+    return (engine.loaded.get(engine.active) == path and engine.is_playing()
+            and engine.active.mediaStatus() in (QMediaPlayer.LoadedMedia, QMediaPlayer.BufferingMedia,
+                                                QMediaPlayer.BufferedMedia))
+
+
+def paused(engine):
+    from PyQt5.QtMultimedia import QMediaPlayer
+    return engine.active.state() == QMediaPlayer.PausedState
+
+
+def step(app, panel, name, generator):
+    """Run one operation; milliseconds until the player got there, or None on timeout"""
+    queue = panel.queue
+    engine = panel.engine
+    if name == "next":
+        expected = queue.peek(1)
+        action, done = panel.next_song, lambda: playing(engine, expected)
+    elif name == "prev":
+        expected = queue.peek(-1)
+        action, done = panel.prev_song, lambda: playing(engine, expected)
+    elif name == "pause":
+        action, done = panel.play_pause, lambda: paused(engine)
+    elif name == "resume":
+        expected = queue.current_path()
+        action, done = panel.play_pause, lambda: playing(engine, expected)
+    else:
+        open_paths = set(engine.loaded.values())
+        expected = generator.choice([path for path in queue.tracks if path not in open_paths])
+        action, done = lambda: engine.play(expected), lambda: playing(engine, expected)
+    start = time.perf_counter()
+    action()
+    if not wait_for(app, done):
+        print(f"{name} did not finish within {STATE_TIMEOUT_S} s", file=sys.stderr)
+        return None
+    return (time.perf_counter() - start) * 1000
+
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix="infotainment-playback-")
+    music = os.path.join(work_dir, "music")
+    write_tracks(music, args.tracks, args.seconds)
+    os.environ[app_paths.MUSIC_DIR_ENV] = music
+    os.environ[app_paths.DATA_DIR_ENV] = os.path.join(work_dir, "data")
+    os.environ.setdefault("QT_GSTREAMER_PLAYBIN_AUDIOSINK", args.audio_sink)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    panel = load_script("control panel.py").ControlCenter()
+    panel.autoplay_pending = False
+    panel.resize(1920, 1080)
+    panel.show()
+    if not wait_for(app, lambda: panel.scanner is not None and not panel.scanner.is_running()
+                    and len(panel.queue) == args.tracks, SCAN_TIMEOUT_S):
+        raise SystemExit(f"Indexed {len(panel.queue)} of {args.tracks} tracks within {SCAN_TIMEOUT_S} s")
+
+    start = time.perf_counter()
+    panel.play_pause()
+    if not wait_for(app, lambda: playing(panel.engine, panel.queue.current_path())):
+        raise SystemExit("The first track did not start, is a GStreamer audio sink available?")
+    first_play = (time.perf_counter() - start) * 1000
+
+    generator = random.Random(args.seed)
+    times = {name: [] for name in ROUND}
+    timeouts = 0
+    memory = []
+    for round_number in range(args.warmup + args.rounds):
+        if round_number == args.warmup:
+            memory.append(rss_kb())
+        for name in ROUND:
+            elapsed = step(app, panel, name, generator)
+            if elapsed is None:
+                timeouts += 1
+            elif round_number >= args.warmup:
+                times[name].append(elapsed)
+        if round_number >= args.warmup:
+            memory.append(rss_kb())
+    for name, values in times.items():
+        print(f"{name:<7} median {summary(values)['median']:8.2f} ms  p95 {summary(values)['p95']:8.2f} ms",
+              file=sys.stderr)
+    print(f"rss     {memory[0]} -> {memory[-1]} kB over {args.rounds} rounds", file=sys.stderr)
+
+    return {
+        "benchmark": "playback_latency",
+        "platform": app.platformName(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "audio_sink": os.environ["QT_GSTREAMER_PLAYBIN_AUDIOSINK"],
+        "tracks": args.tracks,
+        "rounds": args.rounds,
+        "first_play_ms": round(first_play, 3),
+        "switch_ms": {name: summary(values) for name, values in times.items()},
+        "timeouts": timeouts,
+        "rss_kb": {
+            "start": memory[0],
+            "end": memory[-1],
+            "peak": max(memory),
+            "growth": memory[-1] - memory[0],
+            # about ten samples, enough to see a trend
+            "samples": memory[::max(1, len(memory) // 10)],
+        },
+        "engine": panel.engine.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50, help=f"each round is {', '.join(ROUND)}")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--tracks", type=int, default=12)
+    parser.add_argument("--seconds", type=int, default=20, help="length of each generated track")
+    parser.add_argument("--audio-sink", default="fakeaudiosink", help="GStreamer sink element")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Accuracy and CPU cost of the range estimate over a replayed ride.
+
+    python benchmarks/range_estimate.py --rate 50 --output range_estimate.json
+
+Records the frames of esp32_simulator.Ride from full charge to --until
+percent, once per cruise speed (--cruise), decodes them with the telemetry
+FrameDecoder and replays them as Telemetry does: into a History, a
+SocEstimator and a RangeEstimator reading its windows from that History,
+timed by the frames' time_ms through a DeviceClock; the ESP32's uptime
+starts --uptime-ms, ten minutes before its counter wraps. The ride is on
+esp32_simulator.REAL_PACK, which differs from the model behind the state
+of charge and holds less than PACK_WH. Once per ride second the estimate is
+compared with the distance actually ridden until the end. Errors are
+reported for the estimate, for the ESP32's range field (its voltage based
+charge at a fixed consumption) and for the constant "Range: 30 km" the
+main menu used to show. Steps of the shown whole kilometres that go up
+count as jitter. The time of every update() call, the window queries
+included, gives the CPU cost per sample and the share of one core at the
+replayed rate.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import bench_utils
+from bench_utils import summary
+
+import numpy as np
+
+import battery_soc
+import range_estimator
+import telemetry_history
+import telemetry_protocol
+from esp32_simulator import Ride
+from telemetry_history import COLUMN, SCALES
+from telemetry_protocol import SAMPLE
+
+
+# What the main menu showed before there was an estimate
+CONSTANT_KM = 30.0
+UPTIME_MS = (1 << 32) - 600000
+
+
+def record(rate, until, cruise_kmh, uptime_ms):
+    """Raw sample values of a ride, decoded from its frames"""
+    ride = Ride(cruise_kmh, uptime_ms=uptime_ms)
+    decoder = telemetry_protocol.FrameDecoder()
+    rows = []
+
+    def on_frame(frame_type, offset, length):
+        rows.append(SAMPLE.unpack_from(decoder.buffer, offset))
+
+    while ride.battery > until:
+        frame = ride.step(1 / rate)
+        decoder.feed(frame)
+        decoder.decode(on_frame)
+    return np.array(rows)
+
+
+def errors(estimates, truth):
+    difference = np.asarray(estimates) - truth
+    return {
+        "mean_abs_km": round(float(np.abs(difference).mean()), 3),
+        "bias_km": round(float(difference.mean()), 3),
+        "p95_abs_km": round(float(np.percentile(np.abs(difference), 95)), 3),
+        "mean_abs_percent": round(float((np.abs(difference) / np.maximum(truth, 1.0)).mean() * 100), 2),
+    }
+
+
+def replay(raw, rate):
+    history = telemetry_history.History()
+    soc_estimator = battery_soc.SocEstimator()
+    estimator = range_estimator.RangeEstimator(history)
+    device_clock = telemetry_protocol.DeviceClock()
+    estimates = []
+    costs = []
+    clock = time.perf_counter
+    for sample, values in enumerate(raw.tolist()):
+        now = device_clock.time(values[0], host=sample / rate)
+        row = history.append(now, values[1:])
+        soc = soc_estimator.update(now, float(row[COLUMN["voltage"]]), float(row[COLUMN["current"]]))
+        start = clock()
+        estimate = estimator.update(now, soc)
+        costs.append(clock() - start)
+        if sample % round(rate) == 0:
+            estimates.append(estimate)
+    return estimates, costs, estimator
+
+
+def profile(args, cruise_kmh):
+    raw = record(args.rate, args.until, cruise_kmh, args.uptime_ms)
+    rows = raw[:, 1:] * SCALES
+    trip = rows[:, COLUMN["trip_km"]]
+    per_second = slice(0, len(rows), round(args.rate))
+    truth = trip[-1] - trip[per_second]
+
+    times = []
+    for repeat in range(args.warmup + args.repeats):
+        estimates, costs, estimator = replay(raw, args.rate)
+        if repeat >= args.warmup:
+            times.extend(costs)
+    shown = np.rint(estimates)
+    seconds = len(rows) / args.rate
+
+    result = {
+        "ride_minutes": round(seconds / 60, 1),
+        "ride_km": round(float(trip[-1]), 2),
+        "estimate": errors(estimates, truth),
+        "esp32_field": errors(rows[per_second, COLUMN["range_km"]], truth),
+        "constant": errors(np.full(len(truth), CONSTANT_KM), truth),
+        "shown_km_rises": int((np.diff(shown) > 0).sum()),
+        "shown_km_changes": int((np.diff(shown) != 0).sum()),
+        "update_us": summary([cost * 1e6 for cost in times]),
+        "core_percent": round(sum(times) / args.repeats / seconds * 100, 4),
+        "estimator": estimator.stats(),
+    }
+    print(f"cruise {cruise_kmh:g} km/h, {result['ride_km']} km ridden", file=sys.stderr)
+    for name in ("estimate", "esp32_field", "constant"):
+        print(f"  {name:<12} mean error {result[name]['mean_abs_km']:6.2f} km  bias {result[name]['bias_km']:6.2f} km",
+              file=sys.stderr)
+    print(f"  update       median {result['update_us']['median']:.2f} us, "
+          f"{result['core_percent']:.4f}% of a core at {args.rate:g} Hz", file=sys.stderr)
+    return result
+
+
+def run(args):
+    return {
+        "benchmark": "range_estimate",
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "rate_hz": args.rate,
+        "windows_s": list(range_estimator.WINDOWS_S),
+        "rides": {f"{cruise:g} km/h": profile(args, cruise) for cruise in args.cruise},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=50.0, help="samples per second of the ride")
+    parser.add_argument("--until", type=float, default=1.0, help="end the ride at this state of charge, %%")
+    parser.add_argument("--cruise", type=float, nargs="+", default=[16.0, 26.0, 34.0],
+                        help="average speeds of the replayed rides, km/h")
+    parser.add_argument("--uptime-ms", type=int, default=UPTIME_MS, help="the ESP32's uptime at the start of a ride")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Accuracy, cold start and CPU cost of the battery state of charge filter.
+
+    python benchmarks/soc_estimate.py --rate 50 --output soc_estimate.json
+
+Replays esp32_simulator.Ride from full charge to --until percent at each
+cruise speed (--cruise) into a SocEstimator and compares it every sample
+with the ride's true charge. The ridden pack is esp32_simulator.REAL_PACK,
+which differs from the filter's model: less capacity, more resistance, a
+slower polarization, an open circuit voltage curve up to 20 mV per cell
+off and a current sensor offset. For reference the rides are also
+replayed on MODEL_PACK, the filter's own model. The same samples give the
+errors of the ESP32's voltage-to-percent reading and of plain coulomb
+counting, which drifts with the capacity and the sensor offset. Every
+update() call is timed against the 50 us budget.
+
+As in Telemetry, sample times come from the frames' time_ms through a
+telemetry_protocol.DeviceClock. The ESP32's uptime starts --uptime-ms,
+ten minutes before its counter wraps by default, and the replay
+reconnects halfway through each ride.
+
+Cold starts begin a ride at 60 %: without a saved state, with a correct
+one saved eight hours earlier, and with one saved at 30 % before the pack
+was charged. Each reports the error after the first sample, after 1, 10
+and 60 s, and the time until the estimate stays within 1 %.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import bench_utils
+from bench_utils import summary
+
+import numpy as np
+
+import battery_soc
+from esp32_simulator import MODEL_PACK, REAL_PACK, Ride
+from telemetry_protocol import SAMPLE, SAMPLE_FIELDS, DeviceClock
+
+
+BUDGET_US = 50.0
+COLD_START_SOC = 60.0
+COLD_START_S = 120
+UPTIME_MS = (1 << 32) - 600000
+SCALE = {name: scale for name, scale in SAMPLE_FIELDS}
+
+
+def record(ride, rate, seconds=None, until=0.0):
+    """(voltage, current, ESP32 charge, true charge, time_ms) per sample of ride"""
+    rows = []
+    while ride.battery > until and (seconds is None or len(rows) < seconds * rate):
+        frame = ride.step(1 / rate)
+        values = SAMPLE.unpack_from(frame, 4)
+        rows.append((values[2] * SCALE["voltage"], values[3] * SCALE["current"],
+                     values[1] * SCALE["battery"], ride.battery, values[0]))
+    return rows
+
+
+def sample_times(rows, rate, reconnect_at=None):
+    """Seconds of each sample as Telemetry times them, reconnecting before sample reconnect_at"""
+    clock = DeviceClock()
+    times = []
+    for sample, row in enumerate(rows):
+        if sample == reconnect_at:
+            clock.restart()
+        times.append(clock.time(row[4], host=sample / rate))
+    return times, clock.restarts
+
+
+def errors(estimates, truth):
+    difference = np.asarray(estimates) - truth
+    return {
+        "mean_abs": round(float(np.abs(difference).mean()), 3),
+        "p95_abs": round(float(np.percentile(np.abs(difference), 95)), 3),
+        "max_abs": round(float(np.abs(difference).max()), 3),
+        "final": round(float(difference[-1]), 3),
+    }
+
+
+def replay(estimator, rows, times, costs=None):
+    estimates = []
+    clock = time.perf_counter
+    for now, (volts, amps, _, _, _) in zip(times, rows):
+        start = clock()
+        estimates.append(estimator.update(now, volts, amps))
+        if costs is not None:
+            costs.append(clock() - start)
+    return estimates
+
+
+def ride_profile(args, cruise_kmh, costs):
+    rows = record(Ride(cruise_kmh, uptime_ms=args.uptime_ms), args.rate, until=args.until)
+    times, restarts = sample_times(rows, args.rate, reconnect_at=len(rows) // 2)
+    truth = np.array([row[3] for row in rows])
+    coulomb = 100 - np.cumsum([row[1] for row in rows]) / args.rate / 36 / battery_soc.CAPACITY_AH
+    for repeat in range(args.warmup + args.repeats):
+        estimates = replay(battery_soc.SocEstimator(), rows, times, costs if repeat >= args.warmup else None)
+
+    model_rows = record(Ride(cruise_kmh, uptime_ms=args.uptime_ms, pack=MODEL_PACK), args.rate, until=args.until)
+    model_times, _ = sample_times(model_rows, args.rate, reconnect_at=len(model_rows) // 2)
+    model_estimates = replay(battery_soc.SocEstimator(), model_rows, model_times)
+    result = {
+        "ride_minutes": round(len(rows) / args.rate / 60, 1),
+        "clock_s": round(times[-1], 2),
+        "clock_restarts": restarts,
+        "filter": errors(estimates, truth),
+        "voltage_map": errors([row[2] for row in rows], truth),
+        "coulomb_counting": errors(coulomb, truth),
+        "filter_on_model_pack": errors(model_estimates, [row[3] for row in model_rows]),
+    }
+    print(f"cruise {cruise_kmh:g} km/h: filter {result['filter']['mean_abs']:.2f} %, "
+          f"voltage map {result['voltage_map']['mean_abs']:.2f} %, "
+          f"coulomb counting {result['coulomb_counting']['mean_abs']:.2f} % mean error "
+          f"(filter on its own model {result['filter_on_model_pack']['mean_abs']:.2f} %)", file=sys.stderr)
+    return result
+
+
+def cold_start(args, name, state):
+    rows = record(Ride(soc=COLD_START_SOC, uptime_ms=args.uptime_ms), args.rate, seconds=COLD_START_S)
+    truth = np.array([row[3] for row in rows])
+    estimator = battery_soc.SocEstimator(state)
+    shown_before = estimator.soc
+    times, _ = sample_times(rows, args.rate)
+    error = np.abs(np.array(replay(estimator, rows, times)) - truth)
+    outside = np.nonzero(error > 1.0)[0]
+    settled = 0.0 if not len(outside) else (outside[-1] + 1) / args.rate
+    result = {
+        "shown_before_first_sample": None if shown_before is None else round(shown_before, 2),
+        "error_first_sample": round(float(error[0]), 3),
+        "error_1s": round(float(error[round(args.rate)]), 3),
+        "error_10s": round(float(error[round(args.rate * 10)]), 3),
+        "error_60s": round(float(error[round(args.rate * 60)]), 3),
+        "within_1_percent_after_s": round(settled, 2),
+        "resets": estimator.resets,
+    }
+    print(f"cold start, {name}: error {result['error_first_sample']:.2f} % at once, "
+          f"{result['error_10s']:.2f} % after 10 s, within 1 % after {settled:.1f} s", file=sys.stderr)
+    return result
+
+
+def run(args):
+    costs = []
+    rides = {f"{cruise:g} km/h": ride_profile(args, cruise, costs) for cruise in args.cruise}
+    costs_us = [cost * 1e6 for cost in costs]
+    update = summary(costs_us)
+    print(f"update median {update['median']:.2f} us, p95 {update['p95']:.2f} us, budget {BUDGET_US:g} us",
+          file=sys.stderr)
+
+    eight_hours_ago = time.time() - 8 * 3600
+    cold_starts = {
+        "no state": cold_start(args, "no state", None),
+        "saved state": cold_start(args, "saved state",
+                                  {"soc": COLD_START_SOC, "variance": 0.1, "saved_at": eight_hours_ago}),
+        "charged while off": cold_start(args, "charged while off",
+                                        {"soc": 30.0, "variance": 0.1, "saved_at": eight_hours_ago}),
+    }
+    return {
+        "benchmark": "soc_estimate",
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "rate_hz": args.rate,
+        "uptime_ms": args.uptime_ms,
+        "rides": rides,
+        "update_us": update,
+        "within_budget": update["p95"] <= BUDGET_US,
+        "cold_start": cold_starts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=50.0, help="samples per second of the ride")
+    parser.add_argument("--until", type=float, default=1.0, help="end the rides at this state of charge, %%")
+    parser.add_argument("--cruise", type=float, nargs="+", default=[16.0, 26.0, 34.0],
+                        help="average speeds of the replayed rides, km/h")
+    parser.add_argument("--uptime-ms", type=int, default=UPTIME_MS, help="the ESP32's uptime at the start of a ride")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
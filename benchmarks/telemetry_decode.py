@@ -0,0 +1,152 @@
+"""Single core decode throughput of the ESP32 telemetry frames.
+
+    python benchmarks/telemetry_decode.py --frames 200000 --output telemetry_decode.json
+
+Encodes a recorded-like stream of sample frames, optionally flips random
+bytes (--corrupt, a fraction of frames) and feeds it to a FrameDecoder in
+chunks the size of a serial read (--chunk). It reports frames per second
+for framing and CRC checking alone and with the payload unpacked, as
+Telemetry.handle does, against parsing the same samples from
+"bat=74.50,rng=31.2" text lines. One frame every 5 ms (200 Hz) is the
+rate the decoder has to sustain on the Pi.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import bench_utils
+from bench_utils import summary
+
+import telemetry_protocol
+from telemetry_protocol import SAMPLE, SAMPLE_FIELDS
+
+
+# Text keys of the same fields, for the line protocol baseline
+TEXT_KEYS = ("ms", "bat", "v", "a", "spd", "trip", "rng", "lux")
+
+
+def samples(count, seed):
+    generator = random.Random(seed)
+    for number in range(count):
+        yield {
+            "time_ms": number * 5,
+            "battery": generator.uniform(0, 100),
+            "voltage": generator.uniform(30, 42),
+            "current": generator.uniform(-5, 40),
+            "speed_kmh": generator.uniform(0, 45),
+            "trip_km": number * 0.0003,
+            "range_km": generator.uniform(0, 60),
+            "light": generator.randrange(0, 1000),
+        }
+
+
+def binary_stream(values, corrupt, generator):
+    stream = bytearray(b"".join(telemetry_protocol.encode_sample(**sample) for sample in values))
+    frame_size = len(stream) // len(values)
+    for _ in range(int(len(values) * corrupt)):
+        stream[generator.randrange(len(stream))] ^= 1 << generator.randrange(8)
+    return bytes(stream), frame_size
+
+
+def text_stream(values):
+    lines = []
+    for sample in values:
+        lines.append(",".join(f"{key}={sample[name]:.2f}" for key, (name, _) in zip(TEXT_KEYS, SAMPLE_FIELDS)))
+    return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def decode_binary(stream, chunk, unpack):
+    decoder = telemetry_protocol.FrameDecoder()
+    buffer = decoder.buffer
+    if unpack:
+        def on_frame(frame_type, offset, length):
+            SAMPLE.unpack_from(buffer, offset)
+    else:
+        def on_frame(frame_type, offset, length):
+            pass
+    view = memoryview(stream)
+    position = 0
+    start = time.perf_counter()
+    while position < len(stream):
+        position += decoder.feed(view[position:position + chunk])
+        decoder.decode(on_frame)
+    return time.perf_counter() - start, decoder
+
+
+def decode_text(stream, chunk):
+    """The line protocol: split, then a float per key=value pair"""
+    frames = 0
+    pending = b""
+    start = time.perf_counter()
+    for position in range(0, len(stream), chunk):
+        *lines, pending = (pending + stream[position:position + chunk]).split(b"\n")
+        for line in lines:
+            values = {}
+            for pair in line.decode("ascii").split(","):
+                key, _, value = pair.partition("=")
+                values[key] = float(value)
+            frames += 1
+    return time.perf_counter() - start, frames
+
+
+def run(args):
+    generator = random.Random(args.seed)
+    values = list(samples(args.frames, args.seed))
+    binary, frame_size = binary_stream(values, args.corrupt, generator)
+    text = text_stream(values)
+
+    results = {"framing": [], "unpacked": [], "text": []}
+    decoder = None
+    for repeat in range(args.warmup + args.repeats):
+        framing, _ = decode_binary(binary, args.chunk, False)
+        unpacked, decoder = decode_binary(binary, args.chunk, True)
+        text_s, text_frames = decode_text(text, args.chunk)
+        if repeat >= args.warmup:
+            results["framing"].append(decoder.frames / framing)
+            results["unpacked"].append(decoder.frames / unpacked)
+            results["text"].append(text_frames / text_s)
+    for name, rates in results.items():
+        median = summary(rates)["median"]
+        print(f"{name:<9} {median:12.0f} frames/s  {median / 200:8.0f}x a 200 Hz stream", file=sys.stderr)
+
+    return {
+        "benchmark": "telemetry_decode",
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "frames": args.frames,
+        "frame_bytes": frame_size,
+        "text_bytes_per_frame": round(len(text) / args.frames, 1),
+        "chunk": args.chunk,
+        "corrupt": args.corrupt,
+        "decoded": decoder.frames,
+        "crc_errors": decoder.crc_errors,
+        "length_errors": decoder.length_errors,
+        "skipped_bytes": decoder.skipped_bytes,
+        "frames_per_s": {name: summary(rates) for name, rates in results.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--chunk", type=int, default=512, help="bytes per simulated serial read")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="fraction of frames with a flipped bit")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Day / night switch time with every screen built, as in the running application.
+
+    python benchmarks/theme_switch.py --switches 20 --output theme_switch.json
+
+Builds the screen router with all screens, warms the backgrounds of both
+themes like the router does after start-up, then times ThemeManager.set_mode
+alone and up to the repainted current screen. Runs on the offscreen Qt
+platform; missing images are replaced by synthetic ones.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import bench_utils
+from bench_utils import summary
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QSize, QT_VERSION_STR, PYQT_VERSION_STR
+
+import app_paths
+import image_cache
+import screen_router
+import theme
+
+
+# One frame at 60 Hz
+FRAME_MS = 1000 / 60
+
+
+def run(args):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    work_dir = tempfile.mkdtemp(prefix="infotainment-bench-")
+    try:
+        return measure_switches(args, app, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def measure_switches(args, app, work_dir):
+    synthetic = bench_utils.prepare_assets(work_dir)
+    os.chdir(work_dir)  # the screens load their images relative to the working directory
+    # the control panel's library, album art and playback state stay out of the user's data
+    os.environ[app_paths.DATA_DIR_ENV] = os.path.join(work_dir, "data")
+    os.environ[app_paths.MUSIC_DIR_ENV] = os.path.join(work_dir, "music")
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    router = screen_router.ScreenRouter()
+    router.resize(QSize(width, height))
+    for name in router.screens:
+        router.screen(name)
+    router.show()
+    app.processEvents()
+
+    manager = theme.manager()
+    image_cache.cache().warm(manager.other_mode())
+
+    results = {}
+    for name in router.screens:
+        router.show_screen(name)
+        app.processEvents()
+        switch, painted = [], []
+        for _ in range(args.switches):
+            start = time.perf_counter()
+            manager.set_mode(manager.other_mode())
+            switched = time.perf_counter()
+            router.repaint()
+            end = time.perf_counter()
+            switch.append((switched - start) * 1000)
+            painted.append((end - start) * 1000)
+        results[name] = {"switch_ms": summary(switch), "switch_and_paint_ms": summary(painted)}
+        print(f"{name:<14} switch {results[name]['switch_ms']['median']:8.2f} ms"
+              f"  with paint {results[name]['switch_and_paint_ms']['median']:8.2f} ms  (median,"
+              f" frame {FRAME_MS:.1f} ms)", file=sys.stderr)
+
+    return {
+        "benchmark": "theme_switch",
+        "platform": app.platformName(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "size": [width, height],
+        "switches": args.switches,
+        "synthetic_assets": sorted(synthetic),
+        "screens": results,
+        "image_cache": image_cache.cache().stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--switches", type=int, default=20)
+    parser.add_argument("--size", default="1920x1080", help="window size, e.g. 800x480")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+    # run() changes into its work directory; a relative path means the caller's
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    text = json.dumps(run(args), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Per-toggle cost of the control panel buttons: rebuilt stylesheet vs themed checked state.
+
+    python benchmarks/theme_toggle.py --toggles 200 --output theme_toggle.json
+
+"legacy" rebuilds and sets a stylesheet on every tap, the way the control
+panel did before theme.py. "theme" flips the checked state of a button
+styled by the window's precompiled theme sheet. Each toggle is timed on its own and
+up to the repainted button, on the offscreen Qt platform.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import bench_utils
+from bench_utils import summary
+
+from PyQt5.QtWidgets import QApplication, QWidget, QPushButton
+from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+
+import theme
+
+
+# Control panel toggle buttons, all 300x150
+BUTTONS = ["Bluetooth", "WiFi", "Lock", "Dark Mode", "Screen\nRotation",
+           "Flashlight", "Timer", "Calculator"]
+
+
+def legacy_sheet(button, active):
+    """The stylesheet the control panel generated per tap before theme.py"""
+    if active:
+        return f"""
+            QPushButton {{
+                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                    stop:0 #ffffff, stop:1 #f8f8ff);
+                border-radius: {button.geometry().width()//2}px;
+                border: 3px solid #CFF9E8;
+                color: #CFF9E8;
+                font-weight: bold;
+                font-size: 14px;
+            }}
+            QPushButton:hover {{
+                border: 3px solid #CFF9E8;
+            }}
+        """
+    return f"""
+        QPushButton {{
+            background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                stop:0 #CFF9E8, stop:1 #CFF9E8);
+            border-radius: {button.geometry().width()//2}px;
+            border: 2px solid #CFF9E8;
+            color: #CFF9E8;
+            font-weight: bold;
+            font-size: 14px;
+        }}
+        QPushButton:hover {{
+            background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+                stop:0 #CFF9E8, stop:1 #CFF9E8);
+            border: 2px solid #CFF9E8;
+        }}
+    """
+
+
+def legacy_toggle(button, active):
+    button.setStyleSheet(legacy_sheet(button, active))
+
+
+def theme_toggle(button, active):
+    button.setChecked(active)
+
+
+def build_panel(mode):
+    panel = QWidget()
+    panel.resize(1920, 1080)
+    buttons = []
+    for index, text in enumerate(BUTTONS):
+        button = QPushButton(text, panel)
+        button.setGeometry(50 + (index % 3) * 370, 20 + (index // 3) * 350, 300, 150)
+        if mode == "legacy":
+            button.setStyleSheet(legacy_sheet(button, False))
+        else:
+            button.setProperty("role", "toggle")
+            button.setCheckable(True)
+        buttons.append(button)
+    if mode == "legacy":
+        panel.setStyleSheet("background: qlineargradient(x1:0, y1:0, x2:1, y2:1,"
+                            " stop:0 #f0f8ff, stop:1 #e6f3ff);")
+    else:
+        panel.setStyleSheet(theme.stylesheet())
+    panel.show()
+    return panel, buttons
+
+
+def measure(app, mode, toggles, warmup):
+    """Milliseconds per toggle: (state switch only, switch plus repaint)"""
+    toggle = legacy_toggle if mode == "legacy" else theme_toggle
+    panel, buttons = build_panel(mode)
+    app.processEvents()
+
+    switch, painted = [], []
+    for index in range(warmup + toggles):
+        button = buttons[index % len(buttons)]
+        active = (index // len(buttons)) % 2 == 0
+        start = time.perf_counter()
+        toggle(button, active)
+        switched = time.perf_counter()
+        button.repaint()
+        end = time.perf_counter()
+        if index >= warmup:
+            switch.append((switched - start) * 1000)
+            painted.append((end - start) * 1000)
+
+    panel.close()
+    panel.deleteLater()
+    app.processEvents()
+    return switch, painted
+
+
+def run(args):
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = {}
+    for mode in ("legacy", "theme"):
+        switch, painted = measure(app, mode, args.toggles, args.warmup)
+        results[mode] = {"switch_ms": summary(switch), "switch_and_paint_ms": summary(painted)}
+        print(f"{mode:<8} switch {results[mode]['switch_ms']['median']:8.3f} ms"
+              f"  with paint {results[mode]['switch_and_paint_ms']['median']:8.3f} ms  (median)",
+              file=sys.stderr)
+
+    return {
+        "benchmark": "theme_toggle",
+        "platform": app.platformName(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "toggles": args.toggles,
+        "modes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toggles", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=16)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Offline asset build: pre-scaled backgrounds, their night variants and the icon atlas.
+
+    python build_assets.py [--profiles display_profiles.json]
+
+Reads the display profiles, writes one background variant per profile
+resolution and theme (night variants are darkened) and one icon atlas, and
+records them in assets/manifest.json, which the screens consult at runtime
+(see asset_manifest.py). Set INFOTAINMENT_ASSETS_DIR to build and read them
+elsewhere.
+"""
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtGui import QGuiApplication, QImage, QImageReader, QImageWriter, QPainter
+from PyQt5.QtCore import Qt, QSize
+
+import app_paths
+import icon_registry
+import theme
+from asset_manifest import manifest_path, size_key
+from image_cache import dimmed
+
+
+# Background images the screens scale to the window size
+BACKGROUNDS = ["image/home screen.jpg", "image/main menu.jpg"]
+
+# Baseline JPEG decodes fastest with libjpeg-turbo; quality 80 maps to zlib
+# level 1 for PNG, which keeps the atlas quick to inflate
+JPEG_QUALITY = 90
+PNG_QUALITY = 80
+
+
+def write_image(image, path, quality):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    writer = QImageWriter(path)
+    writer.setQuality(quality)
+    if not writer.write(image):
+        raise RuntimeError(f"Could not write {path}: {writer.errorString()}")
+
+
+def build_background(source, profiles, output):
+    image = QImageReader(source).read()
+    if image.isNull():
+        print(f"Skipping missing background {source}")
+        return None
+
+    name = os.path.basename(source)
+    variants = {}
+    for profile in profiles:
+        target = QSize(profile["width"], profile["height"])
+        # same result as the runtime KeepAspectRatioByExpanding scale
+        scaled = image.scaled(target, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+        scaled = scaled.convertToFormat(QImage.Format_RGB32)
+        for mode, colors in theme.THEMES.items():
+            key = size_key(target.width(), target.height(), mode)
+            if key in variants:
+                continue  # this theme shows the photo as it is
+            folder = os.path.join(output, size_key(target.width(), target.height()))
+            variant = scaled
+            if colors["background_dim"]:
+                folder = os.path.join(folder, mode)
+                variant = dimmed(scaled, colors["background_dim"])
+            path = os.path.join(folder, name)
+            write_image(variant, path, JPEG_QUALITY)
+            variants[key] = path
+            print(f"  {path} ({scaled.width()}x{scaled.height()})")
+    return {"source_mtime": os.path.getmtime(source), "variants": variants}
+
+
+def build_icon_atlas(output):
+    # the main menu places its icons at fixed pixel sizes, so one atlas
+    # serves every display profile
+    registry = icon_registry.IconRegistry()
+    states = list(registry.states())
+    rects, atlas_size = icon_registry.pack_atlas([(key, size) for key, _, size in states])
+
+    atlas = QImage(atlas_size, QImage.Format_ARGB32_Premultiplied)
+    atlas.fill(Qt.transparent)
+    painter = QPainter(atlas)
+    sources = {}
+    for key, path, size in states:
+        image = registry.decode(path, size)
+        if image.isNull():
+            continue
+        slot = rects[key]
+        painter.drawImage(slot.x() + (size - image.width()) // 2,
+                          slot.y() + (size - image.height()) // 2, image)
+        sources[path] = os.path.getmtime(path)
+    painter.end()
+
+    path = os.path.join(output, "icons.png")
+    write_image(atlas, path, PNG_QUALITY)
+    print(f"  {path} ({atlas_size.width()}x{atlas_size.height()}, {len(states)} icons)")
+
+    icons = {}
+    for (name, on), rect in rects.items():
+        icons.setdefault(name, {})["on" if on else "off"] = [
+            rect.x(), rect.y(), rect.width(), rect.height()]
+    return {"path": path, "sources": sources, "icons": icons}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", default="display_profiles.json")
+    args = parser.parse_args()
+    output = app_paths.assets_dir()
+
+    app = QGuiApplication(sys.argv[:1])
+    with open(args.profiles) as f:
+        profiles = json.load(f)["profiles"]
+
+    manifest = {"version": 1, "profiles": profiles, "backgrounds": {}}
+    print("Backgrounds:")
+    for source in BACKGROUNDS:
+        entry = build_background(source, profiles, output)
+        if entry:
+            manifest["backgrounds"][source] = entry
+    print("Icons:")
+    manifest["icon_atlas"] = build_icon_atlas(output)
+
+    path = manifest_path()
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
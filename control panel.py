@@ -1,35 +1,84 @@
 import sys
 import os
 from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QLabel, QSlider, QFrame, 
-                            QVBoxLayout, QHBoxLayout, QGraphicsDropShadowEffect)
-from PyQt5.QtCore import Qt, QSize, QUrl, QRectF
+                            QVBoxLayout, QHBoxLayout, QLineEdit, QListWidget, QListWidgetItem)
+from PyQt5.QtCore import Qt, QSize, QRectF, QTimer
 from PyQt5.QtGui import QPainter, QPen, QFont, QColor, QLinearGradient, QBrush, QIcon, QPixmap
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
+
+import album_art
+import app_paths
+import glow
+import library_scanner
+import music_library
+import play_queue
+import playback_engine
+import playback_state
+import screen_router
+import telemetry
+import theme
+import tick_scheduler
+
+
+# Delay before the music folder is checked for changes to an existing index
+RESCAN_DELAY_MS = 2000
+
+# Edge of the album art square in the music player
+ART_SIZE = 120
 
 class BatteryRing(QWidget):
-    def __init__(self, parent=None, percentage=75):
+    MARGIN = 20
+    RING_WIDTH = 12  # Thinner ring
+
+    # Gradient + grey ring, rendered once per (width, height, device pixel ratio, theme)
+    static_layers = {}
+
+    def __init__(self, parent=None, percentage=None):
         super().__init__(parent)
-        self.percentage = percentage
+        # None until the charge is known: an empty track and "--%"
+        self.percentage = None if percentage is None else int(max(0, min(100, percentage)))
         self.setFixedSize(150, 150)  # Smaller size for top left corner
 
+    def ring_rect(self):
+        # Circle bounds
+        return QRectF(self.MARGIN, self.MARGIN,
+                      self.width() - 2 * self.MARGIN, self.height() - 2 * self.MARGIN)
+
+    def static_layer(self):
+        dpr = self.devicePixelRatioF()
+        mode = theme.manager().mode
+        key = (self.width(), self.height(), dpr, mode)
+        layer = self.static_layers.get(key)
+        if layer is None:
+            layer = QPixmap(int(self.width() * dpr), int(self.height() * dpr))
+            layer.setDevicePixelRatio(dpr)
+            layer.fill(Qt.transparent)
+            painter = QPainter(layer)
+            painter.setRenderHint(QPainter.Antialiasing)
+
+            # Gradient background for battery ring
+            colors = theme.colors(mode)
+            gradient = QLinearGradient(0, 0, self.width(), self.height())
+            gradient.setColorAt(0, QColor(colors["ring_top"]))  # Light blue by day
+            gradient.setColorAt(1, QColor(colors["ring_bottom"]))  # Light green by day
+            painter.fillRect(self.rect(), QBrush(gradient))
+
+            # Background ring
+            painter.setPen(QPen(QColor(colors["ring_track"]), self.RING_WIDTH))
+            painter.drawArc(self.ring_rect(), 0, 360 * 16)
+            painter.end()
+            self.static_layers[key] = layer
+        return layer
+
     def paintEvent(self, event):
         painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.static_layer())
         painter.setRenderHint(QPainter.Antialiasing)
-
-        # Gradient background for battery ring
-        gradient = QLinearGradient(0, 0, self.width(), self.height())
-        gradient.setColorAt(0, QColor(200, 240, 255))  # Light blue
-        gradient.setColorAt(1, QColor(200, 255, 220))  # Light green
-        painter.fillRect(self.rect(), QBrush(gradient))
-
-        # Circle bounds
-        margin = 20
-        rect = QRectF(margin, margin, self.width() - 2 * margin, self.height() - 2 * margin)
-
-        # Background ring
-        pen_bg = QPen(QColor(220, 220, 220), 12)  # Thinner ring
-        painter.setPen(pen_bg)
-        painter.drawArc(rect, 0, 360 * 16)
+        text_color = QColor(theme.colors(theme.manager().mode)["ring_text"])
+        if self.percentage is None:
+            painter.setPen(text_color)
+            painter.setFont(QFont("Arial", 16, QFont.Bold))
+            painter.drawText(self.rect(), Qt.AlignCenter, "--%")
+            return
 
         # Determine color based on battery percentage
         if self.percentage > 70:
@@ -40,121 +89,74 @@ class BatteryRing(QWidget):
             battery_color = QColor(255, 0, 0)  # Red
 
         # Foreground ring (progress)
-        pen_fg = QPen(battery_color, 12)  # Thinner ring
-        painter.setPen(pen_fg)
+        painter.setPen(QPen(battery_color, self.RING_WIDTH))
         span_angle = int(360 * 16 * self.percentage / 100)
-        painter.drawArc(rect, 90 * 16, -span_angle)
+        painter.drawArc(self.ring_rect(), 90 * 16, -span_angle)
 
         # Centered percentage text
-        painter.setPen(Qt.darkBlue)
+        painter.setPen(text_color)
         painter.setFont(QFont("Arial", 16, QFont.Bold))  # Smaller font
         painter.drawText(self.rect(), Qt.AlignCenter, f"{self.percentage}%")
 
     def update_battery(self, percentage):
-        """Update battery percentage and repaint"""
-        self.percentage = max(0, min(100, percentage))  # Clamp between 0-100
-        self.update()
+        """Update battery percentage and repaint the ring if the shown value changed"""
+        percentage = int(max(0, min(100, percentage)))  # Clamp between 0-100
+        if percentage == self.percentage:
+            return
+        self.percentage = percentage
+        # only the ring and the text change, the corners keep the cached layer
+        half_pen = self.RING_WIDTH / 2
+        self.update(self.ring_rect().adjusted(-half_pen, -half_pen, half_pen, half_pen).toAlignedRect())
 
 class ControlCenter(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Control Center")
-        self.setStyleSheet("background: qlineargradient(x1:0, y1:0, x2:1, y2:1, stop:0 #f0f8ff, stop:1 #e6f3ff);")   
+        self.setProperty("role", "control panel")  # styled by the theme
+        self.setAttribute(Qt.WA_StyledBackground, True)  # paint the themed gradient inside the router
         
         # Dictionary to track button states
         self.button_states = {}
         
         self.init_ui()
-        self.showFullScreen()  # Full screen
+        theme.manager().register("control panel", self, self.apply_theme)
+
+    def apply_theme(self, mode):
+        """The stylesheet restyles everything else; the ring paints itself"""
+        self.battery_widget.update()
+        self.play_glow.set_color(theme.colors(mode)["glow"])
+        self.moon_btn.setChecked(mode == "night")
+        self.button_states["moon"] = mode == "night"
 
     # --- BUTTON CREATION ---
-    def create_button(self, icon_path, radius=20, button_name=""):
+    def create_button(self, icon_path, button_name=""):
         btn = QPushButton(self)
         if icon_path:  # Only set icon if path is provided
             btn.setIcon(QIcon(icon_path))
             btn.setIconSize(QSize(40, 40))
-        
-        # Initial style - Aquamarine theme
-        btn.setStyleSheet(f"""
-            QPushButton {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #CFF9E8, stop:1 #CFF9E8);
-                border-radius: {radius}px;
-                border: 2px solid #48d1cc;
-                color: #CFF9E8;
-                font-weight: bold;
-                font-size: 14px;
-            }}
-            QPushButton:hover {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #CFF9E8, stop:1 #CFF9E8);
-                border: 2px solid #CFF9E8;
-            }}
-            QPushButton:pressed {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #CFF9E8, stop:1 #CFF9E8);
-            }}
-        """)
-        
+
+        # Styled by the theme's toggle rules, the checked state selects the look
+        btn.setProperty("role", "toggle")
+        btn.setCheckable(True)
+
         # Store initial state
         self.button_states[button_name] = False
-        
+
         # Connect click event
         btn.clicked.connect(lambda: self.toggle_button(button_name, btn))
-        
+
         return btn
 
     def toggle_button(self, button_name, button):
         """Toggle button state"""
-        # Toggle state
-        self.button_states[button_name] = not self.button_states[button_name]
-        
-        # Update button appearance
-        if self.button_states[button_name]:
-            # Active state (ON) - White with aquamarine border
-            button.setStyleSheet(f"""
-                QPushButton {{
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #ffffff, stop:1 #f8f8ff);
-                    border-radius: {button.geometry().width()//2}px;
-                    border: 3px solid #CFF9E8;
-                    color: #CFF9E8;
-                    font-weight: bold;
-                    font-size: 14px;
-                }}
-                QPushButton:hover {{
-                    border: 3px solid #CFF9E8;
-                }}
-            """)
-        else:
-            # Inactive state (OFF) - Aquamarine
-            button.setStyleSheet(f"""
-                QPushButton {{
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #CFF9E8, stop:1 #CFF9E8);
-                    border-radius: {button.geometry().width()//2}px;
-                    border: 2px solid #CFF9E8;
-                    color: #CFF9E8;
-                    font-weight: bold;
-                    font-size: 14px;
-                }}
-                QPushButton:hover {{
-                    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                        stop:0 #CFF9E8, stop:1 #CFF9E8);
-                    border: 2px solid #CFF9E8;
-                }}
-            """)
+        # the click already flipped the checked state the theme restyles by
+        self.button_states[button_name] = button.isChecked()
 
     # --- SLIDER CREATION ---
-    def create_slider(self, label_text, icon_path=None, frame_radius=30, handle_radius=30,
-                      slider_width=100, slider_height=500, groove_width=40):
+    def create_slider(self, label_text, icon_path=None, slider_width=100, slider_height=500,
+                      groove_width=40):
         frame = QFrame(self)
-        frame.setStyleSheet(f"""
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                stop:0 #ffffff, stop:1 #CFF9E8);
-            border-radius: {frame_radius}px;
-            border: 2px solid #7fffd4;
-        """)
+        frame.setProperty("role", "level frame")
         frame.setFixedSize(slider_width, slider_height)
 
         # Label
@@ -166,38 +168,17 @@ class ControlCenter(QWidget):
             label.setPixmap(pix.scaled(30, 30, Qt.KeepAspectRatio, Qt.SmoothTransformation))
         else:
             label.setText(label_text)
-            label.setStyleSheet("color: #2f4f4f; background: transparent;")
+            label.setProperty("role", "panel text")
 
         # Slider
         slider = QSlider(Qt.Vertical, frame)
+        slider.setProperty("role", "level")
         slider.setRange(0, 100)
         slider.setValue(50)
 
         # Center slider inside frame
         slider.setGeometry((slider_width - groove_width) // 2, 30, groove_width, slider_height - 30)
-
-        slider.setStyleSheet(f"""
-            QSlider::groove:vertical {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #e0ffff, stop:1 #b0e0e6);
-                width: {groove_width}px; 
-                border-radius: {groove_width//2}px;
-                border: 1px solid #48d1cc;
-            }}
-            QSlider::handle:vertical {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #7fffd4, stop:1 #40e0d0);
-                border: 2px solid #20b2aa;
-                height: 40px; 
-                margin: -10px 0; 
-                border-radius: {handle_radius}px;
-            }}
-            QSlider::sub-page:vertical {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #7fffd4, stop:1 #40e0d0);
-                border-radius: {groove_width//2}px;
-            }}
-        """)
+        frame.slider = slider
 
         # Position label on top
         label.setGeometry((slider_width - 30) // 2, 5, 30, 30)
@@ -206,54 +187,53 @@ class ControlCenter(QWidget):
 
     # --- MUSIC PLAYER INTEGRATION ---
     def create_music_player(self):
-        # 👇 Fixed music folder path (change this to your folder)
-        self.music_folder = r"D:\infotainment system\songs"  # Update this path
+        # 👇 Fixed music folder path (change this to your folder, or set INFOTAINMENT_MUSIC_DIR)
+        self.music_folder = app_paths.music_dir(r"D:\infotainment system\songs")  # Update this path
 
-        self.playlist = []
-        self.current_index = 0
-        self.player = QMediaPlayer()
+        # Track, position, volume and queue of the last session, checkpointed while playing
+        self.resume = playback_state.load()
+        self.queue = play_queue.PlayQueue(seed=self.resume["seed"])
+        self._engine = None  # created on first playback
+        self.autoplay_pending = True
+        self.autoplay_waiting = False  # shown before the first track was found
+        self.scanner = None
 
         # Create music player widget
         music_widget = QWidget(self.music_frame)
         music_widget.setGeometry(10, 50, 610, 240)
-        music_widget.setStyleSheet("background: transparent;")
+        music_widget.setProperty("role", "panel group")
 
         # Title
         title = QLabel("🎵 Music Player", music_widget)
         title.setGeometry(0, 0, 610, 30)
         title.setAlignment(Qt.AlignCenter)
         title.setFont(QFont("Arial", 14, QFont.Bold))
-        title.setStyleSheet("color: #2f4f4f; background: transparent;")
+        title.setProperty("role", "panel text")
 
         # Song label
         self.song_label = QLabel("No song loaded", music_widget)
         self.song_label.setGeometry(0, 30, 610, 30)
         self.song_label.setAlignment(Qt.AlignCenter)
         self.song_label.setFont(QFont("Arial", 10))
-        self.song_label.setStyleSheet("color: #2f4f4f; background: transparent;")
+        self.song_label.setProperty("role", "panel text")
+
+        # Album art, left of the transport buttons
+        self.art_label = QLabel("🎵", music_widget)
+        self.art_label.setGeometry(15, 75, ART_SIZE, ART_SIZE)
+        self.art_label.setAlignment(Qt.AlignCenter)
+        self.art_label.setFont(QFont("Arial", 28))
+        self.art_label.setProperty("role", "album art")
+        self.art_path = None
+        self.album_art = album_art.cache()
+        self.album_art.ready.connect(self.art_ready)
 
         # --- Center Circular Play Button ---
         self.play_btn = QPushButton("▶", music_widget)
         self.play_btn.setFont(QFont("Arial", 20, QFont.Bold))
         self.play_btn.setGeometry(245, 80, 120, 120)
-        self.play_btn.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                    stop:0 #7fffd4, stop:1 #40e0d0);
-                color: #2f4f4f;
-                border-radius: 60px;
-                border: 3px solid #48d1cc;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                    stop:0 #98fb98, stop:1 #7fffd4);
-            }
-        """)
-        shadow = QGraphicsDropShadowEffect()
-        shadow.setBlurRadius(20)
-        shadow.setColor(QColor("#48d1cc"))
-        shadow.setOffset(0, 0)
-        self.play_btn.setGraphicsEffect(shadow)
+        self.play_btn.setProperty("role", "play")
+        # Pre-blurred halo, a live drop shadow would re-blur on every repaint
+        self.play_glow = glow.Glow(self.play_btn, radius=20, color=theme.colors(theme.DEFAULT_THEME)["glow"])
         self.play_btn.clicked.connect(self.play_pause)
 
         # --- Left / Right Buttons ---
@@ -263,190 +243,371 @@ class ControlCenter(QWidget):
         # Left button
         self.left_btn.setFont(QFont("Arial", 14, QFont.Bold))
         self.left_btn.setGeometry(155, 100, 60, 60)
-        self.left_btn.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #7fffd4, stop:1 #40e0d0);
-                color: #2f4f4f;
-                border-radius: 30px;
-                border: 2px solid #48d1cc;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #98fb98, stop:1 #7fffd4);
-            }
-        """)
+        self.left_btn.setProperty("role", "skip")
         self.left_btn.clicked.connect(self.prev_song)
 
         # Right button (next)
         self.right_btn.setFont(QFont("Arial", 14, QFont.Bold))
         self.right_btn.setGeometry(395, 100, 60, 60)
-        self.right_btn.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #7fffd4, stop:1 #40e0d0);
-                color: #2f4f4f;
-                border-radius: 30px;
-                border: 2px solid #48d1cc;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #98fb98, stop:1 #7fffd4);
-            }
-        """)
+        self.right_btn.setProperty("role", "skip")
         self.right_btn.clicked.connect(self.next_song)
 
+        # Shuffle
+        self.shuffle_btn = QPushButton("🔀", music_widget)
+        self.shuffle_btn.setFont(QFont("Arial", 14, QFont.Bold))
+        self.shuffle_btn.setGeometry(485, 100, 60, 60)
+        self.shuffle_btn.setProperty("role", "skip")
+        self.shuffle_btn.setCheckable(True)
+        self.shuffle_btn.clicked.connect(self.toggle_shuffle)
+
+        # Search field, results open in a list below it
+        self.search_field = QLineEdit(self.music_frame)
+        self.search_field.setGeometry(400, 12, 215, 30)
+        self.search_field.setPlaceholderText("Search music")
+        self.search_field.setProperty("role", "music search")
+        self.search_field.textChanged.connect(self.search_music)
+
+        self.search_results = QListWidget(self)
+        self.search_results.setGeometry(850, 64, 215, 220)
+        self.search_results.setProperty("role", "music results")
+        self.search_results.hide()
+
+        self.play_result_btn = QPushButton("Play", self)
+        self.play_result_btn.setGeometry(850, 290, 105, 26)
+        self.play_result_btn.setProperty("role", "player small")
+        self.play_result_btn.clicked.connect(self.play_result)
+        self.play_result_btn.hide()
+
+        self.queue_result_btn = QPushButton("Up next", self)
+        self.queue_result_btn.setGeometry(960, 290, 105, 26)
+        self.queue_result_btn.setProperty("role", "player small")
+        self.queue_result_btn.clicked.connect(self.queue_result)
+        self.queue_result_btn.hide()
+
+        # Library scan progress, only shown while a scan runs
+        self.scan_label = QLabel(music_widget)
+        self.scan_label.setGeometry(0, 210, 520, 24)
+        self.scan_label.setAlignment(Qt.AlignCenter)
+        self.scan_label.setFont(QFont("Arial", 9))
+        self.scan_label.setProperty("role", "panel text")
+        self.scan_label.hide()
+
+        self.cancel_scan_btn = QPushButton("Stop", music_widget)
+        self.cancel_scan_btn.setGeometry(530, 209, 70, 26)
+        self.cancel_scan_btn.setProperty("role", "player small")
+        self.cancel_scan_btn.clicked.connect(self.cancel_scan)
+        self.cancel_scan_btn.hide()
+
         # Load songs
         self.load_songs()
+        QApplication.instance().aboutToQuit.connect(self.checkpoint)
 
     def load_songs(self):
-        if os.path.exists(self.music_folder):
-            self.playlist = [
-                os.path.join(self.music_folder, f)
-                for f in os.listdir(self.music_folder)
-                if f.lower().endswith(('.mp3', '.wav', '.ogg'))
-            ]
-            if self.playlist:
-                self.current_index = 0
-                self.load_song(self.playlist[self.current_index])
+        # The playlist is one query on the library index; the folder itself is
+        # scanned in the background and new tracks stream in as they are found
+        self.library = music_library.library()
+        if os.path.isdir(self.music_folder):
+            self.queue.set_tracks(self.library.tracks(self.music_folder))
+            self.restore_queue()
+            if len(self.queue):
+                QTimer.singleShot(RESCAN_DELAY_MS, self.start_scan)
             else:
-                self.song_label.setText("No audio files in folder.")
+                self.start_scan()
+        self.show_playlist_status()
+
+    def restore_queue(self):
+        # the index is already loaded, so the last track is found without touching the folder
+        if self.resume["track"] in self.queue.ids:
+            self.queue.jump(self.resume["track"])
+        else:
+            self.resume["position_ms"] = 0  # gone, or not indexed yet
+        for path in self.resume["up_next"]:
+            if path in self.queue.ids:
+                self.queue.enqueue(path)
+        if self.resume["shuffle"]:
+            self.queue.set_shuffle(True)
+            self.shuffle_btn.setChecked(True)
+
+    def show_playlist_status(self):
+        if len(self.queue):
+            # playback starts the first time the control panel is shown
+            self.show_track(self.queue.current_path())
+        elif self.scanner is not None and self.scanner.is_running():
+            self.song_label.setText("Looking for music...")
+        elif os.path.isdir(self.music_folder):
+            self.song_label.setText("No audio files in folder.")
         else:
             self.song_label.setText("Music folder not found.")
 
-    def load_song(self, path):
-        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(path)))
+    # --- LIBRARY SCAN ---
+    def start_scan(self):
+        if self.scanner is not None and self.scanner.is_running():
+            return
+        self.scanner = library_scanner.LibraryScanner(self.music_folder, self.library.db_path)
+        self.scanner.found.connect(self.add_tracks)
+        self.scanner.progress.connect(self.show_scan_progress)
+        self.scanner.finished.connect(self.scan_finished)
+        self.scanner.start()
+        self.show_scan_progress(0, 0)
+        self.show_playlist_status()
+
+    def show_scan_progress(self, seen, indexed):
+        self.scan_label.setText(f"Scanning music: {seen} files checked, {indexed} new or changed")
+        self.scan_label.show()
+        self.cancel_scan_btn.show()
+
+    def add_tracks(self, paths):
+        first = not len(self.queue)
+        self.queue.add(paths)
+        if self._engine is not None:
+            self._engine.preload()  # the neighbours may have changed
+        if first:
+            self.show_playlist_status()
+            if self.autoplay_waiting:
+                self.autoplay_waiting = False
+                self.engine.play()
+
+    def cancel_scan(self):
+        if self.scanner is not None:
+            self.scanner.cancel()
+
+    def scan_finished(self, counts, tracks):
+        self.scan_label.hide()
+        self.cancel_scan_btn.hide()
+        if "error" in counts:
+            self.show_playlist_status()  # keep what was streamed in before the failure
+            return
+        if not counts["cancelled"]:
+            self.album_art.prune(self.library.db_path, self.music_folder)
+        # tracks streamed in folder order, the index has them sorted
+        self.queue.set_tracks(tracks)
+        if self._engine is None:
+            self.show_playlist_status()
+        else:
+            self._engine.preload()
+
+    # --- PLAYBACK ---
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = playback_engine.PlaybackEngine(self.queue, self)
+            self._engine.set_volume(self.resume["volume"])
+            self._engine.track_changed.connect(self.show_track)
+            self._engine.playing_changed.connect(self.show_playing)
+        return self._engine
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.autoplay_pending:
+            self.autoplay_pending = False
+            # start after the first frame is on screen
+            QTimer.singleShot(0, self.autoplay)
+
+    def autoplay(self):
+        if len(self.queue):
+            if self.resume["playing"]:
+                self.engine.play(position=self.resume["position_ms"])
+        else:
+            self.autoplay_waiting = True  # the scan starts playback once it finds a track
+
+    def show_track(self, path):
         self.song_label.setText(os.path.basename(path))
-        self.player.play()
-        self.play_btn.setText("⏸")
+        self.show_art(path)
+        if self._engine is not None:
+            self.save_soon()
+
+    def show_art(self, path):
+        # the neighbours are loaded ahead, so a skip finds their art in memory
+        self.art_path = path
+        edge = round(ART_SIZE * self.art_label.devicePixelRatioF())
+        neighbours = [self.queue.peek(1), self.queue.peek(-1)]
+        self.set_art(self.album_art.request(path, edge, prefetch=neighbours))
+
+    def art_ready(self, path, pixmap):
+        if path == self.art_path:
+            self.set_art(pixmap)
+
+    def set_art(self, pixmap):
+        if pixmap is None or pixmap.isNull():
+            self.art_label.setText("🎵")  # no art, or still loading
+        else:
+            pixmap.setDevicePixelRatio(self.art_label.devicePixelRatioF())
+            self.art_label.setPixmap(pixmap)
+
+    def show_playing(self, playing):
+        self.play_btn.setText("⏸" if playing else "▶")
+        self.save_soon()
+
+    def set_volume(self, volume):
+        if self._engine is not None:
+            self._engine.set_volume(volume)
+        self.resume["volume"] = volume
+        self.save_soon()
 
     def play_pause(self):
-        if self.player.state() == QMediaPlayer.PlayingState:
-            self.player.pause()
-            self.play_btn.setText("▶")
-        else:
-            if not self.playlist:
-                return
-            if self.player.media().isNull():
-                self.load_song(self.playlist[self.current_index])
-            else:
-                self.player.play()
-                self.play_btn.setText("⏸")
+        if self._engine is not None and self.engine.is_playing():
+            self.engine.pause()
+        elif len(self.queue):
+            self.engine.play(position=self.resume["position_ms"])
+            self.resume["position_ms"] = 0
 
     def next_song(self):
-        if not self.playlist:
-            return
-        self.current_index = (self.current_index + 1) % len(self.playlist)
-        self.load_song(self.playlist[self.current_index])
+        # the next and previous tracks are already open, a skip only starts them
+        if len(self.queue):
+            self.engine.next()
 
     def prev_song(self):
-        if not self.playlist:
-            return
-        self.current_index = (self.current_index - 1) % len(self.playlist)
-        self.load_song(self.playlist[self.current_index])
+        if len(self.queue):
+            self.engine.previous()
+
+    # --- SEARCH, QUEUE AND SHUFFLE ---
+    def search_music(self, text):
+        # a prefix query on the library's search table, well under a millisecond
+        self.search_results.clear()
+        for path in self.library.search(self.music_folder, text):
+            item = QListWidgetItem(os.path.basename(path))
+            item.setData(Qt.UserRole, path)
+            self.search_results.addItem(item)
+        searching = bool(text.strip())
+        for widget in (self.search_results, self.play_result_btn, self.queue_result_btn):
+            widget.setVisible(searching)
+            widget.raise_()
+
+    def selected_result(self):
+        item = self.search_results.currentItem()
+        path = item.data(Qt.UserRole) if item is not None else None
+        return path if path in self.queue.ids else None  # may be indexed but not delivered yet
+
+    def play_result(self):
+        path = self.selected_result()
+        if path is not None:
+            self.engine.play(path)
+            self.search_field.clear()
+
+    def queue_result(self):
+        path = self.selected_result()
+        if path is not None:
+            self.queue.enqueue(path)
+            self.queue_changed()
+
+    def toggle_shuffle(self):
+        self.queue.set_shuffle(self.shuffle_btn.isChecked())
+        self.queue_changed()
+
+    def queue_changed(self):
+        # open the new next / previous tracks in the standby players
+        if self._engine is not None:
+            self._engine.preload()
+        self.save_soon()
+
+    # --- PLAYBACK STATE ---
+    def save_soon(self):
+        tick_scheduler.scheduler().call_later("playback checkpoint", playback_state.SAVE_DELAY_MS,
+                                              self.checkpoint, self)
+
+    def checkpoint(self):
+        playing = self._engine is not None and self._engine.is_playing()
+        if self._engine is not None and self._engine.loaded.get(self._engine.active):
+            self.resume["position_ms"] = self._engine.position()
+            self.resume["playing"] = playing
+        self.resume.update(track=self.queue.current_path(), up_next=list(self.queue.up_next),
+                           shuffle=self.queue.shuffled, seed=self.queue.seed)
+        playback_state.save(self.resume)
+        if playing:
+            tick_scheduler.scheduler().call_later("playback checkpoint", playback_state.CHECKPOINT_MS,
+                                                  self.checkpoint, self)
 
     # --- INIT UI ---
     def init_ui(self):
         # === Battery Indicator in Top Left ===
-        self.battery_widget = BatteryRing(self, percentage=85)
+        self.battery_widget = BatteryRing(self)  # "--%" until the charge is known
         self.battery_widget.setGeometry(50, 20, 150, 150)
+        sensors = telemetry.telemetry()
+        sensors.soc.connect(self.battery_widget.update_battery)
+        if "soc" in sensors.latest:
+            self.battery_widget.update_battery(sensors.latest["soc"])
         
         # Battery label
         battery_label = QLabel("Battery", self)
         battery_label.setGeometry(50, 170, 150, 30)
         battery_label.setAlignment(Qt.AlignCenter)
         battery_label.setFont(QFont("Arial", 12, QFont.Bold))
-        battery_label.setStyleSheet("color: #2f4f4f; background: transparent;")
+        battery_label.setProperty("role", "panel text")
 
         # === Top Row Buttons ===
-        self.bluetooth_btn = self.create_button("", radius=50, button_name="bluetooth")
+        self.bluetooth_btn = self.create_button("", button_name="bluetooth")
         self.bluetooth_btn.setGeometry(1160, 20, 300, 150)
         self.bluetooth_btn.setText("Bluetooth")
 
-        self.wifi_btn = self.create_button("", radius=50, button_name="wifi")
+        self.wifi_btn = self.create_button("", button_name="wifi")
         self.wifi_btn.setGeometry(1530, 20, 300, 150)
         self.wifi_btn.setText("WiFi")
 
         # === Music Player Block ===
         self.music_frame = QFrame(self)
         self.music_frame.setGeometry(450, 20, 630, 300)
-        self.music_frame.setStyleSheet("""
-            background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                stop:0 #ffffff, stop:1 #f0f8ff);
-            border-radius: 20px;
-            border: 2px solid #7fffd4;
-        """)
+        self.music_frame.setProperty("role", "panel frame")
         
         self.music_label = QLabel("Music Player", self.music_frame)
         self.music_label.setGeometry(10, 10, 140, 30)
         self.music_label.setAlignment(Qt.AlignCenter)
-        self.music_label.setStyleSheet("""
-            color: #2f4f4f; 
-            font-size: 14pt; 
-            font-weight: bold;
-            background: transparent;
-        """)
+        self.music_label.setProperty("role", "panel heading")
 
         # Create the music player inside the music frame
         self.create_music_player()
 
         # === Middle Row Buttons ===
-        self.lock_btn = self.create_button("", radius=50, button_name="lock")  
+        self.lock_btn = self.create_button("", button_name="lock")  
         self.lock_btn.setGeometry(50, 360, 300, 150)
         self.lock_btn.setText("Lock")
 
-        self.moon_btn = self.create_button("", radius=50, button_name="moon")  
+        self.moon_btn = self.create_button("", button_name="moon")  
         self.moon_btn.setGeometry(420, 360, 300, 150)
         self.moon_btn.setText("Dark Mode")
+        self.moon_btn.clicked.connect(theme.manager().toggle)
 
-        self.screen_btn = self.create_button("", radius=50, button_name="screen")  
+        self.screen_btn = self.create_button("", button_name="screen")  
         self.screen_btn.setGeometry(790, 360, 300, 150)
         self.screen_btn.setText("Screen\nRotation")
 
         # === Sliders ===
-        self.brightness_slider = self.create_slider("", 
-                                                    frame_radius=40, handle_radius=25,
+        self.brightness_slider = self.create_slider("",
                                                     slider_width=85, slider_height=350,
                                                     groove_width=85)
         self.brightness_slider.setGeometry(1715, 200, 100, 500)
 
-        self.volume_slider = self.create_slider("", 
-                                                frame_radius=40, handle_radius=25,
+        self.volume_slider = self.create_slider("",
                                                 slider_width=85, slider_height=350,
                                                 groove_width=85)
         self.volume_slider.setGeometry(1530, 200, 100, 500)
+        self.volume_slider.slider.setValue(self.resume["volume"])
+        self.volume_slider.slider.valueChanged.connect(self.set_volume)
 
         # === Bottom Row Buttons ===
-        self.flashlight_btn = self.create_button("", radius=50, button_name="flashlight")
+        self.flashlight_btn = self.create_button("", button_name="flashlight")
         self.flashlight_btn.setGeometry(50, 720, 300, 150)
         self.flashlight_btn.setText("Flashlight")
 
-        self.timer_btn = self.create_button("", radius=50, button_name="timer")
+        self.timer_btn = self.create_button("", button_name="timer")
         self.timer_btn.setGeometry(420, 720, 300, 150)
         self.timer_btn.setText("Timer")
 
-        self.calculator_btn = self.create_button("", radius=50, button_name="calculator")
+        self.calculator_btn = self.create_button("", button_name="calculator")
         self.calculator_btn.setGeometry(790, 720, 300, 150)
         self.calculator_btn.setText("Calculator")
 
     def keyPressEvent(self, event):
         # Press Escape to exit full screen
         if event.key() == Qt.Key_Escape:
-            if self.isFullScreen():
-                self.showNormal()
+            window = self.window()
+            if window.isFullScreen():
+                window.showNormal()
             else:
-                self.showFullScreen()
+                window.showFullScreen()
 
 # --- MAIN ---
 def main():
-    app = QApplication(sys.argv)
-    
-    # Set application font
-    font = QFont("Arial", 10)
-    app.setFont(font)
-    
-    win = ControlCenter()
-    sys.exit(app.exec_())
+    sys.exit(screen_router.run("control panel"))
 
 if __name__ == "__main__":
     main()
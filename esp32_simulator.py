@@ -0,0 +1,169 @@
+"""ESP32 telemetry simulator on a pseudo terminal, for running without the hardware.
+
+    python esp32_simulator.py [--rate 50] [--speedup 1] [--uptime-ms 0]
+
+Prints the path of the pty's device, e.g. /dev/pts/4, and then writes the
+ESP32's binary sample frames (telemetry_protocol.py) to it, a ride going on
+and the battery draining. Point the infotainment at it with
+
+    INFOTAINMENT_TELEMETRY_PORT=/dev/pts/4 python infotainment.py
+"""
+import argparse
+import math
+import os
+import random
+import threading
+import time
+import tty
+
+import battery_soc
+import telemetry_protocol
+
+
+# Sensor errors of the ESP32's readings
+VOLTAGE_NOISE_V = 0.1
+CURRENT_OFFSET_A = 0.2
+# The ESP32's own range: its voltage based charge at a fixed consumption
+PACK_WH = 360.0
+WH_PER_KM = 12.0
+
+
+class Pack:
+    """Electrical behaviour of a simulated pack.
+
+    Like battery_soc's model: the open circuit voltage less the sag over
+    the resistance and a polarization settling with polarization_s. The
+    open circuit voltage is off from battery_soc's table by up to
+    ocv_error_cell_v per cell, in a wave over the charge.
+    """
+
+    def __init__(self, capacity_ah, resistance_ohm, polarization_ohm, polarization_s, ocv_error_cell_v=0.0):
+        self.capacity_ah = capacity_ah
+        self.resistance_ohm = resistance_ohm
+        self.polarization_ohm = polarization_ohm
+        self.polarization_s = polarization_s
+        self.ocv_error_cell_v = ocv_error_cell_v
+
+    def ocv(self, soc):
+        error = self.ocv_error_cell_v * math.sin(math.pi * soc / 40)
+        return battery_soc.ocv(soc)[0] + battery_soc.CELLS * error
+
+
+# Exactly the pack battery_soc models
+MODEL_PACK = Pack(battery_soc.CAPACITY_AH, battery_soc.RESISTANCE_OHM,
+                  battery_soc.POLARIZATION_OHM, battery_soc.POLARIZATION_S)
+# The pack the simulator rides by default, off from the model as a real one
+# is: aged to 94 % of its capacity, more resistance and a slower, larger
+# polarization, and an open circuit voltage up to 20 mV per cell off
+REAL_PACK = Pack(capacity_ah=9.4, resistance_ohm=0.1, polarization_ohm=0.07, polarization_s=60.0,
+                 ocv_error_cell_v=0.02)
+
+
+class Ride:
+    """The simulated ride, advanced in steps of simulated time.
+
+    It starts at soc percent. Speed drifts 6 km/h around cruise_kmh over
+    ten minutes with short swings on top, rolling hills every 3 km add or
+    take current, and the current drains pack while its voltage sags under
+    it. The ESP32 reports the charge the way a voltage-to-percent map
+    would, jumping with every change of load, and the current with
+    CURRENT_OFFSET_A of sensor error; battery is the true charge. The light
+    level swings between day and dusk once an hour. The ESP32's uptime
+    starts at uptime_ms; near 2^32 its time_ms soon wraps.
+    """
+
+    def __init__(self, cruise_kmh=26.0, soc=100.0, seed=1, uptime_ms=0, pack=REAL_PACK):
+        self.cruise_kmh = cruise_kmh
+        self.pack = pack
+        self.uptime_ms = uptime_ms
+        self.random = random.Random(seed)
+        self.elapsed = 0.0   # simulated seconds
+        self.battery = soc
+        self.polarization_v = 0.0
+        self.trip_km = 0.0
+
+    def step(self, seconds):
+        """Advance the ride by seconds; the sample frame at the new time"""
+        self.elapsed += seconds
+        speed = max(0.0, self.cruise_kmh + 6 * math.sin(self.elapsed / 100) + 3 * math.sin(self.elapsed / 4))
+        hill = 4 * math.sin(2 * math.pi * self.trip_km / 3)
+        current = max(0.0, 1.0 + 0.012 * speed * speed + hill)
+        pack = self.pack
+        self.battery = max(0.0, self.battery - current * seconds / 36 / pack.capacity_ah)
+        self.trip_km += speed * seconds / 3600
+        settle = 1 - math.exp(-seconds / pack.polarization_s)
+        self.polarization_v += settle * (current * pack.polarization_ohm - self.polarization_v)
+        voltage = (pack.ocv(self.battery) - current * pack.resistance_ohm - self.polarization_v
+                   + self.random.gauss(0, VOLTAGE_NOISE_V))
+        naive = battery_soc.soc_from_voltage(voltage)
+        minutes = self.elapsed / 60
+        return telemetry_protocol.encode_sample(
+            time_ms=(self.uptime_ms + int(self.elapsed * 1000)) % telemetry_protocol.TIME_MS_WRAP,
+            battery=naive,
+            voltage=voltage,
+            current=current + CURRENT_OFFSET_A,
+            speed_kmh=speed,
+            trip_km=self.trip_km,
+            range_km=naive / 100 * PACK_WH / WH_PER_KM,
+            light=250 + 240 * math.cos(2 * math.pi * minutes / 60),
+        )
+
+
+class Simulator:
+    """Writes a Ride's frames to the master side of a new pty.
+
+    path is the device the infotainment opens. speedup runs simulated time
+    faster; uptime_ms is where the ESP32's clock starts.
+    """
+
+    def __init__(self, rate=50.0, speedup=1.0, uptime_ms=0):
+        self.rate = rate
+        self.speedup = speedup
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)  # no echo back into the master
+        self.path = os.ttyname(self.slave)
+        self.stopping = threading.Event()
+        self.thread = None
+        self.sent = 0
+        self.ride = Ride(uptime_ms=uptime_ms)
+
+    def write(self, data):
+        os.write(self.master, data)
+        self.sent += 1
+
+    def run(self):
+        while not self.stopping.wait(1 / self.rate):
+            self.write(self.ride.step(self.speedup / self.rate))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="esp32 simulator", daemon=True)
+        self.thread.start()
+        return self.path
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=50.0, help="frames per second")
+    parser.add_argument("--speedup", type=float, default=1.0, help="simulated seconds per second")
+    parser.add_argument("--uptime-ms", type=int, default=0, help="the ESP32's uptime at the start, e.g. 4294960000 to wrap")
+    args = parser.parse_args()
+
+    simulator = Simulator(args.rate, args.speedup, args.uptime_ms)
+    print(simulator.path, flush=True)
+    simulator.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+from PyQt5.QtWidgets import QWidget, QGraphicsScene, QGraphicsPixmapItem, QGraphicsBlurEffect
+from PyQt5.QtGui import QColor, QImage, QPainter, QPixmap
+from PyQt5.QtCore import Qt, QEvent, QRectF
+
+
+# (width, height, blur radius, rgba, shape, device pixel ratio) -> halo QPixmap
+_halos = {}
+renders = 0  # halos blurred so far, stays constant once every glow is cached
+
+
+def halo(width, height, radius, color, shape="ellipse", dpr=1.0):
+    """Blurred halo for a width x height control, padded by radius on every side.
+
+    shape is "ellipse" or "rect". The blur runs once per key; later calls
+    return the cached pixmap, so drawing a glow is a single blit.
+    """
+    global renders
+    color = QColor(color)
+    key = (width, height, radius, color.rgba(), shape, dpr)
+    pixmap = _halos.get(key)
+    if pixmap is not None:
+        return pixmap
+
+    full_width = round((width + 2 * radius) * dpr)
+    full_height = round((height + 2 * radius) * dpr)
+    source = QImage(full_width, full_height, QImage.Format_ARGB32_Premultiplied)
+    source.fill(Qt.transparent)
+    painter = QPainter(source)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(color)
+    body = QRectF(radius * dpr, radius * dpr, width * dpr, height * dpr)
+    if shape == "ellipse":
+        painter.drawEllipse(body)
+    else:
+        painter.drawRect(body)
+    painter.end()
+
+    # the same blur QGraphicsDropShadowEffect applies, run offscreen once
+    scene = QGraphicsScene()
+    item = QGraphicsPixmapItem(QPixmap.fromImage(source))
+    effect = QGraphicsBlurEffect()
+    effect.setBlurRadius(radius * dpr)
+    effect.setBlurHints(QGraphicsBlurEffect.QualityHint)
+    item.setGraphicsEffect(effect)
+    scene.addItem(item)
+
+    blurred = QImage(full_width, full_height, QImage.Format_ARGB32_Premultiplied)
+    blurred.fill(Qt.transparent)
+    painter = QPainter(blurred)
+    area = QRectF(0, 0, full_width, full_height)
+    scene.render(painter, area, area)
+    painter.end()
+
+    pixmap = QPixmap.fromImage(blurred)
+    pixmap.setDevicePixelRatio(dpr)
+    _halos[key] = pixmap
+    renders += 1
+    return pixmap
+
+
+class Glow(QWidget):
+    """Glow behind a control, drawn from a cached halo pixmap.
+
+    Replaces QGraphicsDropShadowEffect, which re-blurs an offscreen copy of
+    the control every time it repaints. The glow is a sibling stacked under
+    the target and follows its geometry and visibility.
+    """
+
+    def __init__(self, target, radius=20, color="#48d1cc", shape="ellipse"):
+        super().__init__(target.parentWidget())
+        self.target = target
+        self.radius = radius
+        self.color = QColor(color)
+        self.shape = shape
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        target.installEventFilter(self)
+        self.follow()
+
+    def set_color(self, color):
+        color = QColor(color)
+        if color != self.color:
+            self.color = color
+            self.update()
+
+    def follow(self):
+        geometry = self.target.geometry()
+        self.setGeometry(geometry.adjusted(-self.radius, -self.radius, self.radius, self.radius))
+        self.stackUnder(self.target)
+        self.setVisible(self.target.isVisibleTo(self.parentWidget()))
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.Move, QEvent.Resize, QEvent.Show, QEvent.Hide):
+            self.follow()
+        return False
+
+    def paintEvent(self, event):
+        target = self.target.size()
+        pixmap = halo(target.width(), target.height(), self.radius, self.color,
+                      self.shape, self.devicePixelRatioF())
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, pixmap)
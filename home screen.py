@@ -1,9 +1,13 @@
-from PyQt5.QtWidgets import QApplication, QLabel, QWidget
-from PyQt5.QtGui import QPixmap, QFont
-from PyQt5.QtCore import Qt, QTimer, QDateTime, QSize, QEvent
+from PyQt5.QtWidgets import QLabel, QWidget
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QSize
 import sys
 import os
-import subprocess
+
+import image_cache
+import screen_router
+import theme
+import tick_scheduler
 
 
 
@@ -11,16 +15,16 @@ class ClockWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Cycle Infotainment Clock")
-        self.image_path = "D:\infotainment system\image\home screen.jpg"
+        self.image_path = "image/home screen.jpg"
+        self.theme_mode = theme.DEFAULT_THEME
 
-        # File navigation setup
-        self.next_file = r"D:\infotainment system\lock screen.py"  # change path if needed
+        # Swipe up opens this screen
+        self.next_screen = "lock"
         self.start_pos = None  # for swipe detection
 
-        # Path to your background image
+        # Path to your background image (the other screens keep running without it)
         if not os.path.exists(self.image_path):
             print("Background image not found!")
-            sys.exit()
 
         # Setup background label
         self.background_label = QLabel(self)
@@ -44,17 +48,14 @@ class ClockWindow(QWidget):
         self.date_label.setFont(QFont("Segoe UI", 30))
         self.date_label.raise_()
 
-        # Timer to refresh every second
-        timer = QTimer(self)
-        timer.timeout.connect(self.update_time)
-        timer.start(1000)
-        self.update_time()  # Initial time update
+        # Refresh on the minute (shared scheduler, no per-second timer)
+        tick_scheduler.scheduler().subscribe_minute("home clock", self.update_time, self)
 
-        # Install event filter for resize events
-        self.installEventFilter(self)
         # Trigger initial resize handling
         self.resizeEvent(None)
-        self.showFullScreen()  # Enter fullscreen mode immediately
+
+        # Night mode swaps in the darkened background
+        theme.manager().register("home", self, self.apply_theme)
 
     # -------- Swipe Handling -------- #
     def mousePressEvent(self, event):
@@ -73,24 +74,12 @@ class ClockWindow(QWidget):
             self.start_pos = None
 
     def open_next_file(self):
-        if os.path.exists(self.next_file):
-            print(f"Opening {self.next_file}")
-            subprocess.Popen(["python", self.next_file])  # run next file
-            QApplication.quit()  # close current app
-        else:
-            print("Next file not found!")
+        screen_router.navigate(self.next_screen)
 
     # -------- UI Resize Handling -------- #
-    def eventFilter(self, obj, event):
-        if event.type() == QEvent.Resize:
-            self.handle_resize(event.size())
-        return super().eventFilter(obj, event)
-
     def handle_resize(self, new_size: QSize):
-        # Scale and display background
-        pixmap = QPixmap(self.image_path).scaled(
-            new_size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
-        )
+        # Scaled background comes from the shared cache, decoded at this size
+        pixmap = image_cache.scaled_pixmap(self.image_path, new_size, mode=self.theme_mode)
         self.background_label.setPixmap(pixmap)
         self.background_label.setGeometry(0, 0, new_size.width(), new_size.height())
 
@@ -114,14 +103,15 @@ class ClockWindow(QWidget):
         size = event.size() if event else self.size()
         self.handle_resize(size)
 
-    def update_time(self):
-        current = QDateTime.currentDateTime()
+    def apply_theme(self, mode):
+        if mode != self.theme_mode:
+            self.theme_mode = mode
+            self.handle_resize(self.size())
+
+    def update_time(self, current):
         self.time_label.setText(current.toString("hh:mm"))
         self.date_label.setText(current.toString("dd MMMM, dddd"))
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = ClockWindow()
-    window.show()
-    sys.exit(app.exec_())
+    sys.exit(screen_router.run("home"))
@@ -0,0 +1,128 @@
+from PyQt5.QtGui import QIcon, QImage, QImageReader, QPainter, QPixmap
+from PyQt5.QtCore import Qt, QRect, QSize
+
+import asset_manifest
+
+
+# Icon name -> (image when on, image when off, display size in px).
+# Icons with a single state only have an "off" image.
+ICONS = {
+    "left indicator": ("image/left indicator on.png", "image/left indicator off.png", 100),
+    "right indicator": ("image/right indicator on.png", "image/right indicator off.png", 100),
+    "hazard": ("image/hazard on.png", "image/hazard off.png", 60),
+    "high beam": ("image/high beam on.png", "image/high beam off.png", 100),
+    "low beam": ("image/low beam on.png", "image/low beam off.png", 100),
+    "charging": ("image/charging on.png", "image/charging off.png", 100),
+    "control panel menu": (None, "image/control panel menu.png", 100),
+    "navigation menu": (None, "image/navigation menu.png", 100),
+}
+
+# Width of the atlas the icons are packed into
+ATLAS_WIDTH = 1024
+
+
+def pack_atlas(entries, width=ATLAS_WIDTH):
+    """Shelf-pack (key, size) entries into rows; returns ({key: QRect}, QSize)"""
+    rects = {}
+    x = y = row_height = 0
+    for key, size in entries:
+        if x + size > width:
+            x, y = 0, y + row_height
+            row_height = 0
+        rects[key] = QRect(x, y, size, size)
+        x += size
+        row_height = max(row_height, size)
+    return rects, QSize(width, y + row_height)
+
+
+class IconRegistry:
+    """Every on/off icon state, decoded once at its display size.
+
+    All states are packed into one atlas image, and each state's QIcon is
+    cut from it when the registry loads. When build_assets.py has written the
+    atlas, it is read as a single file. Blinking an indicator only swaps
+    which (already decoded) QIcon a button shows. file_loads counts image
+    decodes, so it stays constant during steady-state blinking.
+    """
+
+    def __init__(self, icons=ICONS):
+        self.definitions = icons
+        self.icons = {}     # (name, on) -> QIcon
+        self.atlas = None
+        self.file_loads = 0
+        self.lookups = 0
+
+    def states(self):
+        for name, (on_file, off_file, size) in self.definitions.items():
+            if on_file:
+                yield (name, True), on_file, size
+            yield (name, False), off_file, size
+
+    def load(self):
+        if self.definitions is ICONS and self.load_prebuilt():
+            return
+        states = list(self.states())
+        rects, atlas_size = pack_atlas([(key, size) for key, _, size in states])
+
+        atlas = QImage(atlas_size, QImage.Format_ARGB32_Premultiplied)
+        atlas.fill(Qt.transparent)
+        painter = QPainter(atlas)
+        for key, path, size in states:
+            image = self.decode(path, size)
+            if not image.isNull():
+                # centred in its slot, like QIcon draws a non-square image
+                slot = rects[key]
+                painter.drawImage(slot.x() + (size - image.width()) // 2,
+                                  slot.y() + (size - image.height()) // 2, image)
+        painter.end()
+        self.use_atlas(atlas, rects)
+
+    def load_prebuilt(self):
+        prebuilt = asset_manifest.manifest().icon_atlas()
+        if prebuilt is None:
+            return False
+        path, rects = prebuilt
+        if set(rects) != {key for key, _, _ in self.states()}:
+            print("Icon atlas does not match the icon list, run build_assets.py")
+            return False
+        self.file_loads += 1
+        atlas = QImageReader(path).read()
+        if atlas.isNull():
+            return False
+        self.use_atlas(atlas, rects)
+        return True
+
+    def use_atlas(self, atlas, rects):
+        self.atlas = atlas
+        for key, rect in rects.items():
+            self.icons[key] = QIcon(QPixmap.fromImage(atlas.copy(rect)))
+
+    def decode(self, path, size):
+        self.file_loads += 1
+        reader = QImageReader(path)
+        source = reader.size()
+        if source.isValid():
+            reader.setScaledSize(source.scaled(QSize(size, size), Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            print(f"Could not load icon {path}: {reader.errorString()}")
+        return image
+
+    def icon(self, name, on=False):
+        self.lookups += 1
+        return self.icons[(name, on)]
+
+    def stats(self):
+        return {"icons": len(self.icons), "file_loads": self.file_loads, "lookups": self.lookups}
+
+
+_registry = None
+
+
+def registry():
+    """The icon registry shared by all screens, loaded on first use"""
+    global _registry
+    if _registry is None:
+        _registry = IconRegistry()
+        _registry.load()
+    return _registry
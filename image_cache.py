@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from PyQt5.QtGui import QColor, QImage, QImageReader, QPainter, QPixmap
+from PyQt5.QtCore import Qt, QSize
+
+import asset_manifest
+import theme
+
+
+# Memory the scaled pixmaps may use before the least recently used are dropped
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+class ImageCache:
+    """Process-wide cache of scaled pixmaps.
+
+    Entries are keyed by (path, target size, aspect mode, transform mode,
+    theme) and evicted least recently used first once the memory budget is
+    exceeded.
+    Images are decoded straight at the target size with QImageReader, so a
+    JPEG is never decoded at full resolution just to be scaled down again.
+    When build_assets.py produced a variant at exactly the target size, that
+    file is read instead and nothing is scaled at all. Themes with a
+    background_dim get a darkened copy, prebuilt or dimmed once on decode.
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.failed = set()  # paths already reported as unreadable
+
+    def pixmap(self, path, size, aspect_mode=Qt.KeepAspectRatioByExpanding,
+               transform_mode=Qt.SmoothTransformation, mode=theme.DEFAULT_THEME):
+        if size.isEmpty():
+            return QPixmap()
+
+        key = (path, size.width(), size.height(), int(aspect_mode), int(transform_mode), mode)
+        pixmap = self.entries.get(key)
+        if pixmap is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return pixmap
+
+        self.misses += 1
+        pixmap = self.decode(path, size, aspect_mode, transform_mode, mode)
+        if not pixmap.isNull():
+            self.entries[key] = pixmap
+            self.used_bytes += pixmap_bytes(pixmap)
+            self.evict()
+        return pixmap
+
+    def decode(self, path, size, aspect_mode, transform_mode, mode):
+        dim = theme.colors(mode)["background_dim"]
+        if aspect_mode == Qt.KeepAspectRatioByExpanding and transform_mode == Qt.SmoothTransformation:
+            variant = asset_manifest.manifest().background(path, size, mode)
+            if variant:
+                path, dim = variant, 0  # already darkened by the build
+        reader = QImageReader(path)
+        source = reader.size()  # read from the header, nothing decoded yet
+        if source.isValid():
+            reader.setScaledSize(source.scaled(size, aspect_mode))
+        # the JPEG reader only scales smoothly from quality 50 upwards
+        reader.setQuality(75 if transform_mode == Qt.SmoothTransformation else 0)
+        image = reader.read()
+        if image.isNull():
+            if path not in self.failed:
+                self.failed.add(path)
+                print(f"Could not load image {path}: {reader.errorString()}")
+            return QPixmap()
+        if dim:
+            image = dimmed(image, dim)
+        return QPixmap.fromImage(image)
+
+    def warm(self, mode):
+        """Decode the mode variant of every cached image, ahead of a theme switch"""
+        for path, width, height, aspect_mode, transform_mode, _ in list(self.entries):
+            self.pixmap(path, QSize(width, height), Qt.AspectRatioMode(aspect_mode),
+                        Qt.TransformationMode(transform_mode), mode)
+
+    def evict(self):
+        # always keep the newest entry, even if it alone is over budget
+        while self.used_bytes > self.budget_bytes and len(self.entries) > 1:
+            _, pixmap = self.entries.popitem(last=False)
+            self.used_bytes -= pixmap_bytes(pixmap)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.used_bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.used_bytes,
+        }
+
+
+def dimmed(image, amount):
+    """Copy of image darkened by amount (0..1), as used for night backgrounds"""
+    image = image.convertToFormat(QImage.Format_RGB32)
+    painter = QPainter(image)
+    painter.fillRect(image.rect(), QColor(0, 0, 0, round(amount * 255)))
+    painter.end()
+    return image
+
+
+def pixmap_bytes(pixmap):
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+_cache = None
+
+
+def cache():
+    """The image cache shared by all screens"""
+    global _cache
+    if _cache is None:
+        _cache = ImageCache()
+    return _cache
+
+
+def scaled_pixmap(path, size, aspect_mode=Qt.KeepAspectRatioByExpanding,
+                  transform_mode=Qt.SmoothTransformation, mode=theme.DEFAULT_THEME):
+    return cache().pixmap(path, size, aspect_mode, transform_mode, mode)
@@ -0,0 +1,7 @@
+import sys
+
+import screen_router
+
+
+if __name__ == "__main__":
+    sys.exit(screen_router.run("home"))
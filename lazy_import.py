@@ -0,0 +1,37 @@
+import importlib
+import time
+
+
+# Module name -> seconds spent importing it, for the modules loaded lazily so far
+import_times = {}
+
+
+class LazyModule:
+    """Stand-in for an optional subsystem that is imported on first use.
+
+    The real import happens the first time an attribute is read, e.g.
+    QtMultimedia.QMediaPlayer, so screens that never touch the subsystem
+    never pay for it.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            start = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            import_times[self._name] = time.perf_counter() - start
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def lazy_import(name):
+    return LazyModule(name)
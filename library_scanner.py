@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+
+import music_library
+
+
+# Tag parsing processes; the rest of the Pi's cores stay free for the UI
+TAG_WORKERS = min(2, os.cpu_count() or 1)
+TAG_WORKER_NICE = 10
+
+# The first track is handed over on its own so playback can start at once,
+# later ones in batches
+FIRST_BATCH_SIZE = 1
+BATCH_SIZE = 50
+
+# Files between progress updates, and between GIL hand-overs to the UI thread
+PROGRESS_EVERY = 25
+
+
+def lower_priority():
+    os.nice(TAG_WORKER_NICE)
+
+
+class LibraryScanner(QObject):
+    """Rescans the music library off the UI thread.
+
+    A plain thread walks the folder and diffs it against the index through
+    its own SQLite connection. Tags are parsed in a small pool of low
+    priority processes when mutagen is installed (inline otherwise, where
+    only WAV headers are read). Newly indexed tracks are streamed out in
+    batches through found, which Qt delivers on the UI thread. The sorted
+    track list is queried here too, so the UI thread only swaps lists.
+    """
+
+    found = pyqtSignal(list)         # paths just added to the index
+    progress = pyqtSignal(int, int)  # files seen, files (re)indexed
+    finished = pyqtSignal(dict, list)  # counts of added, updated, removed, unchanged plus "cancelled",
+                                       # and the indexed tracks in playlist order; after a
+                                       # failure only "error" and "cancelled", and no tracks
+
+    def __init__(self, root, db_path=None, workers=TAG_WORKERS):
+        super().__init__()
+        self.root = root
+        self.db_path = db_path
+        self.workers = workers
+        self.cancelled = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="library scan", daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def run(self):
+        counts, tracks = {}, []
+        library = None
+        try:
+            library = music_library.MusicLibrary(self.db_path)  # connections stay in their thread
+            counts = self.scan(library)
+            tracks = library.tracks(self.root)
+        except Exception as e:  # a broken index or folder must still end the scan
+            print(f"Music library scan of {self.root} failed: {e}")
+            counts = {"error": str(e)}
+        finally:
+            if library is not None:
+                library.close()
+            counts["cancelled"] = self.cancelled.is_set()
+            self.finished.emit(counts, tracks)
+
+    def scan(self, library):
+        counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        if not os.path.isdir(self.root):
+            return counts
+        known = library.known(self.root)
+        unreadable = []
+        pool = None
+        if music_library.mutagen is not None and self.workers > 1:
+            # forked children would inherit the Qt threads' locks
+            pool = ProcessPoolExecutor(self.workers, multiprocessing.get_context("forkserver"),
+                                       initializer=lower_priority)
+        pending = []
+        batch_size = FIRST_BATCH_SIZE
+        seen = 0
+        try:
+            for path, mtime, size, change in library.changes(self.root, known, unreadable):
+                if self.cancelled.is_set():
+                    break
+                seen += 1
+                counts[change or "unchanged"] += 1
+                if change:
+                    tags = pool.submit(music_library.read_tags, path) if pool else music_library.read_tags(path)
+                    pending.append((path, mtime, size, change, tags))
+                    if len(pending) >= batch_size:
+                        self.flush(library, pending)
+                        pending = []
+                        batch_size = BATCH_SIZE
+                if seen % PROGRESS_EVERY == 0:
+                    self.progress.emit(seen, counts["added"] + counts["updated"])
+                    time.sleep(0)  # let the UI thread take the GIL
+            if pending:
+                self.flush(library, pending)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        self.progress.emit(seen, counts["added"] + counts["updated"])
+        if not self.cancelled.is_set():
+            counts["removed"] = library.remove_missing(known, unreadable)
+        return counts
+
+    def flush(self, library, pending):
+        entries = [(path, mtime, size, tags if isinstance(tags, dict) else tags.result())
+                   for path, mtime, size, _, tags in pending]
+        library.store(self.root, entries)
+        added = [path for path, _, _, change, _ in pending if change == "added"]
+        if added:
+            self.found.emit(added)
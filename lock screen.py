@@ -1,10 +1,14 @@
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QLabel, QPushButton, QGridLayout, QVBoxLayout,
+    QWidget, QLabel, QPushButton, QGridLayout, QVBoxLayout,
     QSizePolicy, QLayout
 )
-from PyQt5.QtGui import QFont, QPixmap, QIcon
+from PyQt5.QtGui import QFont, QIcon
 from PyQt5.QtCore import Qt
-import sys, os, subprocess
+import sys
+
+import image_cache
+import screen_router
+import theme
 
 
 class LockScreen(QWidget):
@@ -13,10 +17,11 @@ class LockScreen(QWidget):
         self.correct_pin = correct_pin
         self.entered_pin = ""
         self.image_path = "image/home screen.jpg"  
+        self.theme_mode = theme.DEFAULT_THEME
 
-        # --- FILES ---
-        self.home_file = r"D:\infotainment system\home screen.py"   # Open by swipe
-        self.main_file = r"D:\infotainment system\main menu.py"     # Open by PIN
+        # --- SCREENS ---
+        self.home_screen = "home"        # Open by swipe
+        self.main_screen = "main menu"   # Open by PIN
 
         self.start_pos = None  # for swipe detection
 
@@ -86,14 +91,23 @@ class LockScreen(QWidget):
         layout.addStretch(2)
         layout.setContentsMargins(40, 50, 40, 50)
 
+        # Night mode swaps in the darkened background
+        theme.manager().register("lock", self, self.apply_theme)
+
     def resizeEvent(self, event):
-        # Resize background
-        pixmap = QPixmap(self.image_path).scaled(
-            self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation
-        )
+        self.update_background()
+
+    def update_background(self):
+        # Resize background (scaled copies are shared through the image cache)
+        pixmap = image_cache.scaled_pixmap(self.image_path, self.size(), mode=self.theme_mode)
         self.background_label.setPixmap(pixmap)
         self.background_label.setGeometry(0, 0, self.width(), self.height())
 
+    def apply_theme(self, mode):
+        if mode != self.theme_mode:
+            self.theme_mode = mode
+            self.update_background()
+
     def handle_input(self, key):
         if key == "C":
             self.entered_pin = self.entered_pin[:-1]
@@ -130,26 +144,14 @@ class LockScreen(QWidget):
 
     def open_home_screen(self):
         """Open home screen by swipe"""
-        if os.path.exists(self.home_file):
-            print(f"Opening {self.home_file}")
-            subprocess.Popen(["python", self.home_file])
-            QApplication.quit()
-        else:
-            print("Home screen file not found!")
+        screen_router.navigate(self.home_screen)
 
     def open_main_screen(self):
         """Open main screen by correct PIN"""
-        if os.path.exists(self.main_file):
-            print(f"Opening {self.main_file}")
-            subprocess.Popen(["python", self.main_file])
-            QApplication.quit()
-        else:
-            print("Main screen file not found!")
+        self.title_label.setText("Enter your pin")
+        screen_router.navigate(self.main_screen)
 
 
 # --- Run Standalone LockScreen ---
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = LockScreen()
-    window.showFullScreen()
-    sys.exit(app.exec_())
+    sys.exit(screen_router.run("lock"))
@@ -1,19 +1,24 @@
 import sys
-import os
-import subprocess
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QLabel, QPushButton,
+    QWidget, QLabel, QPushButton,
     QVBoxLayout, QMainWindow, QFrame
 )
-from PyQt5.QtCore import Qt, QTimer, QDateTime
-from PyQt5.QtGui import QFont, QPixmap, QIcon
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont, QPixmap
+
+import icon_registry
+import image_cache
+import screen_router
+import telemetry
+import theme
+import tick_scheduler
+import warm_pool
 
 
 class InfotainmentUI(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Infotainment UI")
-        self.showFullScreen()
         # --- Central widget & layout ---
         self.central = QWidget(self)
         self.setCentralWidget(self.central)
@@ -23,38 +28,47 @@ class InfotainmentUI(QMainWindow):
 
          # --- Background Image ---
         self.bg_label = QLabel(self.central)
-        self.bg_pixmap = QPixmap("image/main menu.jpg")
-        self.bg_label.setGeometry(0, 0, self.width(), self.height())
-        if not self.bg_pixmap.isNull():
-            self.bg_label.setPixmap(
-                self.bg_pixmap.scaled(self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-            )
+        self.bg_path = "image/main menu.jpg"  # scaled in resizeEvent
         self.bg_label.lower()
 
+        self.theme_mode = theme.DEFAULT_THEME
+
         # --- Foreground UI ---
         self.frame = QFrame(self.central)
         
         # File paths for other applications
-        self.control_panel_path = "D:/infotainment system/control panel.py"  # CHANGE THIS PATH
-        self.navigation_path = "D:/infotainment system/navigation menu.py"  # CHANGE THIS PATH
+        self.control_panel_screen = "control panel"
         
         self.init_ui()
+        theme.manager().register("main menu", self, self.apply_theme)
 
     def resizeEvent(self, event):
         # Resize background to fill window
-        if hasattr(self, 'bg_pixmap') and not self.bg_pixmap.isNull():
-            self.bg_label.setGeometry(0, 0, self.width(), self.height())
-            self.bg_label.setPixmap(
-                self.bg_pixmap.scaled(self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-            )
+        self.update_background()
         super().resizeEvent(event)
 
+    def update_background(self):
+        if hasattr(self, 'theme_mode'):
+            pixmap = image_cache.scaled_pixmap(self.bg_path, self.size(), mode=self.theme_mode)
+            if not pixmap.isNull():
+                self.bg_label.setGeometry(0, 0, self.width(), self.height())
+                self.bg_label.setPixmap(pixmap)
+
+    def apply_theme(self, mode):
+        # Text colours follow the application stylesheet, the photo is swapped here
+        if mode != self.theme_mode:
+            self.theme_mode = mode
+            self.update_background()
+
     # ---- UI elements ----
     def init_ui(self):
+        # Every on/off icon state, decoded once (blinking only swaps QIcons)
+        self.icons = icon_registry.registry()
+
         # Power Button
         self.power_btn = QPushButton("⏻", self.central)
         self.power_btn.setGeometry(20, 20, 50, 50)
-        self.power_btn.setStyleSheet("font-size: 30px; color: black; background: transparent; border: none;")
+        self.power_btn.setProperty("role", "menu button")
         self.power_btn.clicked.connect(self.show_black_screen)
 
         # Clock & Date
@@ -62,63 +76,46 @@ class InfotainmentUI(QMainWindow):
         self.clock_label.setAlignment(Qt.AlignCenter)
         self.clock_label.setFont(QFont("Arial", 60, QFont.Bold))
         self.clock_label.setGeometry(825, 100, 300, 80)
-        self.clock_label.setStyleSheet("color: black; background: transparent;")
+        self.clock_label.setProperty("role", "menu text")
 
         self.date_label = QLabel(self.central)
         self.date_label.setAlignment(Qt.AlignCenter)
         self.date_label.setFont(QFont("Arial", 16))
         self.date_label.setGeometry(825, 180, 330, 30)
-        self.date_label.setStyleSheet("color: black; background: transparent;")
+        self.date_label.setProperty("role", "menu text")
 
-        # Update Clock
-        self.clock_timer = QTimer(self)
-        self.clock_timer.timeout.connect(self.update_clock)
-        self.clock_timer.start(1000)
-        self.update_clock()
+        # Update Clock on the minute; the indicators blink on the same scheduler
+        self.ticks = tick_scheduler.scheduler()
+        self.ticks.subscribe_minute("main menu clock", self.update_clock, self)
 
         # Indicators
         self.left_indicator = QPushButton(self.central)
         self.left_indicator.setGeometry(20, 120, 100, 100)
         self.left_indicator.setStyleSheet("background: transparent; border: none;")
-        self.left_indicator.setIcon(QIcon("image/left indicator off.png"))
+        self.left_indicator.setIcon(self.icons.icon("left indicator"))
         self.left_indicator.setIconSize(self.left_indicator.size())
-        self.left_blink = False
-        self.left_timer = QTimer(self)
-        self.left_timer.timeout.connect(self.toggle_left_indicator)
-        self.left_stop_timer = QTimer(self)
-        self.left_stop_timer.setSingleShot(True)
-        self.left_stop_timer.timeout.connect(self.stop_left_indicator)
         self.left_indicator.clicked.connect(self.start_left_blink)
 
         self.right_indicator = QPushButton(self.central)
         self.right_indicator.setGeometry(1800, 120, 100, 100)
         self.right_indicator.setStyleSheet("background: transparent; border: none;")
-        self.right_indicator.setIcon(QIcon("image/right indicator off.png"))
+        self.right_indicator.setIcon(self.icons.icon("right indicator"))
         self.right_indicator.setIconSize(self.right_indicator.size())
-        self.right_blink = False
-        self.right_timer = QTimer(self)
-        self.right_timer.timeout.connect(self.toggle_right_indicator)
-        self.right_stop_timer = QTimer(self)
-        self.right_stop_timer.setSingleShot(True)
-        self.right_stop_timer.timeout.connect(self.stop_right_indicator)
         self.right_indicator.clicked.connect(self.start_right_blink)
 
         # Hazard
         self.warning_label = QPushButton(self.central)
         self.warning_label.setGeometry(950, 20, 60, 60)
         self.warning_label.setStyleSheet("background: transparent; border: none;")
-        self.warning_label.setIcon(QIcon("image/hazard off.png"))
+        self.warning_label.setIcon(self.icons.icon("hazard"))
         self.warning_label.setIconSize(self.warning_label.size())
-        self.warning_blink = False
-        self.warning_timer = QTimer(self)
-        self.warning_timer.timeout.connect(self.toggle_warning)
         self.warning_label.clicked.connect(self.start_warning_blink)
 
         # Left Bulbs
         self.left_bulb1 = QPushButton(self.central)
         self.left_bulb1.setGeometry(20, 240, 100, 100)
         self.left_bulb1.setStyleSheet("background: transparent; border: none;")
-        self.left_bulb1.setIcon(QIcon("image/high beam off.png"))
+        self.left_bulb1.setIcon(self.icons.icon("high beam"))
         self.left_bulb1.setIconSize(self.left_bulb1.size())
         self.left_bulb1.setCheckable(True)
         self.left_bulb1.clicked.connect(self.toggle_left_bulb1)
@@ -126,7 +123,7 @@ class InfotainmentUI(QMainWindow):
         self.left_bulb2 = QPushButton(self.central)
         self.left_bulb2.setGeometry(20, 360, 100, 100)
         self.left_bulb2.setStyleSheet("background: transparent; border: none;")
-        self.left_bulb2.setIcon(QIcon("image/low beam off.png"))
+        self.left_bulb2.setIcon(self.icons.icon("low beam"))
         self.left_bulb2.setIconSize(self.left_bulb2.size())
         self.left_bulb2.setCheckable(True)
         self.left_bulb2.clicked.connect(self.toggle_left_bulb2)
@@ -136,7 +133,7 @@ class InfotainmentUI(QMainWindow):
         self.right_bulb1 = QPushButton(self.central)
         self.right_bulb1.setGeometry(1800, 240, 100, 100)
         self.right_bulb1.setStyleSheet("background: transparent; border: none;")
-        self.right_bulb1.setIcon(QIcon("image/charging off.png"))
+        self.right_bulb1.setIcon(self.icons.icon("charging"))
         self.right_bulb1.setIconSize(self.right_bulb1.size())
         self.right_bulb1.setCheckable(True)
         self.right_bulb1.clicked.connect(self.toggle_right_bulb1)
@@ -145,7 +142,7 @@ class InfotainmentUI(QMainWindow):
         self.control_panel_btn = QPushButton(self.central)
         self.control_panel_btn.setGeometry(1800, 360, 100, 100)
         self.control_panel_btn.setStyleSheet("background: transparent; border: none;")
-        self.control_panel_btn.setIcon(QIcon("image/control panel menu.png"))
+        self.control_panel_btn.setIcon(self.icons.icon("control panel menu"))
         self.control_panel_btn.setIconSize(self.control_panel_btn.size())
         self.control_panel_btn.clicked.connect(self.open_control_panel)
 
@@ -153,32 +150,37 @@ class InfotainmentUI(QMainWindow):
         self.navigation_btn = QPushButton(self.central)
         self.navigation_btn.setGeometry(1800, 480, 100, 100)
         self.navigation_btn.setStyleSheet("background: transparent; border: none;")
-        self.navigation_btn.setIcon(QIcon("image/navigation menu.png"))
+        self.navigation_btn.setIcon(self.icons.icon("navigation menu"))
         self.navigation_btn.setIconSize(self.navigation_btn.size())
         self.navigation_btn.clicked.connect(self.open_navigation)
 
         # Bottom Labels
-        self.bottom_left = QLabel("Left", self.central)
+        self.bottom_left = QLabel("-- km", self.central)
         self.bottom_left.setGeometry(100, 900, 200, 40)
         self.bottom_left.setAlignment(Qt.AlignCenter)
         self.bottom_left.setFont(QFont("Arial", 18))
-        self.bottom_left.setStyleSheet("color: black; background: transparent;")
+        self.bottom_left.setProperty("role", "menu text")
 
-        self.bottom_center = QLabel("Center", self.central)
+        self.bottom_center = QLabel("Battery: --%", self.central)
         self.bottom_center.setGeometry(900, 900, 200, 40)
         self.bottom_center.setAlignment(Qt.AlignCenter)
         self.bottom_center.setFont(QFont("Arial", 18))
-        self.bottom_center.setStyleSheet("color: black; background: transparent;")
+        self.bottom_center.setProperty("role", "menu text")
 
-        self.bottom_right = QLabel("Right", self.central)
+        self.bottom_right = QLabel("Range: -- km", self.central)
         self.bottom_right.setGeometry(1600, 900, 200, 40)
         self.bottom_right.setAlignment(Qt.AlignCenter)
         self.bottom_right.setFont(QFont("Arial", 18))
-        self.bottom_right.setStyleSheet("color: black; background: transparent;")
+        self.bottom_right.setProperty("role", "menu text")
+
+        # Trip, battery and range come from the ESP32
+        sensors = telemetry.telemetry()
+        sensors.show_text("trip_km", "{:.0f} km", self.set_bottom_left_text, self)
+        sensors.show_text("soc", "Battery: {:.0f}%", self.set_bottom_center_text, self)
+        sensors.show_text("range_estimate_km", "Range: {:.0f} km", self.set_bottom_right_text, self)
 
     # ---- Functions ----
-    def update_clock(self):
-        now = QDateTime.currentDateTime()
+    def update_clock(self, now):
         self.clock_label.setText(now.toString("hh:mm"))
         self.date_label.setText(now.toString("dd MMMM, dddd"))
 
@@ -189,119 +191,80 @@ class InfotainmentUI(QMainWindow):
             if child is not self.bg_label:
                 child.hide()
 
-    def toggle_left_indicator(self):
-        self.left_indicator.setIcon(QIcon("image/left indicator on.png" if self.left_blink else "image/left indicator off.png"))
-        self.left_blink = not self.left_blink
+    def toggle_left_indicator(self, on):
+        self.left_indicator.setIcon(self.icons.icon("left indicator", on))
 
     def start_left_blink(self):
         # Stop right indicator if active
-        if self.right_timer.isActive():
+        if self.ticks.is_blinking("right indicator"):
             self.stop_right_indicator()
         
         # Start left indicator
-        if not self.left_timer.isActive():
-            self.left_timer.start(500)
-            self.left_stop_timer.start(10000)  # 10 seconds
-            self.left_blink = True
-            self.left_indicator.setIcon(QIcon("image/left indicator on.png"))
+        if not self.ticks.is_blinking("left indicator"):
+            self.ticks.start_blink("left indicator", self.toggle_left_indicator, self)
+            self.ticks.call_later("left indicator stop", 10000, self.stop_left_indicator, self)  # 10 seconds
 
     def stop_left_indicator(self):
-        self.left_timer.stop()
-        self.left_stop_timer.stop()
-        self.left_indicator.setIcon(QIcon("image/left indicator off.png"))
-        self.left_blink = False
+        self.ticks.stop_blink("left indicator")
+        self.ticks.cancel("left indicator stop")
+        self.left_indicator.setIcon(self.icons.icon("left indicator"))
 
-    def toggle_right_indicator(self):
-        self.right_indicator.setIcon(QIcon("image/right indicator on.png" if self.right_blink else "image/right indicator off.png"))
-        self.right_blink = not self.right_blink
+    def toggle_right_indicator(self, on):
+        self.right_indicator.setIcon(self.icons.icon("right indicator", on))
 
     def start_right_blink(self):
         # Stop left indicator if active
-        if self.left_timer.isActive():
+        if self.ticks.is_blinking("left indicator"):
             self.stop_left_indicator()
         
         # Start right indicator
-        if not self.right_timer.isActive():
-            self.right_timer.start(500)
-            self.right_stop_timer.start(10000)  # 10 seconds
-            self.right_blink = True
-            self.right_indicator.setIcon(QIcon("image/right indicator on.png"))
+        if not self.ticks.is_blinking("right indicator"):
+            self.ticks.start_blink("right indicator", self.toggle_right_indicator, self)
+            self.ticks.call_later("right indicator stop", 10000, self.stop_right_indicator, self)  # 10 seconds
 
     def stop_right_indicator(self):
-        self.right_timer.stop()
-        self.right_stop_timer.stop()
-        self.right_indicator.setIcon(QIcon("image/right indicator off.png"))
-        self.right_blink = False
+        self.ticks.stop_blink("right indicator")
+        self.ticks.cancel("right indicator stop")
+        self.right_indicator.setIcon(self.icons.icon("right indicator"))
 
-    def toggle_warning(self):
-        self.warning_label.setIcon(QIcon("image/hazard on.png" if self.warning_blink else "image/hazard off.png"))
-        self.warning_blink = not self.warning_blink
+    def toggle_warning(self, on):
+        self.warning_label.setIcon(self.icons.icon("hazard", on))
 
         # Also blink left and right indicators when hazard is active
-        if self.warning_blink:
-            self.left_indicator.setIcon(QIcon("image/left indicator on.png"))
-            self.right_indicator.setIcon(QIcon("image/right indicator on.png"))
-        else:
-            self.left_indicator.setIcon(QIcon("image/left indicator off.png"))
-            self.right_indicator.setIcon(QIcon("image/right indicator off.png"))
+        self.left_indicator.setIcon(self.icons.icon("left indicator", on))
+        self.right_indicator.setIcon(self.icons.icon("right indicator", on))
 
     def start_warning_blink(self):
-        if self.warning_timer.isActive():
+        if self.ticks.is_blinking("hazard"):
             # Stop hazard
-            self.warning_timer.stop()
-            self.warning_label.setIcon(QIcon("image/hazard off.png"))
+            self.ticks.stop_blink("hazard")
+            self.warning_label.setIcon(self.icons.icon("hazard"))
 
             # Stop both indicators
-            self.left_timer.stop()
-            self.right_timer.stop()
-            self.left_stop_timer.stop()
-            self.right_stop_timer.stop()
-            self.left_indicator.setIcon(QIcon("image/left indicator off.png"))
-            self.right_indicator.setIcon(QIcon("image/right indicator off.png"))
+            self.stop_left_indicator()
+            self.stop_right_indicator()
         else:
-            # Start hazard
-            self.warning_timer.start(500)
-
-            # Also start both indicators blinking
-            self.left_timer.start(500)
-            self.right_timer.start(500)
+            # The hazard channel blinks both indicators too
+            self.stop_left_indicator()
+            self.stop_right_indicator()
+            self.ticks.start_blink("hazard", self.toggle_warning, self)
 
     def toggle_left_bulb1(self):
-        self.left_bulb1.setIcon(QIcon("image/high beam on.png" if self.left_bulb1.isChecked() else "image/high beam off.png"))
+        self.left_bulb1.setIcon(self.icons.icon("high beam", self.left_bulb1.isChecked()))
 
     def toggle_left_bulb2(self):
-        self.left_bulb2.setIcon(QIcon("image/low beam on.png" if self.left_bulb2.isChecked() else "image/low beam off.png"))
+        self.left_bulb2.setIcon(self.icons.icon("low beam", self.left_bulb2.isChecked()))
 
     def toggle_right_bulb1(self):
-        self.right_bulb1.setIcon(QIcon("image/charging on.png" if self.right_bulb1.isChecked() else "image/charging off.png"))
+        self.right_bulb1.setIcon(self.icons.icon("charging", self.right_bulb1.isChecked()))
 
     def open_control_panel(self):
-        """Open the control panel application"""
-        try:
-            if os.path.exists(self.control_panel_path):
-                # Close current application
-                self.close()
-                # Open control panel application
-                subprocess.Popen([sys.executable, self.control_panel_path])
-            else:
-                print(f"Control panel file not found: {self.control_panel_path}")
-                # You can show a message to the user here
-        except Exception as e:
-            print(f"Error opening control panel: {e}")
+        """Switch to the control panel screen"""
+        screen_router.navigate(self.control_panel_screen)
 
     def open_navigation(self):
-        """Open the navigation application"""
-        try:
-            if os.path.exists(self.navigation_path):
-                # Close current application
-                self.close()
-                # Open navigation application
-                subprocess.Popen([sys.executable, self.navigation_path])
-            else:
-                print(f"Navigation file not found: {self.navigation_path}")
-                # You can show a message to the user here
-        except Exception as e:
-            print(f"Error opening navigation: {e}")
+        """Open the navigation map in its warm worker process"""
+        warm_pool.pool().open("navigation")
 
     def set_bottom_left_text(self, text):
         self.bottom_left.setText(text)
@@ -314,13 +277,4 @@ class InfotainmentUI(QMainWindow):
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = InfotainmentUI()
-    window.show()
-
-    # Example dynamic text
-    window.set_bottom_left_text("20 km")
-    window.set_bottom_center_text("Battery: 75%")
-    window.set_bottom_right_text("Range: 30 km")
-
-    sys.exit(app.exec_())
+    sys.exit(screen_router.run("main menu"))
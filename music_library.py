@@ -0,0 +1,212 @@
+import os
+import re
+import sqlite3
+import wave
+
+import app_paths
+
+try:
+    import mutagen  # optional, only needed for tags and compressed formats' durations
+except ImportError:
+    mutagen = None
+
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg")
+DB_NAME = "music_library.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    duration REAL,
+    title TEXT,
+    artist TEXT,
+    album TEXT,
+    track_number INTEGER
+);
+CREATE INDEX IF NOT EXISTS tracks_by_root ON tracks (root, path);
+CREATE VIRTUAL TABLE IF NOT EXISTS track_words USING fts5(title, artist, album, prefix='1 2 3');
+"""
+
+COLUMNS = ("path", "root", "mtime", "size", "duration", "title", "artist", "album", "track_number")
+
+SEARCH_LIMIT = 50
+WORD = re.compile(r"\w+")
+
+
+def walk(root, unreadable=None):
+    """(path, mtime, size) of every audio file below root, subfolders included.
+
+    Folders that cannot be listed are appended to unreadable.
+    """
+    pending = [root]
+    while pending:
+        folder = pending.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError as e:
+            print(f"Could not read music folder {folder}: {e}")
+            if unreadable is not None:
+                unreadable.append(folder)
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_mtime, stat.st_size
+            except OSError:
+                continue  # removed while scanning
+
+
+def match_query(text):
+    """FTS5 query matching tracks with a word starting with every word of text"""
+    return " ".join('"%s"*' % word for word in WORD.findall(text.lower()))
+
+
+def read_tags(path):
+    """Duration and tags of one file; title falls back to the file name"""
+    tags = {"duration": None, "title": None, "artist": None, "album": None, "track_number": None}
+    if mutagen is not None:
+        try:
+            audio = mutagen.File(path, easy=True)
+        except Exception as e:  # mutagen raises its own error per format
+            print(f"Could not read tags of {path}: {e}")
+            audio = None
+        if audio is not None:
+            if audio.info is not None:
+                tags["duration"] = getattr(audio.info, "length", None)
+            for name in ("title", "artist", "album"):
+                values = (audio.tags or {}).get(name)
+                if values:
+                    tags[name] = values[0]
+            number = (audio.tags or {}).get("tracknumber")
+            if number:
+                try:
+                    tags["track_number"] = int(number[0].split("/")[0])
+                except ValueError:
+                    pass
+    if tags["duration"] is None and path.lower().endswith(".wav"):
+        try:
+            with wave.open(path) as f:
+                tags["duration"] = f.getnframes() / f.getframerate()
+        except (OSError, wave.Error, EOFError):
+            pass
+    if not tags["title"]:
+        tags["title"] = os.path.splitext(os.path.basename(path))[0]
+    return tags
+
+
+class MusicLibrary:
+    """Persistent index of the music folder in SQLite.
+
+    A rescan (library_scanner.LibraryScanner, through changes(), store() and
+    remove_missing()) stats every file but only reads tags from files that
+    are new or whose mtime or size changed, and drops rows of files that are
+    gone. The playlist is one query on the (root, path) index, so building it
+    does not touch the music folder at all. Titles, artists and albums are
+    also kept in an FTS5 table with prefix indexes, updated in the same
+    transactions, for search as you type.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or app_paths.data_path(DB_NAME)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        if not self.db.execute("SELECT EXISTS (SELECT 1 FROM track_words)").fetchone()[0]:
+            with self.db:  # an index written before search existed
+                self.db.execute("INSERT INTO track_words (rowid, title, artist, album) "
+                                "SELECT rowid, title, artist, album FROM tracks")
+
+    def tracks(self, root):
+        """Paths of every indexed track below root, in path order"""
+        rows = self.db.execute("SELECT path FROM tracks WHERE root = ? ORDER BY path", (root,))
+        return [path for path, in rows]
+
+    def track(self, path):
+        row = self.db.execute(f"SELECT {', '.join(COLUMNS)} FROM tracks WHERE path = ?",
+                              (path,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def known(self, root):
+        """path -> (mtime, size) as indexed"""
+        rows = self.db.execute("SELECT path, mtime, size FROM tracks WHERE root = ?", (root,))
+        return {path: (mtime, size) for path, mtime, size in rows}
+
+    def search(self, root, text, limit=SEARCH_LIMIT):
+        """Up to limit tracks below root matching every word of text as a prefix.
+
+        The search table is walked first and stops at limit, so a one-letter
+        query costs as little as a precise one. The matches come back in path
+        order, though they are the first ones indexed rather than the first
+        paths.
+        """
+        query = match_query(text)
+        if not query:
+            return []
+        rows = self.db.execute(
+            "SELECT tracks.path FROM track_words CROSS JOIN tracks ON tracks.rowid = track_words.rowid "
+            "WHERE track_words MATCH ? AND tracks.root = ? LIMIT ?", (query, root, limit))
+        return sorted(path for path, in rows)
+
+    def store(self, root, entries):
+        """Index (path, mtime, size, tags) entries"""
+        with self.db:
+            # an upsert keeps the rowid, which the search table refers to
+            self.db.executemany(
+                f"INSERT INTO tracks ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))}) "
+                f"ON CONFLICT (path) DO UPDATE SET "
+                f"{', '.join(f'{column} = excluded.{column}' for column in COLUMNS[1:])}",
+                [(path, root, mtime, size, tags["duration"], tags["title"], tags["artist"],
+                  tags["album"], tags["track_number"]) for path, mtime, size, tags in entries])
+            self.db.executemany(
+                "INSERT OR REPLACE INTO track_words (rowid, title, artist, album) "
+                "SELECT rowid, title, artist, album FROM tracks WHERE path = ?",
+                [(path,) for path, _, _, _ in entries])
+
+    def remove(self, paths):
+        with self.db:
+            self.db.executemany("DELETE FROM track_words WHERE rowid = (SELECT rowid FROM tracks WHERE path = ?)",
+                                [(path,) for path in paths])
+            self.db.executemany("DELETE FROM tracks WHERE path = ?", [(path,) for path in paths])
+
+    def changes(self, root, known, unreadable):
+        """(path, mtime, size, change) for every audio file below root.
+
+        change is "added", "updated" or None for a file indexed as it is.
+        Every file seen is popped from known, so what is left afterwards is
+        gone (see remove_missing).
+        """
+        for path, mtime, size in walk(root, unreadable):
+            indexed = known.pop(path, None)
+            if indexed == (mtime, size):
+                yield path, mtime, size, None
+            else:
+                yield path, mtime, size, "added" if indexed is None else "updated"
+
+    def remove_missing(self, known, unreadable):
+        """Drop files not seen by a scan, unless their folder could not be read"""
+        gone = [path for path in known
+                if not any(path.startswith(folder + os.sep) for folder in unreadable)]
+        if gone:
+            self.remove(gone)
+        return len(gone)
+
+    def close(self):
+        self.db.close()
+
+
+_library = None
+
+
+def library():
+    """The music library shared by the control panel"""
+    global _library
+    if _library is None:
+        _library = MusicLibrary()
+    return _library
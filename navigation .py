@@ -8,9 +8,6 @@ class NavigationUI(QWidget):
         super().__init__()
         self.setWindowTitle("Full Screen Map")
 
-        # ---------------- FULL SCREEN ----------------
-        self.showFullScreen()  # Make the window full screen
-
         # Main layout
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -29,5 +26,5 @@ class NavigationUI(QWidget):
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     window = NavigationUI()
-    window.show()
+    window.showFullScreen()  # Make the window full screen
     sys.exit(app.exec_())
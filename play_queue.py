@@ -0,0 +1,167 @@
+import random
+from collections import deque
+
+
+# Feistel rounds of the shuffle permutation
+SHUFFLE_ROUNDS = 4
+
+
+class Shuffle:
+    """Seeded permutation of range(size), computed one position at a time.
+
+    A small Feistel network scrambles the position inside the next even
+    power of two; results outside range(size) are scrambled again until
+    they land inside (cycle walking, under four rounds on average). Nothing
+    is stored per track, and the same seed and size give the same order.
+    """
+
+    def __init__(self, size, seed):
+        self.size = size
+        self.half = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half) - 1
+        generator = random.Random(seed)
+        self.keys = [generator.getrandbits(32) for _ in range(SHUFFLE_ROUNDS)]
+
+    def mix(self, value, key):
+        value = ((value ^ key) * 0x45D9F3B) & 0xFFFFFFFF
+        value ^= value >> 16
+        return value & self.mask
+
+    def encrypt(self, value):
+        left, right = value >> self.half, value & self.mask
+        for key in self.keys:
+            left, right = right, left ^ self.mix(right, key)
+        return (left << self.half) | right
+
+    def decrypt(self, value):
+        left, right = value >> self.half, value & self.mask
+        for key in reversed(self.keys):
+            left, right = right ^ self.mix(left, key), left
+        return (left << self.half) | right
+
+    def __getitem__(self, position):
+        value = self.encrypt(position)
+        while value >= self.size:
+            value = self.encrypt(value)
+        return value
+
+    def index(self, track):
+        """Position of track, the inverse of [position]"""
+        value = self.decrypt(track)
+        while value >= self.size:
+            value = self.decrypt(value)
+        return value
+
+
+class PlayQueue:
+    """What plays next: the library in order or shuffled, after an up next queue.
+
+    position is the place in the play order, and next / previous only move
+    it by one. The shuffled order is a Shuffle, so turning shuffle on never
+    copies or reorders the track list. Tracks from enqueue() play before the
+    order continues. previous() after a queued track returns to where the
+    order was left.
+    """
+
+    def __init__(self, tracks=(), seed=None):
+        self.tracks = []
+        self.ids = {}         # path -> place in tracks
+        self.seed = seed
+        self.shuffled = False
+        self.shuffle = None   # Shuffle of the current library size while shuffled
+        self.position = 0
+        self.current = None   # path playing
+        self.queued = False   # current came from up_next
+        self.up_next = deque()
+        self.set_tracks(tracks)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def order(self, position):
+        """Path at position of the play order"""
+        position %= len(self.tracks)
+        return self.tracks[self.shuffle[position] if self.shuffle else position]
+
+    def position_of(self, path):
+        track = self.ids[path]
+        return self.shuffle.index(track) if self.shuffle else track
+
+    # --- Library changes ---
+    def set_tracks(self, tracks):
+        """Replace the library; the current track and the queue are kept when still there"""
+        self.tracks = list(tracks)
+        self.ids = {path: track for track, path in enumerate(self.tracks)}
+        self.up_next = deque(path for path in self.up_next if path in self.ids)
+        self.reorder()
+
+    def add(self, tracks):
+        for path in tracks:
+            if path not in self.ids:
+                self.ids[path] = len(self.tracks)
+                self.tracks.append(path)
+        self.reorder()
+
+    def reorder(self):
+        self.shuffle = Shuffle(len(self.tracks), self.seed) if self.shuffled and self.tracks else None
+        if self.current in self.ids:
+            if not self.queued:
+                self.position = self.position_of(self.current)
+        else:
+            self.current = None
+            self.queued = False
+            self.position = min(self.position, max(len(self.tracks) - 1, 0))
+
+    # --- Moving ---
+    def current_path(self):
+        if self.current is None and self.tracks:
+            self.current = self.order(self.position)
+        return self.current
+
+    def peek(self, step):
+        """Path next() (step 1) or previous() (step -1) would move to"""
+        if not self.tracks:
+            return None
+        if step > 0 and self.up_next:
+            return self.up_next[0]
+        if step < 0 and self.queued:
+            return self.order(self.position)
+        return self.order(self.position + step)
+
+    def next(self):
+        if self.up_next:
+            self.current = self.up_next.popleft()
+            self.queued = True
+        elif self.tracks:
+            self.position = (self.position + 1) % len(self.tracks)
+            self.current = self.order(self.position)
+            self.queued = False
+        return self.current
+
+    def previous(self):
+        if not self.tracks:
+            return None
+        if self.queued:
+            self.queued = False
+        else:
+            self.position = (self.position - 1) % len(self.tracks)
+        self.current = self.order(self.position)
+        return self.current
+
+    def jump(self, path):
+        self.position = self.position_of(path)
+        self.current = path
+        self.queued = False
+        return path
+
+    def enqueue(self, path):
+        self.up_next.append(path)
+
+    def set_shuffle(self, enabled, seed=None):
+        if seed is not None:
+            self.seed = seed
+        elif self.seed is None:
+            self.seed = random.getrandbits(32)  # kept, so shuffle off and on again gives the same order
+        self.current_path()
+        self.shuffled = enabled
+        self.reorder()
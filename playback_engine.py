@@ -0,0 +1,176 @@
+import time
+from collections import deque
+from PyQt5.QtCore import QObject, QUrl, pyqtSignal
+
+from lazy_import import lazy_import
+
+# Only imported once something is actually played
+QtMultimedia = lazy_import("PyQt5.QtMultimedia")
+
+# Track switch latencies kept for stats()
+LATENCY_HISTORY = 100
+
+
+class PlaybackEngine(QObject):
+    """Plays a PlayQueue with its next and previous tracks already opened.
+
+    Three QMediaPlayers take turns: the active one, and one standby each for
+    the next and the previous track. A standby gets its media as soon as its
+    track becomes a neighbour and is paused at the start, which makes the
+    backend open the file and start the decoder. A skip or the end of a
+    track then only calls play() on the standby. The player that was active
+    is parked at its start as the standby in the other direction, and the
+    one left over opens the new neighbour.
+
+    Every switch is timed from the request until the new player plays with
+    its media loaded; stats() reports the recent latencies.
+    """
+
+    track_changed = pyqtSignal(str)  # path
+    playing_changed = pyqtSignal(bool)
+
+    def __init__(self, queue, parent=None):
+        super().__init__(parent)
+        self.queue = queue
+        self.volume = 100
+        self.players = []
+        for _ in range(3):
+            player = QtMultimedia.QMediaPlayer(self)
+            player.stateChanged.connect(lambda state, player=player: self.state_changed(player))
+            player.mediaStatusChanged.connect(lambda status, player=player: self.status_changed(player, status))
+            self.players.append(player)
+        self.active = self.players[0]
+        self.loaded = {}  # player -> path of the media it holds
+        self.switch_started = None
+        self.switch_cold = False
+        self.latencies = deque(maxlen=LATENCY_HISTORY)  # (ms, preloaded)
+
+    # --- Transport ---
+    def is_playing(self):
+        return self.active.state() == QtMultimedia.QMediaPlayer.PlayingState
+
+    def play(self, path=None, position=0):
+        """Play path, or resume the current track; position (ms) where a track starts"""
+        if path is not None:
+            self.switch_to(self.queue.jump(path), position)
+        elif self.queue.current_path() is not None:
+            if self.loaded.get(self.active) == self.queue.current_path():
+                self.active.play()
+            else:
+                self.switch_to(self.queue.current_path(), position)
+
+    def position(self):
+        """Position of the current track in ms"""
+        return self.active.position()
+
+    def pause(self):
+        self.active.pause()
+
+    def next(self):
+        path = self.queue.next()
+        if path is not None:
+            self.switch_to(path)
+
+    def previous(self):
+        path = self.queue.previous()
+        if path is not None:
+            self.switch_to(path)
+
+    def set_volume(self, volume):
+        self.volume = volume
+        for player in self.players:
+            player.setVolume(volume)
+
+    # --- Switching ---
+    def switch_to(self, path, position=0):
+        self.switch_started = time.perf_counter()
+        previous = self.active
+        ready = [player for player in self.players if self.loaded.get(player) == path]
+        if ready:
+            self.active = ready[0]
+            self.switch_cold = False
+        else:
+            # a jump: open it in a player whose track is not a neighbour
+            keep = (self.queue.peek(1), self.queue.peek(-1))
+            free = [player for player in self.players if self.loaded.get(player) not in keep]
+            self.active = previous if previous in free else free[0]
+            self.switch_cold = True
+            self.load(self.active, path)
+        if previous is not self.active:
+            self.park(previous)
+        self.active.setPosition(position)  # standbys are parked at 0, a resume seeks
+        self.active.play()
+        self.track_changed.emit(path)
+        self.preload()
+
+    def spare(self, keep):
+        """A player that is not active and holds none of the paths in keep"""
+        for player in self.players:
+            if player is not self.active and self.loaded.get(player) not in keep:
+                return player
+        return next(player for player in self.players if player is not self.active)
+
+    def load(self, player, path):
+        player.setMedia(QtMultimedia.QMediaContent(QUrl.fromLocalFile(path)))
+        player.setVolume(self.volume)
+        self.loaded[player] = path
+
+    def park(self, player):
+        # paused, not stopped: stop() would let the backend close the file again
+        player.pause()
+        player.setPosition(0)
+
+    def preload(self):
+        """Open the queue's next and previous tracks in the standby players.
+
+        Called again whenever the queue changed, e.g. shuffle or up next.
+        """
+        current = self.queue.current_path()
+        if current is None:
+            return
+        wanted = [self.queue.peek(1), self.queue.peek(-1)]
+        keep = [current] + wanted
+        for path in wanted:
+            if path == current or path in self.loaded.values():
+                continue
+            player = self.spare(keep)
+            if player is self.active or self.loaded.get(player) in keep:
+                continue  # fewer players than distinct neighbours
+            self.load(player, path)
+            self.park(player)
+
+    # --- Player signals ---
+    def state_changed(self, player):
+        if player is self.active:
+            self.playing_changed.emit(self.is_playing())
+            self.check_switched()
+
+    def status_changed(self, player, status):
+        if player is not self.active:
+            return
+        if status == QtMultimedia.QMediaPlayer.EndOfMedia:
+            self.next()  # the next track is already open
+        else:
+            self.check_switched()
+
+    def check_switched(self):
+        if self.switch_started is None or not self.is_playing():
+            return
+        if self.active.mediaStatus() not in (QtMultimedia.QMediaPlayer.LoadedMedia,
+                                             QtMultimedia.QMediaPlayer.BufferingMedia,
+                                             QtMultimedia.QMediaPlayer.BufferedMedia):
+            return
+        elapsed = (time.perf_counter() - self.switch_started) * 1000
+        self.latencies.append((elapsed, not self.switch_cold))
+        self.switch_started = None
+
+    def stats(self):
+        """Recent track switch latencies in ms, split by preloaded and cold"""
+        preloaded = sorted(ms for ms, warm in self.latencies if warm)
+        cold = sorted(ms for ms, warm in self.latencies if not warm)
+        return {
+            "switches": len(self.latencies),
+            "preloaded_median_ms": round(preloaded[len(preloaded) // 2], 3) if preloaded else None,
+            "cold_median_ms": round(cold[len(cold) // 2], 3) if cold else None,
+            "last_ms": round(self.latencies[-1][0], 3) if self.latencies else None,
+        }
@@ -0,0 +1,56 @@
+import json
+import os
+
+import app_paths
+
+
+STATE_NAME = "playback_state.json"
+
+# While playing, the position is saved this often
+CHECKPOINT_MS = 5000
+# Changes (track, pause, volume, queue) are saved after this quiet period,
+# so dragging the volume slider writes once
+SAVE_DELAY_MS = 500
+
+DEFAULTS = {
+    "track": None,        # path of the current track
+    "position_ms": 0,
+    "playing": True,
+    "volume": 50,
+    "up_next": [],
+    "shuffle": False,
+    "seed": None,         # shuffle seed, the same order comes back
+}
+
+
+def state_path():
+    return app_paths.data_path(STATE_NAME)
+
+
+def load(path=None):
+    """The saved playback state, DEFAULTS for whatever is missing or unreadable"""
+    path = path or state_path()
+    state = dict(DEFAULTS)
+    if not os.path.exists(path):
+        return state
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read playback state {path}: {e}")
+        return state
+    if isinstance(saved, dict):
+        state.update((key, value) for key, value in saved.items() if key in DEFAULTS)
+    return state
+
+
+def save(state, path=None):
+    """Write state; a crash mid-write leaves the previous checkpoint in place"""
+    path = path or state_path()
+    temporary = path + ".tmp"
+    try:
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, path)
+    except OSError as e:
+        print(f"Could not save playback state {path}: {e}")
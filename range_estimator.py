@@ -0,0 +1,68 @@
+import math
+
+
+# Usable energy of the full pack: 10S, 10 Ah
+PACK_WH = 360.0
+
+# Consumption assumed before the ride has shown its own, and how many
+# kilometres of riding it is worth against the measured windows
+DEFAULT_WH_PER_KM = 12.0
+PRIOR_KM = 3.0
+
+# Rolling windows the consumption is measured over; the recent past counts
+# in both, so it weighs most. Shorter windows follow single hills and make
+# the range swing.
+WINDOWS_S = (600, 1800)
+
+# Time constant of the smoothing of the shown range
+SMOOTHING_S = 20.0
+
+
+class RangeEstimator:
+    """Range left from the state of charge and the recent consumption.
+
+    The energy and distance of the WINDOWS_S windows are read from the
+    ride's telemetry_history.History once a second, so there is one record
+    of what the ride used. History keeps both as running totals per sample,
+    so a window is the total now minus the one at its start, and a query
+    costs the same for 10 minutes as for 10 seconds. Their consumption, Wh
+    per km, is pooled with DEFAULT_WH_PER_KM weighted as PRIOR_KM of riding,
+    and the remaining energy over it is smoothed exponentially.
+    """
+
+    def __init__(self, history, pack_wh=PACK_WH):
+        self.history = history
+        self.pack_wh = pack_wh
+        self.second = None
+        self.soc = None
+        self.estimate = None
+        self.wh_per_km = DEFAULT_WH_PER_KM
+
+    def update(self, time, soc):
+        """Take soc for the sample history got at time, monotonic seconds; the range in km"""
+        self.soc = soc
+        second = int(time)
+        if second != self.second:
+            passed = 0 if self.second is None else max(1, second - self.second)
+            self.second = second
+            return self.estimate_range(passed)
+        return self.estimate
+
+    def consumption(self):
+        """Wh per km over the rolling windows, pooled with the prior"""
+        energy = sum(self.history.energy_wh(seconds) for seconds in WINDOWS_S)
+        distance = sum(self.history.distance_km(seconds) for seconds in WINDOWS_S)
+        return (energy + DEFAULT_WH_PER_KM * PRIOR_KM) / (distance + PRIOR_KM)
+
+    def estimate_range(self, seconds):
+        """Move the estimate towards the current target over seconds of smoothing"""
+        self.wh_per_km = max(self.consumption(), 1.0)
+        target = max(self.soc, 0.0) / 100 * self.pack_wh / self.wh_per_km
+        if self.estimate is None:
+            self.estimate = target
+        else:
+            self.estimate += (1 - math.exp(-seconds / SMOOTHING_S)) * (target - self.estimate)
+        return self.estimate
+
+    def stats(self):
+        return {"range_km": self.estimate, "wh_per_km": round(self.wh_per_km, 2)}
@@ -0,0 +1,113 @@
+import sys
+from PyQt5.QtWidgets import QApplication, QStackedWidget
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import QTimer
+
+import image_cache
+import startup_profile
+import telemetry
+import theme
+import warm_pool
+from script_loader import load_script
+
+
+# Screen name -> (script file, widget class)
+SCREENS = {
+    "home": ("home screen.py", "ClockWindow"),
+    "lock": ("lock screen.py", "LockScreen"),
+    "main menu": ("main menu.py", "InfotainmentUI"),
+    "control panel": ("control panel.py", "ControlCenter"),
+}
+
+# Delay before the screens that were not opened yet are built in the background
+# and the heavy screens (navigation, 3D viewer) get their warm workers
+PRELOAD_DELAY_MS = 1000
+
+
+class ScreenRouter(QStackedWidget):
+    """One full screen window that stacks every screen of the infotainment.
+
+    Screens are created the first time they are opened and then kept alive,
+    so switching between them is a single setCurrentWidget call instead of
+    starting a new Python process.
+    """
+
+    current = None  # the running router, used by navigate()
+
+    def __init__(self, screens=None):
+        super().__init__()
+        self.setWindowTitle("Infotainment")
+        self.screens = dict(SCREENS)
+        if screens:
+            self.screens.update(screens)
+        self.instances = {}
+        ScreenRouter.current = self
+
+    def screen(self, name):
+        """Return the screen widget, building it on first use"""
+        widget = self.instances.get(name)
+        if widget is None:
+            script, class_name = self.screens[name]
+            widget = getattr(load_script(script), class_name)()
+            self.addWidget(widget)
+            self.instances[name] = widget
+        return widget
+
+    def show_screen(self, name):
+        widget = self.screen(name)
+        self.setCurrentWidget(widget)
+        widget.setFocus()
+
+    def preload(self):
+        """Build the screens that were not opened yet, one per event loop turn.
+
+        Afterwards the backgrounds of the other theme are decoded, so a
+        day / night switch does not have to.
+        """
+        pending = [name for name in self.screens if name not in self.instances]
+        if pending:
+            self.screen(pending[0])
+            QTimer.singleShot(0, self.preload)
+        else:
+            image_cache.cache().warm(theme.manager().other_mode())
+
+
+def navigate(name):
+    """Switch the running router to another screen"""
+    router = ScreenRouter.current
+    if router is None:
+        print(f"No screen router running, cannot open {name}")
+        return False
+    router.show_screen(name)
+    return True
+
+
+def run(start="home", screens=None):
+    """Start the infotainment application on the given screen.
+
+    With --profile-startup a per-phase start-up breakdown is printed once the
+    first frame has been painted. --auto-theme follows the time of day (or the
+    light sensor) between day and night mode. ESP32 telemetry is read in the
+    background for the whole session.
+    """
+    profile = startup_profile.StartupProfile(start)
+    app = QApplication.instance() or QApplication(sys.argv)
+    app.setFont(QFont("Arial", 10))
+    theme.manager().set_auto(theme.AUTO_FLAG in sys.argv)
+    sensors = telemetry.telemetry()
+    sensors.light.connect(theme.manager().update_light)
+    sensors.start()
+    app.aboutToQuit.connect(sensors.stop)
+
+    router = ScreenRouter(screens)
+    with profile.phase("screen module imports"):
+        load_script(router.screens[start][0])
+    with profile.phase("widget construction"):
+        router.show_screen(start)
+    if startup_profile.enabled():
+        profile.watch_first_paint(router.currentWidget())
+    router.showFullScreen()
+    QTimer.singleShot(PRELOAD_DELAY_MS, router.preload)
+    QTimer.singleShot(PRELOAD_DELAY_MS, warm_pool.pool)
+    app.aboutToQuit.connect(warm_pool.shutdown)
+    return app.exec_()
@@ -0,0 +1,33 @@
+import importlib.util
+import os
+import sys
+
+# Folder holding the screen scripts ("home screen.py", "lock screen.py", ...)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def script_path(filename):
+    """Absolute path of a script shipped next to this file"""
+    return os.path.join(BASE_DIR, filename)
+
+
+def load_script(filename):
+    """Import a screen script as a module.
+
+    The screen scripts have spaces in their file names, so they cannot be
+    imported with a normal import statement. Each script is loaded once and
+    then reused from sys.modules.
+    """
+    name = os.path.splitext(filename)[0].strip().replace(" ", "_")
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.spec_from_file_location(name, script_path(filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        del sys.modules[name]
+        raise
+    return module
@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+FLAG = "--profile-startup"
+
+
+def enabled():
+    return FLAG in sys.argv
+
+
+def process_age():
+    """Seconds since this process was started (Linux only, 10 ms resolution)"""
+    try:
+        with open("/proc/self/stat") as f:
+            # the command name can contain spaces, the fields we need follow ")"
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+    started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    return max(0.0, uptime - started)
+
+
+class StartupProfile:
+    """Per-phase timing of one entry point, printed with --profile-startup"""
+
+    def __init__(self, name):
+        self.name = name
+        self.phases = []  # (phase, seconds)
+        age = process_age()
+        if age is not None:
+            # interpreter start-up and the module level imports of the entry point
+            self.phases.append(("imports (interpreter + PyQt5)", age))
+
+    def add(self, phase, seconds):
+        self.phases.append((phase, seconds))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def watch_first_paint(self, widget, done=None):
+        """Time from now until the widget finished painting its first frame"""
+        from PyQt5.QtCore import QObject, QEvent, QTimer
+
+        profile = self
+        start = time.perf_counter()
+
+        class FirstPaint(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint:
+                    widget.removeEventFilter(self)
+                    # the paint event is delivered after this filter returns
+                    QTimer.singleShot(0, finish)
+                return False
+
+        def finish():
+            profile.add("first paint", time.perf_counter() - start)
+            profile.report()
+            if done:
+                done()
+
+        self._filter = FirstPaint()
+        widget.installEventFilter(self._filter)
+
+    def report(self):
+        total = 0.0
+        print(f"Startup profile: {self.name}")
+        for phase, seconds in self.phases:
+            total += seconds
+            print(f"  {phase:<32}{seconds * 1000:9.1f} ms")
+
+        from lazy_import import import_times
+        for module, seconds in import_times.items():
+            print(f"  {'lazy import ' + module:<32}{seconds * 1000:9.1f} ms")
+        print(f"  {'total':<32}{total * 1000:9.1f} ms")
+
+        image_cache = sys.modules.get("image_cache")
+        if image_cache is not None:
+            print(f"  image cache: {image_cache.cache().stats()}")
+        icon_registry = sys.modules.get("icon_registry")
+        if icon_registry is not None and icon_registry._registry is not None:
+            print(f"  icon registry: {icon_registry._registry.stats()}")
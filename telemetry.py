@@ -0,0 +1,259 @@
+import os
+import select
+import termios
+import threading
+from collections import defaultdict
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, pyqtSignal
+
+import battery_soc
+import range_estimator
+import telemetry_history
+import telemetry_protocol
+import tick_scheduler
+from telemetry_history import COLUMN
+from telemetry_protocol import SAMPLE, SAMPLE_FIELDS, SAMPLE_FRAME
+
+
+# The ESP32 shows up as a USB CDC ACM device; override for a simulator pty
+DEFAULT_PORT = "/dev/ttyACM0"
+PORT_ENV = "INFOTAINMENT_TELEMETRY_PORT"
+BAUD_RATE = termios.B115200
+
+# Seconds between attempts to open a missing or unplugged port
+RECONNECT_S = 2.0
+# Longest wait for data before the reader checks whether it should stop
+POLL_S = 0.5
+
+# Changed values reach the screens at most this often; samples in between
+# only replace the value waiting for the next flush
+UI_FPS = 30
+
+
+def open_port(path):
+    """File descriptor of the serial port at path, raw 8N1 at BAUD_RATE"""
+    fd = os.open(path, os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK)
+    try:
+        attributes = termios.tcgetattr(fd)
+        iflag, oflag, cflag, lflag, _, _, cc = attributes
+        iflag &= ~(termios.IGNBRK | termios.BRKINT | termios.PARMRK | termios.ISTRIP
+                   | termios.INLCR | termios.IGNCR | termios.ICRNL | termios.IXON)
+        oflag &= ~termios.OPOST
+        lflag &= ~(termios.ECHO | termios.ECHONL | termios.ICANON | termios.ISIG | termios.IEXTEN)
+        cflag = (cflag & ~(termios.CSIZE | termios.PARENB)) | termios.CS8 | termios.CREAD | termios.CLOCAL
+        termios.tcsetattr(fd, termios.TCSANOW, [iflag, oflag, cflag, lflag, BAUD_RATE, BAUD_RATE, cc])
+    except termios.error:
+        pass  # not a terminal, e.g. a FIFO in a test
+    return fd
+
+
+class Telemetry(QObject):
+    """Sensor values from the ESP32, read off the UI thread.
+
+    A daemon thread opens the serial port, waits for data with select() and
+    reads it into a telemetry_protocol.FrameDecoder. Each sample frame is
+    timed by its own time_ms (a telemetry_protocol.DeviceClock) and added to
+    history, a telemetry_history.History of the whole ride, to the
+    battery_soc.SocEstimator behind soc and to the
+    range_estimator.RangeEstimator behind range_estimate_km. A copy of the
+    estimator's state is taken under lock after every sample; the UI thread
+    checkpoints that copy, and stop() saves it once the reader has ended.
+    Fields that changed are put in pending, the latest value per channel,
+    and the UI thread is woken once per batch. It flushes pending at most
+    fps times a second, on the tick scheduler: one typed signal per changed
+    channel, scaled to float. A value replaced before it was flushed counts
+    as merged. show_text() binds a label to a channel and sets the text only
+    when the formatted text changed. A missing or unplugged port is retried
+    every RECONNECT_S.
+    """
+
+    battery = pyqtSignal(float)
+    voltage = pyqtSignal(float)
+    current = pyqtSignal(float)
+    speed_kmh = pyqtSignal(float)
+    trip_km = pyqtSignal(float)
+    range_km = pyqtSignal(float)
+    light = pyqtSignal(float)
+    soc = pyqtSignal(float)                # filtered state of charge, %
+    range_estimate_km = pyqtSignal(float)
+    connected = pyqtSignal(bool)
+    wake = pyqtSignal()  # from the reader thread, queued to flush_soon
+
+    def __init__(self, port=None, fps=UI_FPS):
+        super().__init__()
+        self.port = port or os.environ.get(PORT_ENV) or DEFAULT_PORT
+        self.frame_ms = 1000 / fps
+        self.history = telemetry_history.History()
+        self.soc_estimator = battery_soc.SocEstimator(battery_soc.load())
+        self.range_estimator = range_estimator.RangeEstimator(self.history)
+        self.latest = {}
+        if self.soc_estimator.soc is not None:
+            self.latest["soc"] = round(self.soc_estimator.soc, 1)  # the ring is right before the first sample
+        self.previous = None  # raw values of the last sample
+        self.stopping = threading.Event()
+        self.thread = None
+        self.decoder = telemetry_protocol.FrameDecoder()
+        self.clock = telemetry_protocol.DeviceClock()
+        self.frames = 0
+        self.bad_frames = 0
+        self.connections = 0
+
+        self.lock = threading.Lock()
+        self.soc_state = None      # the estimator's state after the last sample, for saving
+        self.pending = {}          # name -> latest value not flushed yet
+        self.woken = False         # a wake is on its way or a flush is scheduled
+        self.last_flush_ms = 0.0
+        self.text_bindings = defaultdict(list)  # name -> [[template, setter, owner, shown text]]
+        self.updates = 0           # changed values from the reader
+        self.merged = 0            # replaced before a flush
+        self.flushes = 0
+        self.emitted = 0
+        self.texts_set = 0
+        self.texts_unchanged = 0
+        self.wake.connect(self.flush_soon)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="telemetry", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(RECONNECT_S)  # the reader notices within POLL_S
+        with self.lock:
+            state = self.soc_state
+        if state is not None:
+            battery_soc.save(state)
+
+    def run(self):
+        reported = False
+        while not self.stopping.is_set():
+            try:
+                fd = open_port(self.port)
+            except OSError as e:
+                if not reported:
+                    print(f"Telemetry port {self.port} not available: {e}")
+                    reported = True
+                self.stopping.wait(RECONNECT_S)
+                continue
+            reported = False
+            self.connections += 1
+            self.connected.emit(True)
+            try:
+                self.read(fd)
+            finally:
+                os.close(fd)
+                self.connected.emit(False)
+
+    def read(self, fd):
+        self.decoder.reset()  # drop a partial frame of the last connection
+        self.clock.restart()
+        while not self.stopping.is_set():
+            ready, _, _ = select.select([fd], [], [], POLL_S)
+            if not ready:
+                continue
+            try:
+                if not self.decoder.readinto(fd):
+                    return
+            except BlockingIOError:
+                continue
+            except OSError:
+                return  # unplugged
+            self.decoder.decode(self.handle)
+
+    def handle(self, frame_type, offset, length):
+        if frame_type != SAMPLE_FRAME or length != SAMPLE.size:
+            self.bad_frames += 1  # a frame a newer firmware sends
+            return
+        values = SAMPLE.unpack_from(self.decoder.buffer, offset)
+        self.frames += 1
+        now = self.clock.time(values[0])
+        row = self.history.append(now, values[1:])
+        soc = self.soc_estimator.update(now, float(row[COLUMN["voltage"]]), float(row[COLUMN["current"]]))
+        estimate = self.range_estimator.update(now, soc)
+        previous = self.previous or (None,) * len(values)
+        self.previous = values
+        wake = False
+        with self.lock:
+            # skip time_ms, it changes with every frame
+            for (name, scale), value, old in zip(SAMPLE_FIELDS[1:], values[1:], previous[1:]):
+                if value != old:
+                    self.put(name, value * scale)
+            for name, value in (("soc", round(soc, 1)), ("range_estimate_km", round(estimate, 1))):
+                if value != self.latest.get(name):
+                    self.put(name, value)
+            self.soc_state = self.soc_estimator.state()
+            if self.pending and not self.woken:
+                self.woken = wake = True
+        if wake:
+            self.wake.emit()
+
+    def put(self, name, value):
+        """Make value the latest of name, for the next flush; called with lock held"""
+        self.latest[name] = value
+        self.updates += 1
+        if name in self.pending:
+            self.merged += 1
+        self.pending[name] = value
+
+    # --- UI side ---
+    def flush_soon(self):
+        delay = self.last_flush_ms + self.frame_ms - tick_scheduler.monotonic_ms()
+        tick_scheduler.scheduler().call_later("telemetry flush", max(0, delay), self.flush, self)
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.woken = False
+            soc_state = self.soc_state
+        self.last_flush_ms = tick_scheduler.monotonic_ms()
+        self.flushes += 1
+        for name, value in pending.items():
+            self.emitted += 1
+            getattr(self, name).emit(value)
+            for binding in self.text_bindings.get(name, ()):
+                self.show(binding, value)
+        self.soc_estimator.checkpoint(soc_state)
+
+    def show_text(self, name, template, setter, owner=None):
+        """Call setter(template.format(value)) with name's values while owner lives"""
+        binding = [template, setter, owner, None]
+        self.text_bindings[name].append(binding)
+        if name in self.latest:
+            self.show(binding, self.latest[name])
+
+    def show(self, binding, value):
+        template, setter, owner, shown = binding
+        if owner is not None and sip.isdeleted(owner):
+            for bindings in self.text_bindings.values():
+                if binding in bindings:
+                    bindings.remove(binding)
+            return
+        text = template.format(value)
+        if text == shown:
+            self.texts_unchanged += 1
+            return
+        binding[3] = text
+        self.texts_set += 1
+        setter(text)
+
+    def stats(self):
+        return {"port": self.port, "frames": self.frames, "bad_frames": self.bad_frames,
+                "crc_errors": self.decoder.crc_errors,
+                "length_errors": self.decoder.length_errors, "skipped_bytes": self.decoder.skipped_bytes,
+                "connections": self.connections,
+                "clock_restarts": self.clock.restarts, "updates": self.updates, "merged": self.merged,
+                "flushes": self.flushes, "emitted": self.emitted, "texts_set": self.texts_set,
+                "texts_unchanged": self.texts_unchanged, "latest": dict(self.latest)}
+
+
+_telemetry = None
+
+
+def telemetry():
+    """The ESP32 telemetry shared by all screens"""
+    global _telemetry
+    if _telemetry is None:
+        _telemetry = Telemetry()
+    return _telemetry
@@ -0,0 +1,218 @@
+import threading
+
+import numpy as np
+
+from telemetry_protocol import SAMPLE_FIELDS
+
+
+# Columns of every tier: the sample's readings, the power they imply and
+# the energy and distance of the whole history up to the sample
+CHANNELS = tuple(name for name, _ in SAMPLE_FIELDS[1:]) + ("power_w", "energy_wh", "distance_km")
+COLUMN = {name: column for column, name in enumerate(CHANNELS)}
+SCALES = np.array([scale for _, scale in SAMPLE_FIELDS[1:]])
+READINGS = len(SCALES)
+
+# Rows per tier: raw samples (a minute and a half at 200 Hz), one mean per
+# second for an hour and one mean per minute for a day. About 1 MB in total,
+# whatever the length of the ride.
+RAW_ROWS = 16384
+SECOND_ROWS = 3600
+MINUTE_ROWS = 1440
+
+# A longer gap between samples is a disconnect, not time spent riding
+MAX_GAP_S = 2.0
+
+
+class Ring:
+    """Fixed-size ring of timestamped rows, one float32 column per channel.
+
+    Rows further apart than max_gap_s belong to different rides.
+    """
+
+    def __init__(self, rows, max_gap_s, columns=len(CHANNELS)):
+        self.max_gap_s = max_gap_s
+        self.times = np.zeros(rows)
+        self.values = np.zeros((rows, columns), np.float32)
+        self.head = 0    # next row to write
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, time, row):
+        self.times[self.head] = time
+        self.values[self.head] = row
+        self.head = (self.head + 1) % len(self.times)
+        self.count = min(self.count + 1, len(self.times))
+
+    def oldest(self):
+        return self.times[(self.head - self.count) % len(self.times)] if self.count else None
+
+    def segments(self):
+        """(first, last) row ranges in time order"""
+        if self.count < len(self.times):
+            return ((0, self.count),)
+        return ((self.head, len(self.times)), (0, self.head))
+
+    def since(self, start):
+        """(times, values) of the rows at or after start, oldest first, as copies"""
+        times, values = [], []
+        for first, last in self.segments():
+            first += int(np.searchsorted(self.times[first:last], start))
+            times.append(self.times[first:last])
+            values.append(self.values[first:last])
+        return np.concatenate(times), np.concatenate(values)
+
+    def first_since(self, start):
+        """The oldest row at or after start, a view; None if there is none"""
+        for first, last in self.segments():
+            row = first + int(np.searchsorted(self.times[first:last], start))
+            if row < last:
+                return self.values[row]
+        return None
+
+    @property
+    def nbytes(self):
+        return self.times.nbytes + self.values.nbytes
+
+
+class Bucket:
+    """Running sum of the rows of one period, appended to a Ring as their mean"""
+
+    def __init__(self, period_s, ring):
+        self.period_s = period_s
+        self.ring = ring
+        self.sum = np.zeros(ring.values.shape[1])
+        self.count = 0
+        self.period = None
+
+    def add(self, time, row):
+        """Add row; the (time, mean) of the period it closed, or None"""
+        period = time // self.period_s
+        closed = None
+        if period != self.period and self.count:
+            closed = ((self.period + 1) * self.period_s, self.sum / self.count)
+            self.ring.append(*closed)
+            self.sum[:] = 0
+            self.count = 0
+        self.period = period
+        self.sum += row
+        self.count += 1
+        return closed
+
+
+class History:
+    """Telemetry of the ride in fixed memory, at three resolutions.
+
+    Samples go into the raw tier; every full second their mean goes into
+    the second tier and every full minute the mean of those seconds into
+    the minute tier. A window query reads the finest tier that still
+    reaches back far enough and works on whole NumPy columns. Energy and
+    the positive steps of the trip counter are also added up per sample,
+    into running totals stored with every row, so energy_wh() and
+    distance_km() over a window are the current total minus the one at the
+    window's start: a binary search in one tier, however long the window.
+    energy_wh() over distance_km() is the consumption the range estimator
+    reads. append() is called by the telemetry reader thread, queries come
+    from the UI thread.
+    """
+
+    def __init__(self, raw_rows=RAW_ROWS, second_rows=SECOND_ROWS, minute_rows=MINUTE_ROWS):
+        self.raw = Ring(raw_rows, MAX_GAP_S)
+        self.seconds = Ring(second_rows, 1 + MAX_GAP_S)
+        self.minutes = Ring(minute_rows, 60 + MAX_GAP_S)
+        self.second_bucket = Bucket(1, self.seconds)
+        self.minute_bucket = Bucket(60, self.minutes)
+        self.lock = threading.Lock()
+        self.row = np.zeros(len(CHANNELS))
+        self.last_time = None
+        self.trip_km = None
+        self.trip_energy_wh = 0.0
+        self.total_energy_wh = 0.0
+        self.total_km = 0.0
+
+    def append(self, time, raw):
+        """Add a sample: monotonic seconds and the raw SAMPLE values after time_ms.
+
+        Returns the scaled row with power, an array reused by the next append.
+        """
+        row = self.row
+        row[:READINGS] = raw
+        row[:READINGS] *= SCALES
+        power = row[COLUMN["power_w"]] = row[COLUMN["voltage"]] * row[COLUMN["current"]]
+        trip_km = float(row[COLUMN["trip_km"]])
+        with self.lock:
+            if self.trip_km is not None and trip_km < self.trip_km:
+                self.trip_energy_wh = 0.0  # the trip was reset on the ESP32
+            elif self.trip_km is not None:
+                self.total_km += trip_km - self.trip_km  # a reset counter's step down is not ridden
+            self.trip_km = trip_km
+            if self.last_time is not None and 0 < time - self.last_time <= MAX_GAP_S:
+                energy = float(power) * (time - self.last_time) / 3600
+                self.trip_energy_wh += energy
+                self.total_energy_wh += energy
+            self.last_time = time
+            row[COLUMN["energy_wh"]] = self.total_energy_wh
+            row[COLUMN["distance_km"]] = self.total_km
+            self.raw.append(time, row)
+            second = self.second_bucket.add(time, row)
+            if second is not None:
+                self.minute_bucket.add(*second)
+        return row
+
+    def tier(self, start):
+        """The finest tier that has rows from before start, else the one reaching back furthest"""
+        for ring in (self.raw, self.seconds, self.minutes):
+            if ring.count and ring.oldest() <= start:
+                return ring
+        return min((ring for ring in (self.raw, self.seconds, self.minutes) if ring.count),
+                   key=Ring.oldest, default=self.raw)
+
+    def window(self, channel, seconds):
+        """(times, values) of channel over the last seconds, from the finest tier covering them"""
+        return self.window_of(channel, seconds)[1:]
+
+    def window_of(self, channel, seconds):
+        with self.lock:
+            if self.last_time is None:
+                return self.raw, np.zeros(0), np.zeros(0, np.float32)
+            start = self.last_time - seconds
+            ring = self.tier(start)
+            times, values = ring.since(start)
+        return ring, times, values[:, COLUMN[channel]]
+
+    def mean(self, channel, seconds):
+        """Average of channel over the last seconds; None without data"""
+        _, values = self.window(channel, seconds)
+        return float(values.mean()) if len(values) else None
+
+    def average_speed(self, minutes):
+        return self.mean("speed_kmh", minutes * 60)
+
+    def growth(self, channel, seconds):
+        """How much the running total in channel grew over the last seconds"""
+        column = COLUMN[channel]
+        with self.lock:
+            if self.last_time is None:
+                return 0.0
+            start = self.last_time - seconds
+            row = self.tier(start).first_since(start)
+            if row is None:
+                return 0.0
+            latest = self.raw.values[self.raw.head - 1, column]
+            return max(float(latest) - float(row[column]), 0.0)
+
+    def energy_wh(self, seconds=None):
+        """Energy drawn over the last seconds, or over the trip when seconds is None"""
+        if seconds is None:
+            return self.trip_energy_wh
+        return self.growth("energy_wh", seconds)
+
+    def distance_km(self, seconds):
+        """Distance ridden over the last seconds, from the trip counter's steps"""
+        return self.growth("distance_km", seconds)
+
+    def stats(self):
+        return {"raw": len(self.raw), "seconds": len(self.seconds), "minutes": len(self.minutes),
+                "bytes": self.raw.nbytes + self.seconds.nbytes + self.minutes.nbytes,
+                "trip_energy_wh": round(self.trip_energy_wh, 3)}
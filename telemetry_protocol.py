@@ -0,0 +1,168 @@
+import binascii
+import os
+import struct
+import time
+
+
+# Frame: sync word, payload length, frame type, payload, CRC-16/CCITT
+# (crc_hqx, initial value 0xFFFF) over length, type and payload. All
+# integers are little endian, as the ESP32 stores them.
+SYNC = b"\xaa\x55"
+HEADER = struct.Struct("<2sBB")
+CRC = struct.Struct("<H")
+CRC_INIT = 0xFFFF
+MAX_PAYLOAD = 64
+MIN_FRAME = HEADER.size + CRC.size
+
+# Frame types
+SAMPLE_FRAME = 1
+
+# Sensor sample: ESP32 uptime in ms, then the readings as scaled integers
+SAMPLE = struct.Struct("<IHHhHIHH")
+# (name, scale) in payload order; name is also the Telemetry signal
+SAMPLE_FIELDS = (
+    ("time_ms", 1),
+    ("battery", 0.01),     # state of charge, %
+    ("voltage", 0.001),    # pack voltage, V
+    ("current", 0.01),     # pack current, A, positive while discharging
+    ("speed_kmh", 0.01),
+    ("trip_km", 0.001),
+    ("range_km", 0.1),
+    ("light", 1.0),        # ambient light, lux
+)
+
+# Room for several reads' worth of frames at 200 Hz
+RECEIVE_BUFFER = 4096
+
+# The ESP32's uptime counter wraps after 2^32 ms, about 49.7 days
+TIME_MS_WRAP = 1 << 32
+# Least time counted between the last frame before a reconnect or reboot and
+# the first one after; longer than any MAX_GAP_S, so it reads as a disconnect
+RESTART_GAP_S = 5.0
+
+
+def encode_frame(frame_type, payload):
+    body = HEADER.pack(SYNC, len(payload), frame_type)[len(SYNC):] + payload
+    return SYNC + body + CRC.pack(binascii.crc_hqx(body, CRC_INIT))
+
+
+def encode_sample(**values):
+    """Sample frame of readings in the units of SAMPLE_FIELDS; missing ones are 0"""
+    raw = [round(values.get(name, 0) / scale) for name, scale in SAMPLE_FIELDS]
+    return encode_frame(SAMPLE_FRAME, SAMPLE.pack(*raw))
+
+
+class FrameDecoder:
+    """Splits a byte stream into frames inside one reusable receive buffer.
+
+    Reads land directly in the buffer (readinto) and decode() walks it in
+    place: the header and CRC are read with unpack_from and the CRC is
+    computed over a memoryview, so no frame is copied. on_frame gets the
+    frame type and the payload's offset and length in buffer, to unpack
+    from there. Bytes before a sync word, frames with a bad length and
+    frames failing the CRC are skipped by searching for the next sync
+    word, which recovers from dropped and corrupted bytes.
+    """
+
+    def __init__(self, size=RECEIVE_BUFFER):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.start = 0   # first byte not decoded yet
+        self.end = 0     # end of the received bytes
+        self.frames = 0
+        self.crc_errors = 0
+        self.length_errors = 0
+        self.skipped_bytes = 0
+
+    def reset(self):
+        """Drop the received bytes, e.g. a partial frame of a closed connection"""
+        self.start = self.end = 0
+
+    def compact(self):
+        """Move the undecoded tail to the front of the buffer"""
+        if self.start:
+            pending = self.end - self.start
+            self.view[:pending] = self.view[self.start:self.end]
+            self.start, self.end = 0, pending
+
+    def readinto(self, fd):
+        """Read what fd has into the free space; bytes read, 0 at end of file"""
+        self.compact()
+        count = os.readv(fd, [self.view[self.end:]])
+        self.end += count
+        return count
+
+    def feed(self, data):
+        """Copy data into the free space; the number of bytes taken"""
+        self.compact()
+        count = min(len(data), len(self.buffer) - self.end)
+        self.view[self.end:self.end + count] = data[:count]
+        self.end += count
+        return count
+
+    def decode(self, on_frame):
+        buffer = self.buffer
+        position, end = self.start, self.end
+        while end - position >= MIN_FRAME:
+            if buffer[position] != 0xAA or buffer[position + 1] != 0x55:
+                found = buffer.find(SYNC, position + 1, end)
+                if found < 0:
+                    found = end - 1  # the last byte may start a sync word
+                self.skipped_bytes += found - position
+                position = found
+                continue
+            length = buffer[position + 2]
+            crc_at = position + HEADER.size + length
+            if length > MAX_PAYLOAD:
+                self.length_errors += 1
+                position += 1
+                continue
+            if crc_at + CRC.size > end:
+                break  # the rest of the frame is still on the wire
+            if binascii.crc_hqx(self.view[position + 2:crc_at], CRC_INIT) != CRC.unpack_from(buffer, crc_at)[0]:
+                self.crc_errors += 1
+                position += 1
+                continue
+            self.frames += 1
+            on_frame(buffer[position + 3], position + HEADER.size, length)
+            position = crc_at + CRC.size
+        self.start = position
+        if self.start == self.end:
+            self.start = self.end = 0
+
+
+class DeviceClock:
+    """Sample times in seconds from the frames' time_ms, as one increasing clock.
+
+    Times come from the ESP32's uptime counter, not from when the frames
+    arrived, so frames read in one burst keep their spacing and a simulator
+    running faster than real time counts its own seconds. The counter's
+    wrap is unwrapped. After restart() (a reconnect) or when time_ms goes
+    back (a rebooted ESP32) the clock moves on by the host's time since the
+    last frame, at least RESTART_GAP_S.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.last_ms = None
+        self.last_host = None
+        self.restarted = False
+        self.restarts = 0
+
+    def restart(self):
+        """The next frame may come from a rebooted ESP32"""
+        self.restarted = True
+
+    def time(self, time_ms, host=None):
+        """Seconds of the frame with time_ms; host is time.monotonic() when it arrived"""
+        host = time.monotonic() if host is None else host
+        if self.last_ms is not None:
+            step_ms = (time_ms - self.last_ms) % TIME_MS_WRAP
+            if self.restarted or step_ms >= TIME_MS_WRAP // 2:
+                self.restarts += 1
+                self.seconds += max(host - self.last_host, RESTART_GAP_S)
+            else:
+                self.seconds += step_ms / 1000
+        self.restarted = False
+        self.last_ms, self.last_host = time_ms, host
+        return self.seconds
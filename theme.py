@@ -0,0 +1,406 @@
+import re
+import time
+from PyQt5 import sip
+from PyQt5.QtCore import QEvent, QObject, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QWidget
+
+import tick_scheduler
+
+
+# Colours of each theme, the stylesheet template refers to them by name.
+# background_dim darkens the background photos (0 keeps them as they are).
+THEMES = {
+    "day": {
+        "panel_top": "#f0f8ff",
+        "panel_bottom": "#e6f3ff",
+        "panel_text": "#2f4f4f",
+        "menu_text": "black",
+        "frame_left": "#ffffff",
+        "frame_right": "#f0f8ff",
+        "frame_border": "#7fffd4",
+        "toggle_off": "#CFF9E8",
+        "toggle_on_top": "#ffffff",
+        "toggle_on_bottom": "#f8f8ff",
+        "toggle_border": "#48d1cc",
+        "toggle_text": "#CFF9E8",
+        "level_frame_left": "#ffffff",
+        "level_frame_right": "#CFF9E8",
+        "level_frame_border": "#7fffd4",
+        "groove_top": "#e0ffff",
+        "groove_bottom": "#b0e0e6",
+        "groove_border": "#48d1cc",
+        "handle_top": "#7fffd4",
+        "handle_bottom": "#40e0d0",
+        "handle_border": "#20b2aa",
+        "player_hover_top": "#98fb98",
+        "player_hover_bottom": "#7fffd4",
+        "player_border": "#48d1cc",
+        "glow": "#48d1cc",
+        "ring_top": "#c8f0ff",
+        "ring_bottom": "#c8ffdc",
+        "ring_track": "#dcdcdc",
+        "ring_text": "#000080",
+        "background_dim": 0.0,
+    },
+    "night": {
+        "panel_top": "#0b1622",
+        "panel_bottom": "#111d2b",
+        "panel_text": "#cfe8e4",
+        "menu_text": "#e8f4f2",
+        "frame_left": "#14222f",
+        "frame_right": "#182a38",
+        "frame_border": "#2a7f73",
+        "toggle_off": "#1e3a3c",
+        "toggle_on_top": "#3a8f86",
+        "toggle_on_bottom": "#2c766f",
+        "toggle_border": "#2a7f73",
+        "toggle_text": "#cfe8e4",
+        "level_frame_left": "#14222f",
+        "level_frame_right": "#1e3a3c",
+        "level_frame_border": "#2a7f73",
+        "groove_top": "#1b2b38",
+        "groove_bottom": "#22384a",
+        "groove_border": "#2a7f73",
+        "handle_top": "#3a8f86",
+        "handle_bottom": "#2c766f",
+        "handle_border": "#1f5f59",
+        "player_hover_top": "#4aa398",
+        "player_hover_bottom": "#3a8f86",
+        "player_border": "#2a7f73",
+        "glow": "#2a7f73",
+        "ring_top": "#14283a",
+        "ring_bottom": "#143a2e",
+        "ring_track": "#33424f",
+        "ring_text": "#cfe8e4",
+        "background_dim": 0.55,
+    },
+}
+
+DEFAULT_THEME = "day"
+
+# Automatic mode: night by the clock, or by the light sensor once it reports.
+# The lux thresholds differ so a reading around one of them cannot flicker.
+NIGHT_FROM_HOUR = 19
+DAY_FROM_HOUR = 6
+NIGHT_BELOW_LUX = 100
+DAY_ABOVE_LUX = 400
+
+# Start with the automatic mode on
+AUTO_FLAG = "--auto-theme"
+
+# Widgets opt in to a rule with setProperty("role", ...) before they are
+# shown. Toggles are checkable buttons styled by :checked, a pseudo-state Qt
+# resolves at paint time, so switching one needs neither a new sheet nor a
+# re-polish. The day rules are the template as it is; the night rules are the
+# same template, limited to screens whose "mode" property is "night" (see
+# stylesheet()). ThemeManager sets the combined sheet on the application once.
+STYLESHEET = """
+QWidget[role="control panel"] {{
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+        stop:0 {panel_top}, stop:1 {panel_bottom});
+}}
+QLabel[role="panel text"] {{
+    color: {panel_text};
+    background: transparent;
+}}
+QLabel[role="panel heading"] {{
+    color: {panel_text};
+    font-size: 14pt;
+    font-weight: bold;
+    background: transparent;
+}}
+QFrame[role="panel frame"] {{
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+        stop:0 {frame_left}, stop:1 {frame_right});
+    border-radius: 20px;
+    border: 2px solid {frame_border};
+}}
+QWidget[role="panel group"] {{
+    background: transparent;
+}}
+
+QPushButton[role="toggle"] {{
+    background: {toggle_off};
+    border-radius: 50px;
+    border: 2px solid {toggle_border};
+    color: {toggle_text};
+    font-weight: bold;
+    font-size: 14px;
+}}
+QPushButton[role="toggle"]:hover {{
+    border: 2px solid {toggle_off};
+}}
+QPushButton[role="toggle"]:checked {{
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+        stop:0 {toggle_on_top}, stop:1 {toggle_on_bottom});
+    border: 3px solid {toggle_off};
+}}
+
+QPushButton[role="play"], QPushButton[role="skip"] {{
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+        stop:0 {handle_top}, stop:1 {handle_bottom});
+    color: {panel_text};
+    border: 2px solid {player_border};
+}}
+QPushButton[role="play"] {{
+    border-radius: 60px;
+    border-width: 3px;
+}}
+QPushButton[role="skip"] {{
+    border-radius: 30px;
+}}
+QPushButton[role="play"]:hover, QPushButton[role="skip"]:hover {{
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+        stop:0 {player_hover_top}, stop:1 {player_hover_bottom});
+}}
+
+QLabel[role="album art"] {{
+    background: {toggle_off};
+    color: {panel_text};
+    border: 1px solid {player_border};
+    border-radius: 10px;
+}}
+
+QPushButton[role="skip"]:checked {{
+    background: {toggle_off};
+    border: 3px solid {panel_text};
+}}
+
+QLineEdit[role="music search"] {{
+    background: {toggle_off};
+    color: {panel_text};
+    border: 1px solid {player_border};
+    border-radius: 14px;
+    padding: 0 10px;
+}}
+QListWidget[role="music results"] {{
+    background: {frame_left};
+    color: {panel_text};
+    border: 1px solid {player_border};
+    border-radius: 10px;
+}}
+QListWidget[role="music results"]::item:selected {{
+    background: {toggle_off};
+    color: {panel_text};
+}}
+
+QPushButton[role="player small"] {{
+    background: {toggle_off};
+    color: {panel_text};
+    border: 1px solid {player_border};
+    border-radius: 12px;
+    font-size: 11px;
+}}
+
+QFrame[role="level frame"] {{
+    background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+        stop:0 {level_frame_left}, stop:1 {level_frame_right});
+    border-radius: 40px;
+    border: 2px solid {level_frame_border};
+}}
+QSlider[role="level"] {{
+    background: transparent;
+}}
+QSlider[role="level"]::groove:vertical {{
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+        stop:0 {groove_top}, stop:1 {groove_bottom});
+    width: 85px;
+    border-radius: 42px;
+    border: 1px solid {groove_border};
+}}
+QSlider[role="level"]::handle:vertical {{
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+        stop:0 {handle_top}, stop:1 {handle_bottom});
+    border: 2px solid {handle_border};
+    height: 40px;
+    margin: -10px 0;
+    border-radius: 25px;
+}}
+QSlider[role="level"]::sub-page:vertical {{
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
+        stop:0 {handle_top}, stop:1 {handle_bottom});
+    border-radius: 42px;
+}}
+
+QLabel[role="menu text"] {{
+    color: {menu_text};
+    background: transparent;
+}}
+QPushButton[role="menu button"] {{
+    font-size: 30px;
+    color: {menu_text};
+    background: transparent;
+    border: none;
+}}
+"""
+
+# Screen property the night rules select on
+MODE_PROPERTY = "mode"
+
+RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+
+_compiled = None
+
+
+def scoped(sheet, mode):
+    """sheet with every rule limited to a screen in mode and its children"""
+    condition = f'[{MODE_PROPERTY}="{mode}"]'
+    rules = []
+    for selectors, body in RULE.findall(sheet):
+        scoped_selectors = []
+        for selector in selectors.split(","):
+            selector = selector.strip()
+            state = selector.find(":")
+            if state < 0:
+                state = len(selector)
+            # the screen itself (the control panel has a rule), or a widget on it
+            scoped_selectors.append(selector[:state] + condition + selector[state:])
+            scoped_selectors.append(f"*{condition} {selector}")
+        rules.append(f"{', '.join(scoped_selectors)} {{{body}}}")
+    return "\n".join(rules)
+
+
+def stylesheet():
+    """The stylesheet of both themes, built once and set on the application.
+
+    The night rules come after the day rules and are more specific, so they
+    win on a screen whose mode property is "night"; everywhere else the day
+    rules apply.
+    """
+    global _compiled
+    if _compiled is None:
+        _compiled = STYLESHEET.format(**THEMES[DEFAULT_THEME])
+        for name, colors in THEMES.items():
+            if name != DEFAULT_THEME:
+                _compiled += scoped(STYLESHEET.format(**colors), name)
+    return _compiled
+
+
+def colors(name):
+    return THEMES[name]
+
+
+class ThemeManager(QObject):
+    """Day / night mode of the whole application.
+
+    One stylesheet holds both themes and is set on the application when the
+    first screen registers. Every screen registers itself; a switch sets the
+    mode property of each visible screen, re-polishes the screen and its
+    themed widgets (the ones with a role) and calls its callback, for what a
+    stylesheet cannot reach (background photos, custom painted widgets).
+    Hidden screens are only brought up to date when they are shown again, so
+    a switch restyles the widgets on screen and nothing else. switch_ms keeps
+    the duration of the last switch.
+    """
+
+    changed = pyqtSignal(str)
+
+    def __init__(self, mode=DEFAULT_THEME):
+        super().__init__()
+        self.mode = mode
+        self.auto = False
+        self.light_seen = False  # a light sensor reading overrides the clock
+        self.screens = {}        # name -> (screen widget, callback(mode) or None)
+        self.applied = {}        # name -> mode the screen shows
+        self.switches = 0
+        self.switch_ms = 0.0
+        self.installed = False
+        stylesheet()
+
+    def register(self, name, screen, callback=None):
+        """Style screen with the current theme and keep it following the mode"""
+        if not self.installed:
+            QApplication.instance().setStyleSheet(stylesheet())
+            self.installed = True
+        self.screens[name] = (screen, callback)
+        screen.installEventFilter(self)
+        self.apply(name)
+
+    def unregister(self, name):
+        self.screens.pop(name, None)
+        self.applied.pop(name, None)
+
+    def apply(self, name):
+        screen, callback = self.screens[name]
+        if self.applied.get(name) == self.mode:
+            return
+        self.applied[name] = self.mode
+        screen.setProperty(MODE_PROPERTY, self.mode)
+        themed = [screen] + [child for child in screen.findChildren(QWidget) if child.property("role")]
+        for widget in themed:
+            style = widget.style()
+            style.unpolish(widget)
+            style.polish(widget)
+            widget.update()
+        if callback is not None:
+            callback(self.mode)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Show:
+            for name, (screen, _) in list(self.screens.items()):
+                if screen is obj:
+                    self.apply(name)
+        return False
+
+    def set_mode(self, mode):
+        if mode == self.mode:
+            return
+        start = time.perf_counter()
+        self.mode = mode
+        for name, (screen, _) in list(self.screens.items()):
+            if sip.isdeleted(screen):
+                self.unregister(name)
+            elif screen.isVisible():
+                self.apply(name)
+        self.switches += 1
+        self.switch_ms = (time.perf_counter() - start) * 1000
+        self.changed.emit(mode)
+
+    def other_mode(self):
+        return "day" if self.mode == "night" else "night"
+
+    def toggle(self):
+        """Manual switch, which also leaves the automatic mode"""
+        self.set_auto(False)
+        self.set_mode(self.other_mode())
+
+    # --- Automatic mode ---
+    def set_auto(self, enabled):
+        if enabled == self.auto:
+            return
+        self.auto = enabled
+        if enabled:
+            tick_scheduler.scheduler().subscribe_minute("theme auto", self.check_time, self)
+        else:
+            tick_scheduler.scheduler().unsubscribe_minute("theme auto")
+
+    def check_time(self, now):
+        if self.auto and not self.light_seen:
+            hour = now.time().hour()
+            night = hour >= NIGHT_FROM_HOUR or hour < DAY_FROM_HOUR
+            self.set_mode("night" if night else "day")
+
+    def update_light(self, lux):
+        """Ambient light reading in lux, e.g. from the ESP32"""
+        self.light_seen = True
+        if not self.auto:
+            return
+        if lux < NIGHT_BELOW_LUX:
+            self.set_mode("night")
+        elif lux > DAY_ABOVE_LUX:
+            self.set_mode("day")
+
+    def stats(self):
+        return {"mode": self.mode, "auto": self.auto, "switches": self.switches,
+                "last_switch_ms": round(self.switch_ms, 3)}
+
+
+_manager = None
+
+
+def manager():
+    """The theme manager shared by all screens"""
+    global _manager
+    if _manager is None:
+        _manager = ThemeManager()
+    return _manager
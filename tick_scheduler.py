@@ -0,0 +1,163 @@
+import time
+from collections import Counter
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QTimer, QDateTime, Qt
+
+
+# Half period of every blinking indicator
+BLINK_INTERVAL_MS = 500
+
+# A timer that fires this early still counts as on time
+SLACK_MS = 2
+
+
+def monotonic_ms():
+    return time.monotonic() * 1000
+
+
+class TickScheduler(QObject):
+    """One timer for every periodic update of the UI.
+
+    - blink channels share one phase, so the left/right indicators and the
+      hazard light always switch on the same tick
+    - minute subscribers are called on the minute, not every second
+    - call_later replaces one-shot timers such as the indicator auto-stop
+
+    The timer is re-armed for the earliest pending event only, so with no
+    indicator blinking the UI wakes up once a minute. wakeups counts the
+    calls per subscriber.
+    """
+
+    def __init__(self, blink_interval_ms=BLINK_INTERVAL_MS):
+        super().__init__()
+        self.blink_interval_ms = blink_interval_ms
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.tick)
+
+        self.blinkers = {}          # name -> (callback(on), owner)
+        self.blink_epoch = 0.0      # monotonic ms where the shared phase starts
+        self.next_edge = 0.0        # monotonic ms of the next blink edge
+        self.minute_subscribers = {}  # name -> (callback(QDateTime), owner)
+        self.next_minute = 0        # wall clock ms of the next minute boundary
+        self.deadlines = {}         # name -> (monotonic due ms, callback, owner)
+
+        self.timer_wakeups = 0
+        self.wakeups = Counter()
+
+    # --- Blink channels ---
+    def start_blink(self, name, callback, owner=None):
+        """Call callback(on) on every blink edge until stop_blink(name)"""
+        now = monotonic_ms()
+        if not self.blinkers:
+            self.blink_epoch = now  # first channel starts "on" right away
+            self.next_edge = now + self.blink_interval_ms
+        self.blinkers[name] = (callback, owner)
+        self.call(name, callback, owner, self.blink_on(now))
+        self.schedule()
+
+    def stop_blink(self, name):
+        if self.blinkers.pop(name, None) is not None:
+            self.schedule()
+
+    def is_blinking(self, name):
+        return name in self.blinkers
+
+    def blink_on(self, now):
+        return int((now - self.blink_epoch + SLACK_MS) // self.blink_interval_ms) % 2 == 0
+
+    def next_blink_edge(self, now):
+        periods = (now - self.blink_epoch + SLACK_MS) // self.blink_interval_ms
+        return self.blink_epoch + (periods + 1) * self.blink_interval_ms
+
+    # --- Minute aligned clock ---
+    def subscribe_minute(self, name, callback, owner=None):
+        """Call callback(QDateTime) now and whenever the minute changes"""
+        if not self.minute_subscribers:
+            self.next_minute = self.minute_after(QDateTime.currentMSecsSinceEpoch())
+        self.minute_subscribers[name] = (callback, owner)
+        self.call(name, callback, owner, QDateTime.currentDateTime())
+        self.schedule()
+
+    def unsubscribe_minute(self, name):
+        self.minute_subscribers.pop(name, None)
+
+    def minute_after(self, wall):
+        return ((wall + SLACK_MS) // 60000 + 1) * 60000
+
+    # --- One-shot deadlines ---
+    def call_later(self, name, delay_ms, callback, owner=None):
+        """Call callback() once after delay_ms; a new call with the same name replaces it"""
+        self.deadlines[name] = (monotonic_ms() + delay_ms, callback, owner)
+        self.schedule()
+
+    def cancel(self, name):
+        self.deadlines.pop(name, None)
+
+    # --- Dispatch ---
+    def call(self, name, callback, owner, *args):
+        if owner is not None and sip.isdeleted(owner):
+            self.blinkers.pop(name, None)
+            self.minute_subscribers.pop(name, None)
+            self.deadlines.pop(name, None)
+            return
+        self.wakeups[name] += 1
+        callback(*args)
+
+    def tick(self):
+        self.timer_wakeups += 1
+        now = monotonic_ms()
+
+        if self.blinkers and now >= self.next_edge - SLACK_MS:
+            on = self.blink_on(now)
+            for name, (callback, owner) in list(self.blinkers.items()):
+                self.call(name, callback, owner, on)
+            self.next_edge = self.next_blink_edge(now)
+
+        wall = QDateTime.currentMSecsSinceEpoch()
+        if self.minute_subscribers and wall >= self.next_minute - SLACK_MS:
+            # a timer that fired a little early still shows the new minute
+            current = QDateTime.fromMSecsSinceEpoch(max(wall, self.next_minute))
+            for name, (callback, owner) in list(self.minute_subscribers.items()):
+                self.call(name, callback, owner, current)
+            self.next_minute = self.minute_after(wall)
+
+        for name, (due, callback, owner) in list(self.deadlines.items()):
+            if now >= due - SLACK_MS and self.deadlines.get(name, (None,))[0] == due:
+                del self.deadlines[name]
+                self.call(name, callback, owner)
+
+        self.schedule()
+
+    def schedule(self):
+        """Arm the timer for the earliest pending event"""
+        now = monotonic_ms()
+        due = []
+        if self.blinkers:
+            due.append(self.next_edge)
+        if self.minute_subscribers:
+            wall = QDateTime.currentMSecsSinceEpoch()
+            if self.next_minute - wall > 60000 + SLACK_MS:
+                self.next_minute = self.minute_after(wall)  # the clock was set back
+            due.append(now + self.next_minute - wall)
+        due.extend(deadline for deadline, _, _ in self.deadlines.values())
+
+        if due:
+            self.timer.start(max(0, int(round(min(due) - now))))
+        else:
+            self.timer.stop()
+
+    def stats(self):
+        return {"timer_wakeups": self.timer_wakeups, "subscribers": dict(self.wakeups)}
+
+
+_scheduler = None
+
+
+def scheduler():
+    """The tick scheduler shared by all screens"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TickScheduler()
+    return _scheduler
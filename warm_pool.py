@@ -0,0 +1,243 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+
+import app_paths
+import startup_profile
+from script_loader import load_script, script_path
+
+
+# Heavy screens that get a pre-started worker process
+WORKERS = ("navigation", "3d viewer")
+
+# Wait before a used worker is replaced, so the re-warm does not compete
+# with the screen that was just opened
+REWARM_DELAY_MS = 3000
+
+# Heavy screens the user has opened before; only those are warmed at start
+USAGE_NAME = "warm_pool.json"
+
+# A worker is only kept warm while this much memory stays available for the
+# rest of the system; a hidden map or loaded model holds hundreds of MB
+MIN_AVAILABLE_MB = 1024
+
+
+def available_mb():
+    """MemAvailable from /proc/meminfo in MB, None where it cannot be read"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def load_usage():
+    path = app_paths.data_path(USAGE_NAME)
+    if not os.path.exists(path):
+        return set()
+    try:
+        with open(path) as f:
+            return set(json.load(f)["opened"])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Could not read warm pool usage {path}: {e}")
+        return set()
+
+
+def save_usage(opened):
+    path = app_paths.data_path(USAGE_NAME)
+    try:
+        with open(path, "w") as f:
+            json.dump({"opened": sorted(opened)}, f)
+    except OSError as e:
+        print(f"Could not save warm pool usage {path}: {e}")
+
+
+# --- Scheduling priority ---
+def can_leave_idle_priority():
+    """SCHED_IDLE can only be left again with CAP_SYS_NICE or RLIMIT_NICE >= 20"""
+    if not hasattr(os, "SCHED_IDLE"):
+        return False
+    if os.geteuid() == 0:
+        return True
+    soft, _ = resource.getrlimit(resource.RLIMIT_NICE)
+    return soft == resource.RLIM_INFINITY or soft >= 20
+
+
+def enter_idle_priority():
+    """Run this process (and every thread it starts) only when a core is idle"""
+    os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+
+
+def leave_idle_priority():
+    """Put every thread of this process back to normal scheduling"""
+    if os.sched_getscheduler(0) != getattr(os, "SCHED_IDLE", None):
+        return
+    for tid in os.listdir("/proc/self/task"):
+        try:
+            os.sched_setscheduler(int(tid), os.SCHED_OTHER, os.sched_param(0))
+        except OSError as e:
+            print(f"Warm worker could not leave idle priority: {e}")
+            return
+
+
+# --- Main process side ---
+class WarmPool:
+    """Keeps one pre-imported, pre-initialized worker process per heavy screen.
+
+    Opening a screen only writes a one line JSON window request to the
+    worker's stdin. The used worker is then replaced in the background.
+    Workers are only kept for screens that were opened before, in this or
+    an earlier session, and only while MIN_AVAILABLE_MB of memory stays
+    available; the first visit to a screen starts its worker cold.
+    """
+
+    def __init__(self, kinds=WORKERS):
+        self.kinds = kinds
+        self.idle = {}      # kind -> warm worker waiting for a request
+        self.running = []   # workers that were handed a window
+        self.idle_priority = can_leave_idle_priority()
+        self.opened = load_usage()
+
+    def start(self):
+        for kind in self.kinds:
+            if kind in self.opened:
+                self.warm(kind)
+
+    def warm(self, kind):
+        if kind in self.idle:
+            return
+        available = available_mb()
+        if available is not None and available < MIN_AVAILABLE_MB:
+            print(f"Not warming {kind}: {available} MB of memory available")
+            return
+        self.idle[kind] = self.spawn(kind)
+
+    def spawn(self, kind):
+        preexec = enter_idle_priority if self.idle_priority else None
+        args = [sys.executable, script_path("warm_pool.py"), kind]
+        if startup_profile.enabled():
+            args.append(startup_profile.FLAG)
+        return subprocess.Popen(args, stdin=subprocess.PIPE, text=True, preexec_fn=preexec)
+
+    def open(self, kind, **request):
+        """Hand a window request to the warm worker of a heavy screen"""
+        self.running = [w for w in self.running if w.poll() is None]
+
+        worker = self.idle.pop(kind, None)
+        if worker is None or worker.poll() is not None:
+            print(f"No warm {kind} worker, starting one cold")
+            worker = self.spawn(kind)
+        try:
+            worker.stdin.write(json.dumps(request) + "\n")
+            worker.stdin.close()
+        except OSError as e:
+            print(f"Error opening {kind}: {e}")
+            return False
+        self.running.append(worker)
+        if kind not in self.opened:
+            self.opened.add(kind)
+            save_usage(self.opened)
+
+        from PyQt5.QtCore import QTimer
+        QTimer.singleShot(REWARM_DELAY_MS, lambda: self.warm(kind))
+        return True
+
+    def shutdown(self):
+        """Let the idle workers exit (they stop when stdin is closed)"""
+        for worker in self.idle.values():
+            try:
+                worker.stdin.close()
+            except OSError:
+                pass
+        self.idle.clear()
+
+
+_pool = None
+
+
+def pool():
+    """The warm pool shared by all screens; warms the screens opened before on first use"""
+    global _pool
+    if _pool is None:
+        _pool = WarmPool()
+        _pool.start()
+    return _pool
+
+
+def shutdown():
+    if _pool is not None:
+        _pool.shutdown()
+
+
+# --- Worker process side ---
+def read_request():
+    """Block until the pool sends a window request; None means shut down"""
+    line = sys.stdin.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def serve_navigation():
+    profile = startup_profile.StartupProfile("navigation worker")
+    with profile.phase("screen module imports"):
+        # navigation imports QtWebEngineWidgets, which has to happen before QApplication
+        module = load_script("navigation .py")
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtCore import QSocketNotifier
+
+    with profile.phase("widget construction"):
+        app = QApplication(sys.argv)
+        window = module.NavigationUI()  # starts loading the map while hidden
+
+    def on_request():
+        notifier.setEnabled(False)
+        request = read_request()
+        if request is None:
+            app.quit()
+            return
+        leave_idle_priority()
+        if startup_profile.enabled():
+            profile.watch_first_paint(window)
+        window.showFullScreen()
+
+    notifier = QSocketNotifier(sys.stdin.fileno(), QSocketNotifier.Read)
+    notifier.activated.connect(on_request)
+    return app.exec_()
+
+
+def serve_3d_viewer():
+    profile = startup_profile.StartupProfile("3d viewer worker")
+    with profile.phase("screen module imports"):
+        module = load_script("3d model viewer.py")
+    with profile.phase("model loading"):
+        model = module.load_model()
+    if startup_profile.enabled():
+        profile.report()
+
+    request = read_request()
+    if request is None:
+        return 0
+    leave_idle_priority()
+    module.show_model(model, request.get("title", "3D Model Viewer"),
+                      request.get("field_of_view", 40))
+    return 0
+
+
+SERVERS = {
+    "navigation": serve_navigation,
+    "3d viewer": serve_3d_viewer,
+}
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(SERVERS[sys.argv[1]]())
+    except Exception as e:
+        print(f"Warm worker {sys.argv[1]} failed: {e}")
+        sys.exit(1)